@@ -0,0 +1,130 @@
+# Game_Service/app/AnswerCache.py
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable, Optional
+import os
+import threading
+import time
+
+ENTRY_OVERHEAD_BYTES = 200  #rough cost of the key, the OrderedDict slot and the two array headers
+
+
+def cache_max_bytes() -> int:
+    return int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+def cache_ttl_seconds() -> float:
+    #sessions and daily challenges don't change once dealt, the TTL just stops abandoned ones hanging around
+    return float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+
+
+def session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def daily_key(challenge_date: date) -> str:
+    return f"daily:{challenge_date.isoformat()}"
+
+
+class AnswerSet:
+    """
+    id -> answer for one session or daily challenge, stored as two sorted int64
+    arrays so a set of 8 costs ~128 bytes instead of a dict of boxed ints.
+    """
+
+    __slots__ = ("ids", "answers", "expires_at")
+
+    def __init__(self, pairs: Iterable[tuple[int, int]], expires_at: float):
+        ordered = sorted(pairs)
+        self.ids = array("q", (question_id for question_id, _ in ordered))
+        self.answers = array("q", (answer for _, answer in ordered))
+        self.expires_at = expires_at
+
+    def get(self, question_id: int) -> Optional[int]:
+        i = bisect_left(self.ids, question_id)
+        if i < len(self.ids) and self.ids[i] == question_id:
+            return self.answers[i]
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        return ENTRY_OVERHEAD_BYTES + (len(self.ids) + len(self.answers)) * self.ids.itemsize
+
+
+class AnswerCache:
+    #LRU bounded by bytes, entries also expire after a TTL
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, AnswerSet]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[AnswerSet]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, pairs: Iterable[tuple[int, int]]) -> AnswerSet:
+        entry = AnswerSet(pairs, time.monotonic() + cache_ttl_seconds())
+        limit = cache_max_bytes()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if entry.nbytes > limit:
+                return entry  #too big to ever fit, use it for this request only
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > limit:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": cache_max_bytes(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+answer_cache = AnswerCache()
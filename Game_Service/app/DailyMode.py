@@ -1,9 +1,11 @@
 # Game_Service/app/DailyMode.py
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, update, and_, or_, func
 from sqlalchemy.exc import IntegrityError
-from datetime import date, datetime, timezone
+from datetime import date, datetime, time, timedelta, timezone
+from collections import OrderedDict
 from .GameDatabase import SessionLocal
 from .GameModels import DailyChallengeDB, DailyQuestionDB, DailyCategoryDB
 from .GameSchemas import (
@@ -11,13 +13,27 @@ from .GameSchemas import (
     DailyQuestionPublic,
     DailyValidatePlacementRequest,
     DailyValidatePlacementResponse,
+    DailyValidateTimelineRequest,
+    ValidateTimelineResponse,
     DailyCategoryRead,
     DailyCategoryCreate,
     DailyChallengeListEntry,
+    DailyUpcomingEntry,
+    DailyGenerateUpcomingResponse,
+    DailyRecoverResponse,
 )
-from .QuestionGenerator import generate_questions
+from .QuestionGenerator import generate_questions_async, worst_case_call_seconds
+from .Placement import placement_is_correct, check_timeline
+from .AnswerCache import answer_cache, daily_key, AnswerSet
+from typing import Optional
+from time import perf_counter
+import asyncio
+import hashlib
 import os
+import random
 import secrets
+import threading
+import traceback
 
 router = APIRouter(prefix="/api/daily", tags=["daily"])
 
@@ -39,6 +55,117 @@ def difficulty_for_date(d: date) -> str:
     return cycle[d.toordinal() % 3]
 
 
+def daily_lookahead_days() -> int:
+    #how many days (today included) generate-upcoming keeps ready ahead of time
+    return max(1, int(os.getenv("DAILY_LOOKAHEAD_DAYS", "7")))
+
+
+def daily_generate_concurrency() -> int:
+    #model calls generate-upcoming runs at once
+    return max(1, int(os.getenv("DAILY_GENERATE_CONCURRENCY", "3")))
+
+
+def daily_lease_seconds() -> float:
+    #how long a generator owns a pending row; after that the row counts as stale and recovery may take it over.
+    #defaults to the worst-case model call plus a minute for the DB work, so a slow call doesn't lose its row
+    configured = os.getenv("DAILY_LEASE_SECONDS")
+    return float(configured) if configured else worst_case_call_seconds() + 60
+
+
+def daily_retry_base_seconds() -> float:
+    return float(os.getenv("DAILY_RETRY_BASE_SECONDS", "60"))
+
+
+def daily_retry_max_seconds() -> float:
+    return float(os.getenv("DAILY_RETRY_MAX_SECONDS", "3600"))
+
+
+def daily_max_attempts() -> int:
+    #a challenge that failed this many times is left failed for someone to look at
+    return max(1, int(os.getenv("DAILY_MAX_ATTEMPTS", "6")))
+
+
+def daily_recovery_interval() -> float:
+    #how often each worker looks for challenges to recover, 0 turns the background loop off
+    return float(os.getenv("DAILY_RECOVERY_INTERVAL_SECONDS", "300"))
+
+
+def retry_delay(attempts: int) -> float:
+    #exponential backoff after the given number of failed attempts
+    return min(daily_retry_max_seconds(), daily_retry_base_seconds() * 2 ** max(0, attempts - 1))
+
+
+DAILY_QUESTION_COUNT = 8
+MAX_LOOKAHEAD_DAYS = 30
+RECOVERY_BATCH = 30
+
+
+def seconds_until_utc_midnight(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    midnight = datetime.combine(now.date() + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class DailyPayloadCache:
+    """
+    Serialized DailyChallengePublic bodies keyed by challenge date, with a strong
+    ETag (hash of the exact bytes). Only successful challenges are stored, so a
+    404 before generation is never cached. Oldest entry goes first when full.
+    """
+
+    def __init__(self, max_entries: int = 1):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._entries: OrderedDict[date, tuple[bytes, str]] = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def get(self, day: date) -> Optional[tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(day)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(day)
+            self.hits += 1
+            return entry
+
+    def put(self, day: date, payload: DailyChallengePublic) -> tuple[bytes, str]:
+        body = payload.model_dump_json().encode()
+        entry = (body, f'"daily-{hashlib.sha256(body).hexdigest()[:32]}"')
+        with self._lock:
+            self._entries[day] = entry
+            self._entries.move_to_end(day)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, day: Optional[date] = None):
+        with self._lock:
+            if day is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(day, None)
+
+
+#today's payload, every player fetches it and it only changes when generate-today succeeds
+today_cache = DailyPayloadCache(max_entries=1)
+#past challenges never change again, so their payloads are memoized for good (most recent dates kept)
+history_cache = DailyPayloadCache(max_entries=int(os.getenv("DAILY_HISTORY_CACHE_SIZE", "64")))
+
+PAST_CHALLENGE_MAX_AGE = 24 * 60 * 60
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+
+
 def verify_daily_job_token(x_daily_job_token: str = Header(default="")):
     expected = os.getenv("DAILY_JOB_TOKEN")
     if not expected:
@@ -49,7 +176,8 @@ def verify_daily_job_token(x_daily_job_token: str = Header(default="")):
 
 
 def ensure_categories_seeded(db: Session):
-    existing = db.execute(select(DailyCategoryDB)).scalars().first()
+    #called once from the lifespan, not on every pick
+    existing = db.execute(select(DailyCategoryDB.id).limit(1)).scalar()
     if existing:
         return
 
@@ -65,148 +193,508 @@ def ensure_categories_seeded(db: Session):
     ]
     for name in defaults:
         db.add(DailyCategoryDB(name=name))
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()  #another worker seeded them first
 
 
-def pick_unused_category(db: Session) -> str:
-    ensure_categories_seeded(db)
+def _rotate_category(db: Session, used_on: date) -> Optional[tuple[str, int]]:
+    """
+    Hands out the next category in the rotation with one UPDATE ... RETURNING: the
+    category used the fewest times (used_cycle), in shuffled random_key order within
+    that cycle. The picked row gets a fresh random_key, so the next cycle comes round
+    in a new order. On Postgres the subquery locks with SKIP LOCKED, so concurrent
+    callers each get a different row instead of queueing on (and then re-picking) the
+    same one; SQLite runs writes one at a time, which gives the same guarantee.
+    Doesn't commit, so the caller can make the pick part of its own transaction.
+    Returns (name, cycle) or None when there are no categories.
+    """
+    next_up = (
+        select(DailyCategoryDB.id)
+        .order_by(DailyCategoryDB.used_cycle, DailyCategoryDB.random_key)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    picked = db.execute(
+        update(DailyCategoryDB)
+        .where(DailyCategoryDB.id == next_up)
+        .values(used_cycle=DailyCategoryDB.used_cycle + 1, used_at=used_on, random_key=random.random())
+        .returning(DailyCategoryDB.name, DailyCategoryDB.used_cycle)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return tuple(picked) if picked else None
+
+
+def _next_category(db: Session, used_on: date) -> str:
+    picked = _rotate_category(db, used_on)
+    if picked is None:
+        raise HTTPException(status_code=500, detail="No categories available")
+    return picked[0]
 
-    cat = db.execute(
-        select(DailyCategoryDB)
-        .where(DailyCategoryDB.is_used == False)
-        .order_by(func.random())
-    ).scalars().first()
 
-    if not cat:
-        # Reset if all categories have been used
-        cats = db.execute(select(DailyCategoryDB)).scalars().all()
-        for c in cats:
-            c.is_used = False
-            c.used_at = None
-        db.commit()
+def pick_unused_category(db: Session, used_on: Optional[date] = None) -> str:
+    #a standalone pick, committed straight away
+    name = _next_category(db, used_on or get_utc_today())
+    db.commit()
+    return name
 
-        cat = db.execute(
-            select(DailyCategoryDB)
-            .where(DailyCategoryDB.is_used == False)
-            .order_by(func.random())
-        ).scalars().first()
 
-    if not cat:
-        raise HTTPException(status_code=500, detail="No categories available")
+# -------- Daily Mode Endpoints --------
 
-    cat.is_used = True
-    cat.used_at = get_utc_today()
+def _publish_ready(db: Session, today: date) -> int:
+    #pre-generated challenges go live by flipping ready -> success once their date comes round. Commits.
+    published = db.execute(
+        update(DailyChallengeDB)
+        .where(DailyChallengeDB.status == "ready")
+        .where(DailyChallengeDB.challenge_date <= today)
+        .values(status="success")
+    ).rowcount
     db.commit()
-    return cat.name
+    return published
 
 
-# -------- Daily Mode Endpoints --------
+def _new_challenge(db: Session, day: date) -> Optional[DailyChallengeDB]:
+    #a pending challenge row for `day` with the next category in the rotation, None if another request claimed the date first.
+    #the rotation and the insert commit together, so losing the date race hands the category back
+    challenge = DailyChallengeDB(
+        challenge_date=day,
+        category=_next_category(db, day),
+        difficulty=difficulty_for_date(day),
+        status="pending",
+        attempts=1,
+        lease_until=datetime.now(timezone.utc) + timedelta(seconds=daily_lease_seconds()),
+    )
+    db.add(challenge)
 
-@router.post("/generate-today")
-def generate_today(
-    db: Session = Depends(get_db),
-    _auth: None = Depends(verify_daily_job_token),
-):
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+
+    db.refresh(challenge)
+    return challenge
+
+
+def _recoverable(now: datetime):
+    #failed rows whose backoff is over, and pending rows whose generator's lease ran out (it crashed or hung)
+    return or_(
+        and_(
+            DailyChallengeDB.status == "failed",
+            DailyChallengeDB.attempts < daily_max_attempts(),
+            or_(DailyChallengeDB.next_attempt_at.is_(None), DailyChallengeDB.next_attempt_at <= now),
+        ),
+        and_(
+            DailyChallengeDB.status == "pending",
+            or_(
+                DailyChallengeDB.lease_until < now,
+                #rows from before leases existed
+                and_(DailyChallengeDB.lease_until.is_(None), DailyChallengeDB.generated_at < now - timedelta(seconds=daily_lease_seconds())),
+            ),
+        ),
+    )
+
+
+def _take_lease(db: Session, challenge_id: int) -> Optional[DailyChallengeDB]:
     """
-    Creates today's daily challenge once, using the UTC date.
-    If it already exists and succeeded, return a non-error response.
+    Takes over a failed or stale challenge for one more attempt. The check and the
+    lease are a single conditional UPDATE, so when several workers race for the same
+    row exactly one gets rowcount 1 and the others move on. Commits.
     """
-    today = get_utc_today()
+    now = datetime.now(timezone.utc)
+    taken = db.execute(
+        update(DailyChallengeDB)
+        .where(DailyChallengeDB.id == challenge_id)
+        .where(_recoverable(now))
+        .values(
+            status="pending",
+            attempts=DailyChallengeDB.attempts + 1,
+            lease_until=now + timedelta(seconds=daily_lease_seconds()),
+            next_attempt_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not taken:
+        return None
+    challenge = db.get(DailyChallengeDB, challenge_id)
+    db.refresh(challenge)
+    return challenge
 
+
+def _claim_today(db: Session, today: date):
+    """
+    Returns (challenge, response). If today's challenge already succeeded (or was
+    generated ahead of time and is published now) the response dict is set and there
+    is nothing to generate; otherwise a new pending challenge row is created, or a
+    failed/stale one is leased for another attempt, and returned.
+    """
+    _publish_ready(db, today)
     existing = db.execute(
         select(DailyChallengeDB).where(DailyChallengeDB.challenge_date == today)
     ).scalars().first()
 
     if existing:
         if existing.status == "success":
-            return {
+            return None, {
                 "status": "already_exists",
                 "date": str(today),
                 "category": existing.category,
                 "difficulty": existing.difficulty,
             }
-        raise HTTPException(
-            status_code=409,
-            detail="Daily challenge already exists for today but is not in success state",
-        )
+        challenge = _take_lease(db, existing.id)
+        if challenge is None:
+            raise HTTPException(
+                status_code=409,
+                detail="Daily challenge for today is being generated or waiting to retry",
+            )
+        return challenge, None
 
-    difficulty = difficulty_for_date(today)
-    category = pick_unused_category(db)
+    challenge = _new_challenge(db, today)
+    if challenge is None:
+        raise HTTPException(status_code=409, detail="Daily challenge already exists for today")
+    return challenge, None
 
-    challenge = DailyChallengeDB(
-        challenge_date=today,
-        category=category,
-        difficulty=difficulty,
-        status="pending",
+
+def _owned(challenge: DailyChallengeDB):
+    #the row is still pending under the lease this worker holds (recovery elsewhere replaces lease_until when it takes over)
+    return and_(
+        DailyChallengeDB.id == challenge.id,
+        DailyChallengeDB.status == "pending",
+        DailyChallengeDB.lease_until == challenge.lease_until,
     )
-    db.add(challenge)
 
-    try:
-        db.commit()
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="Daily challenge already exists for today")
 
+def _renew_lease(db: Session, challenge: DailyChallengeDB) -> bool:
+    #a fresh lease right before the model call, False if the row was taken over while it waited. Commits.
+    renewed = db.execute(
+        update(DailyChallengeDB)
+        .where(_owned(challenge))
+        .values(lease_until=datetime.now(timezone.utc) + timedelta(seconds=daily_lease_seconds()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    db.refresh(challenge)
+    return bool(renewed)
+
+
+def _mark_failed(db: Session, challenge: DailyChallengeDB, error: BaseException, latency_ms: Optional[int] = None):
+    #records the failure and the next retry, unless another worker owns the row by now. Commits.
+    db.execute(
+        update(DailyChallengeDB)
+        .where(_owned(challenge))
+        .values(
+            status="failed",
+            error_message=str(error),
+            lease_until=None,
+            next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=retry_delay(challenge.attempts)),
+            last_latency_ms=latency_ms,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
     db.refresh(challenge)
 
-    try:
-        generated = generate_questions(category=category, difficulty=difficulty, count=8)
-    except Exception as e:
-        challenge.status = "failed"
-        challenge.error_message = str(e)
-        db.commit()
-        raise HTTPException(status_code=502, detail=f"Failed to generate questions: {str(e)}")
 
+def _save_generated(
+    db: Session, challenge: DailyChallengeDB, generated, status: str = "success", latency_ms: Optional[int] = None
+) -> Optional[list[DailyQuestionDB]]:
+    """
+    Stores the questions and flips the row to `status`, in one transaction that
+    only goes through while this worker still holds the lease. Returns None (and
+    writes nothing) if the lease was lost, so a taken-over row never gets two sets.
+    """
+    owned = db.execute(
+        update(DailyChallengeDB)
+        .where(_owned(challenge))
+        .values(status=status, error_message=None, lease_until=None, next_attempt_at=None, last_latency_ms=latency_ms)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not owned:
+        db.rollback()
+        db.refresh(challenge)
+        return None
+
+    rows = []
     for q in generated:
-        db.add(
-            DailyQuestionDB(
-                daily_challenge_id=challenge.id,
-                question=q.question,
-                answer=q.answer,
-                category=q.category,
-                difficulty=q.difficulty,
-            )
+        row = DailyQuestionDB(
+            daily_challenge_id=challenge.id,
+            question=q.question,
+            answer=q.answer,
+            category=q.category,
+            difficulty=q.difficulty,
         )
-
-    challenge.status = "success"
-    challenge.error_message = None
+        db.add(row)
+        rows.append(row)
     db.commit()
+    db.refresh(challenge)
+
+    if status == "success":
+        #fill the answer cache on write so today's drops validate without touching the DB (never for days not live yet)
+        answer_cache.put(daily_key(challenge.challenge_date), [(r.id, r.answer) for r in rows])
+        today_cache.invalidate(challenge.challenge_date)
+    return rows
+
+
+async def _generate_for(challenge: DailyChallengeDB):
+    #the model call for one challenge: (questions or the exception it raised, latency in ms)
+    started = perf_counter()
+    try:
+        result = await generate_questions_async(
+            category=challenge.category, difficulty=challenge.difficulty, count=DAILY_QUESTION_COUNT
+        )
+    except BaseException as e:  #CancelledError too, the caller records it before re-raising
+        result = e
+    return result, int((perf_counter() - started) * 1000)
+
+
+async def _generate_all(db: Session, challenges: list[DailyChallengeDB], today: date) -> tuple[int, int]:
+    """
+    Runs the model calls in parallel (DAILY_GENERATE_CONCURRENCY at a time) and saves
+    each result. A row's lease is renewed when its turn comes, not when it was
+    queued, and rows taken over by another worker meanwhile are skipped.
+    Returns (created, failed).
+    """
+    limit = asyncio.Semaphore(daily_generate_concurrency())
+    db_lock = asyncio.Lock()  #the tasks share one session, so its threadpool calls go one at a time
+
+    async def db_call(fn, *args):
+        async with db_lock:
+            return await run_in_threadpool(fn, db, *args)
+
+    async def generate(challenge: DailyChallengeDB):
+        async with limit:
+            if not await db_call(_renew_lease, challenge):
+                return "lost"
+            result, latency_ms = await _generate_for(challenge)
+            if isinstance(result, BaseException):  #CancelledError isn't an Exception, it must not be saved as questions
+                await db_call(_mark_failed, challenge, result, latency_ms)
+                if not isinstance(result, Exception):
+                    raise result
+                return "failed"
+            status = "success" if challenge.challenge_date <= today else "ready"
+            saved = await db_call(_save_generated, challenge, result, status, latency_ms)
+            return "lost" if saved is None else "created"
+
+    outcomes = await asyncio.gather(*(generate(c) for c in challenges), return_exceptions=True)
+
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome  #cancellation, once every row has been recorded
+    created = sum(1 for o in outcomes if o == "created")
+    failed = sum(1 for o in outcomes if o == "failed" or isinstance(o, Exception))  #a DB error leaves the row pending for recovery
+    return created, failed
+
+
+@router.post("/generate-today")
+async def generate_today(
+    db: Session = Depends(get_db),
+    _auth: None = Depends(verify_daily_job_token),
+):
+    """
+    Creates today's daily challenge once, using the UTC date.
+    If it already exists and succeeded, return a non-error response.
+    The DB work runs in the threadpool; the model call is awaited so it doesn't hold a worker thread.
+    """
+    today = get_utc_today()
+
+    challenge, response = await run_in_threadpool(_claim_today, db, today)
+    if response is not None:
+        return response
+
+    generated, latency_ms = await _generate_for(challenge)
+    if isinstance(generated, BaseException):
+        await run_in_threadpool(_mark_failed, db, challenge, generated, latency_ms)
+        if not isinstance(generated, Exception):
+            raise generated
+        raise HTTPException(status_code=502, detail=f"Failed to generate questions: {str(generated)}")
+
+    if await run_in_threadpool(_save_generated, db, challenge, generated, "success", latency_ms) is None:
+        raise HTTPException(status_code=409, detail="Daily challenge for today was taken over by another worker")
 
     return {
         "status": "created",
         "date": str(today),
-        "category": category,
-        "difficulty": difficulty,
+        "category": challenge.category,
+        "difficulty": challenge.difficulty,
     }
 
 
-@router.get("/today", response_model=DailyChallengePublic)
-def get_today(db: Session = Depends(get_db)):
+def _claim_upcoming(db: Session, today: date, days: int) -> list[DailyChallengeDB]:
+    #pending rows for every date in the window that has no challenge yet, claimed in date order so the rotation follows the calendar
+    _publish_ready(db, today)
+    window = [today + timedelta(days=i) for i in range(days)]
+    taken = set(db.execute(
+        select(DailyChallengeDB.challenge_date).where(DailyChallengeDB.challenge_date.in_(window))
+    ).scalars())
+    claimed = []
+    for day in window:
+        if day in taken:
+            continue
+        challenge = _new_challenge(db, day)
+        if challenge is not None:
+            claimed.append(challenge)
+    return claimed
+
+
+def _upcoming(db: Session, today: date, days: int) -> list[dict]:
+    #one entry per date in the window, "missing" where nothing has been generated yet
+    window = [today + timedelta(days=i) for i in range(days)]
+    rows = {
+        c.challenge_date: c
+        for c in db.execute(
+            select(DailyChallengeDB).where(DailyChallengeDB.challenge_date.in_(window))
+        ).scalars()
+    }
+    entries = []
+    for day in window:
+        c = rows.get(day)
+        entries.append({
+            "challenge_date": day,
+            "category": c.category if c else None,
+            "difficulty": c.difficulty if c else difficulty_for_date(day),
+            "status": c.status if c else "missing",
+            "error_message": c.error_message if c else None,
+            "attempts": c.attempts if c else 0,
+            "last_latency_ms": c.last_latency_ms if c else None,
+            "next_attempt_at": c.next_attempt_at if c else None,
+        })
+    return entries
+
+
+@router.post("/generate-upcoming", response_model=DailyGenerateUpcomingResponse)
+async def generate_upcoming(
+    days: Optional[int] = Query(default=None, ge=1, le=MAX_LOOKAHEAD_DAYS),
+    db: Session = Depends(get_db),
+    _auth: None = Depends(verify_daily_job_token),
+):
+    """
+    Generates every missing challenge from today to `days` ahead (DAILY_LOOKAHEAD_DAYS
+    by default), so a slow or failing model call on the day doesn't leave players
+    without one. Future days are stored as "ready" and published by a single UPDATE
+    once their date arrives; today goes straight to "success". Model calls run in
+    parallel (DAILY_GENERATE_CONCURRENCY at a time), the DB work in the threadpool.
+    """
     today = get_utc_today()
+    days = days or daily_lookahead_days()
+    claimed = await run_in_threadpool(_claim_upcoming, db, today, days)
+    created, failed = await _generate_all(db, claimed, today)
+
+    upcoming = await run_in_threadpool(_upcoming, db, today, days)
+    return {"created": created, "failed": failed, "days": upcoming}
+
+
+def _lease_recoverable(db: Session, today: date) -> list[DailyChallengeDB]:
+    #today's and upcoming challenges that failed or went stale, each leased by this worker before it is retried
+    ids = db.execute(
+        select(DailyChallengeDB.id)
+        .where(DailyChallengeDB.challenge_date >= today)
+        .where(_recoverable(datetime.now(timezone.utc)))
+        .order_by(DailyChallengeDB.challenge_date)
+        .limit(RECOVERY_BATCH)
+    ).scalars().all()
+    leased = [_take_lease(db, challenge_id) for challenge_id in ids]
+    return [c for c in leased if c is not None]
 
-    challenge = db.execute(
-        select(DailyChallengeDB).where(DailyChallengeDB.challenge_date == today)
-    ).scalars().first()
 
-    if not challenge or challenge.status != "success":
-        raise HTTPException(status_code=404, detail="Daily challenge not available yet")
+async def recover_challenges(db: Session) -> dict:
+    today = get_utc_today()
+    await run_in_threadpool(_publish_ready, db, today)
+    leased = await run_in_threadpool(_lease_recoverable, db, today)
+    recovered, failed = await _generate_all(db, leased, today)
+    return {"attempted": len(leased), "recovered": recovered, "failed": failed}
 
-    questions = db.execute(
-        select(DailyQuestionDB)
-        .where(DailyQuestionDB.daily_challenge_id == challenge.id)
-        .order_by(DailyQuestionDB.id)
-    ).scalars().all()
 
-    # Convert to public schema (NO answer field)
-    public_questions = [DailyQuestionPublic.model_validate(q) for q in questions]
+@router.post("/recover", response_model=DailyRecoverResponse)
+async def recover(db: Session = Depends(get_db), _auth: None = Depends(verify_daily_job_token)):
+    """
+    Retries today's and upcoming challenges that failed (once their exponential
+    backoff is over, up to DAILY_MAX_ATTEMPTS) or that are stuck in pending after
+    their generator's lease expired. Each row is leased first, so workers running
+    this at the same time never generate the same date twice. The same pass runs
+    in the background every DAILY_RECOVERY_INTERVAL_SECONDS (see recovery_loop).
+    """
+    return await recover_challenges(db)
 
+
+async def recovery_loop():
+    #started by the lifespan in every worker, the leases keep them from doubling up
+    interval = daily_recovery_interval()
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        db = SessionLocal()
+        try:
+            await recover_challenges(db)
+        except Exception:
+            traceback.print_exc()  #the rows stay recoverable, next round tries again
+        finally:
+            db.close()
+
+
+@router.get("/upcoming", response_model=list[DailyUpcomingEntry])
+def list_upcoming(
+    days: Optional[int] = Query(default=None, ge=1, le=MAX_LOOKAHEAD_DAYS),
+    db: Session = Depends(get_db),
+    _auth: None = Depends(verify_daily_job_token),
+):
+    #generation status of today and the days ahead; behind the job token since it names future categories
+    return _upcoming(db, get_utc_today(), days or daily_lookahead_days())
+
+
+def load_challenge(db: Session, challenge_date: date) -> Optional[DailyChallengeDB]:
+    #the challenge for a date with its questions (in id order) joined in, one round trip whatever its status
+    return db.execute(
+        select(DailyChallengeDB)
+        .options(joinedload(DailyChallengeDB.questions))
+        .where(DailyChallengeDB.challenge_date == challenge_date)
+    ).unique().scalars().first()
+
+
+def _public_challenge(challenge: DailyChallengeDB) -> DailyChallengePublic:
+    # Convert to public schema (NO answer field)
     return DailyChallengePublic(
         challenge_date=challenge.challenge_date,
         category=challenge.category,
         difficulty=challenge.difficulty,
-        questions=public_questions,
+        questions=[DailyQuestionPublic.model_validate(q) for q in challenge.questions],
     )
 
+
+def _payload_response(request: Request, cached: tuple[bytes, str], max_age: int) -> Response:
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/today", response_model=DailyChallengePublic)
+def get_today(request: Request, db: Session = Depends(get_db)):
+    """
+    Today's challenge (no answers). After the first request of the UTC day it is
+    served from today_cache without touching the database; the ETag is strong and
+    Cache-Control lets clients keep it until midnight UTC.
+    """
+    today = get_utc_today()
+    cached = today_cache.get(today)
+    if cached is None:
+        challenge = load_challenge(db, today)
+
+        if challenge and challenge.status == "ready":
+            _publish_ready(db, today)  #generated ahead of time, goes live even if the midnight job hasn't run yet
+            db.refresh(challenge)
+
+        if not challenge or challenge.status != "success":
+            raise HTTPException(status_code=404, detail="Daily challenge not available yet")
+
+        cached = today_cache.put(today, _public_challenge(challenge))
+
+    return _payload_response(request, cached, seconds_until_utc_midnight())
+
 @router.get("/history", response_model=list[DailyChallengeListEntry])
 def list_past_challenges(db: Session = Depends(get_db)):
     """
@@ -224,61 +712,77 @@ def list_past_challenges(db: Session = Depends(get_db)):
 
 
 @router.get("/history/{challenge_date}", response_model=DailyChallengePublic)
-def get_past_challenge(challenge_date: date, db: Session = Depends(get_db)):
+def get_past_challenge(challenge_date: date, request: Request, db: Session = Depends(get_db)):
     """
     Returns a specific past challenge by date including its questions (no answers).
-    Returns 404 if the date has no successful challenge.
+    Returns 404 if the date has no successful challenge. Dates before today are
+    memoized in history_cache and can be cached by clients for a day.
     """
-    challenge = db.execute(
-        select(DailyChallengeDB)
+    past = challenge_date < get_utc_today()
+    cached = history_cache.get(challenge_date) if past else None
+    if cached is None:
+        challenge = load_challenge(db, challenge_date)
+
+        if not challenge or challenge.status != "success":
+            raise HTTPException(status_code=404, detail="No challenge found for this date")
+
+        payload = _public_challenge(challenge)
+        if not past:
+            return payload
+        cached = history_cache.put(challenge_date, payload)
+
+    return _payload_response(request, cached, PAST_CHALLENGE_MAX_AGE)
+
+def _daily_answers(db: Session, challenge_date: date) -> AnswerSet:
+    #id -> answer for one day's challenge, from the cache or (on a miss) one query that then fills the cache
+    key = daily_key(challenge_date)
+    cached = answer_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = db.execute(
+        select(DailyQuestionDB.id, DailyQuestionDB.answer)
+        .join(DailyChallengeDB)
         .where(DailyChallengeDB.challenge_date == challenge_date)
         .where(DailyChallengeDB.status == "success")
-    ).scalars().first()
-
-    if not challenge:
-        raise HTTPException(status_code=404, detail="No challenge found for this date")
-
-    questions = db.execute(
-        select(DailyQuestionDB)
-        .where(DailyQuestionDB.daily_challenge_id == challenge.id)
-        .order_by(DailyQuestionDB.id)
-    ).scalars().all()
+    ).all()
+    pairs = [(row.id, row.answer) for row in rows]
+    if not pairs:
+        return AnswerSet(pairs, 0)
+    return answer_cache.put(key, pairs)
+
+
+def _daily_answer_from_db(db: Session, question_id: int) -> Optional[int]:
+    #only questions of published challenges, so answers of days generated ahead can't be read early
+    return db.execute(
+        select(DailyQuestionDB.answer)
+        .join(DailyChallengeDB)
+        .where(DailyQuestionDB.id == question_id)
+        .where(DailyChallengeDB.status == "success")
+    ).scalar()
 
-    public_questions = [DailyQuestionPublic.model_validate(q) for q in questions]
-
-    return DailyChallengePublic(
-        challenge_date=challenge.challenge_date,
-        category=challenge.category,
-        difficulty=challenge.difficulty,
-        questions=public_questions,
-    )
 
 @router.post("/validate-placement", response_model=DailyValidatePlacementResponse)
 def validate_daily(payload: DailyValidatePlacementRequest, db: Session = Depends(get_db)):
-    placed = db.get(DailyQuestionDB, payload.placed_question_id)
-    if not placed:
+    #with a challenge date the answers come from the per-challenge cache, otherwise each card is looked up on its own
+    if payload.challenge_date is not None:
+        lookup = _daily_answers(db, payload.challenge_date).get
+    else:
+        lookup = lambda question_id: _daily_answer_from_db(db, question_id)
+
+    placed_answer = lookup(payload.placed_question_id)
+    if placed_answer is None:
         raise HTTPException(status_code=404, detail="Placed question not found")
 
-    left = db.get(DailyQuestionDB, payload.left_neighbor_id) if payload.left_neighbor_id is not None else None
-    if payload.left_neighbor_id is not None and not left:
+    left_answer = lookup(payload.left_neighbor_id) if payload.left_neighbor_id is not None else None
+    if payload.left_neighbor_id is not None and left_answer is None:
         raise HTTPException(status_code=404, detail="Left neighbor question not found")
 
-    right = db.get(DailyQuestionDB, payload.right_neighbor_id) if payload.right_neighbor_id is not None else None
-    if payload.right_neighbor_id is not None and not right:
+    right_answer = lookup(payload.right_neighbor_id) if payload.right_neighbor_id is not None else None
+    if payload.right_neighbor_id is not None and right_answer is None:
         raise HTTPException(status_code=404, detail="Right neighbor question not found")
 
-    placed_answer = placed.answer
-    left_answer = left.answer if left else None
-    right_answer = right.answer if right else None
-
-    if left is None and right is None:
-        correct = True
-    elif left is None:
-        correct = placed_answer <= right_answer
-    elif right is None:
-        correct = left_answer <= placed_answer
-    else:
-        correct = left_answer <= placed_answer <= right_answer
+    correct = placement_is_correct(left_answer, placed_answer, right_answer)
 
     return DailyValidatePlacementResponse(
         correct=correct,
@@ -288,15 +792,59 @@ def validate_daily(payload: DailyValidatePlacementRequest, db: Session = Depends
     )
 
 
+@router.post("/validate-timeline", response_model=ValidateTimelineResponse)
+def validate_daily_timeline(payload: DailyValidateTimelineRequest, db: Session = Depends(get_db)):
+    """
+    Validates the whole daily number line in one request: the answers come from the
+    per-challenge cache (or a single IN query) and the order is checked in one pass.
+    """
+    if len(set(payload.question_ids)) != len(payload.question_ids):
+        raise HTTPException(status_code=422, detail="Timeline contains duplicate question ids")
+
+    if payload.challenge_date is not None:
+        challenge_answers = _daily_answers(db, payload.challenge_date)
+        answer_by_id = {qid: challenge_answers.get(qid) for qid in payload.question_ids}
+    else:
+        #only questions of published challenges, like _daily_answer_from_db
+        stmt = (
+            select(DailyQuestionDB.id, DailyQuestionDB.answer)
+            .join(DailyChallengeDB)
+            .where(DailyQuestionDB.id.in_(payload.question_ids))
+            .where(DailyChallengeDB.status == "success")
+        )
+        answer_by_id = {row.id: row.answer for row in db.execute(stmt)}
+
+    missing = [qid for qid in payload.question_ids if answer_by_id.get(qid) is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Question {missing[0]} not found")
+
+    answers = [answer_by_id[qid] for qid in payload.question_ids]
+    results, first_wrong = check_timeline(answers)
+    return ValidateTimelineResponse(
+        correct=first_wrong is None,
+        first_wrong_index=first_wrong,
+        slots=[
+            {"question_id": qid, "answer": answer, "correct": ok}
+            for qid, answer, ok in zip(payload.question_ids, answers, results)
+        ],
+    )
+
+
 @router.get("/categories", response_model=list[DailyCategoryRead])
 def list_daily_categories(db: Session = Depends(get_db)):
     cats = db.execute(select(DailyCategoryDB).order_by(DailyCategoryDB.id)).scalars().all()
-    return cats
+    current = min((c.used_cycle for c in cats), default=0)  #every category has been used this many times at least
+    return [
+        {"id": c.id, "name": c.name, "is_used": c.used_cycle > current, "used_at": c.used_at, "used_cycle": c.used_cycle}
+        for c in cats
+    ]
 
 
 @router.post("/categories", status_code=status.HTTP_201_CREATED, response_model=DailyCategoryRead)
 def create_daily_category(payload: DailyCategoryCreate, db: Session = Depends(get_db)):
-    cat = DailyCategoryDB(name=payload.name, is_used=False, used_at=None)
+    #joins the rotation's current cycle as not used yet, instead of being handed out once per cycle it missed
+    current = db.execute(select(func.coalesce(func.min(DailyCategoryDB.used_cycle), 0))).scalar_one()
+    cat = DailyCategoryDB(name=payload.name, is_used=False, used_at=None, used_cycle=current)
     db.add(cat)
     try:
         db.commit()
@@ -304,4 +852,4 @@ def create_daily_category(payload: DailyCategoryCreate, db: Session = Depends(ge
         db.rollback()
         raise HTTPException(status_code=409, detail="Daily category already exists")
     db.refresh(cat)
-    return cat
\ No newline at end of file
+    return cat
@@ -1,20 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Response
+from fastapi import FastAPI, Depends, HTTPException, status, Response, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import select, or_
 from sqlalchemy.exc import IntegrityError
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, Literal
 from pathlib import Path
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+import asyncio
+import io
+import tempfile
 import time
-from .DailyMode import router as daily_router
+from .DailyMode import router as daily_router, recovery_loop, ensure_categories_seeded
+from .GameSessions import router as sessions_router
+from .Retention import router as retention_router
 
 ENV_PATH = Path(__file__).resolve().parents[1] / ".env"   # Game_Service/.env
 load_dotenv(ENV_PATH)
 
 from .GameDatabase import engine, SessionLocal
-from .GameModels import Base, QuestionDB, GameRunDB
+from .GameModels import QuestionDB, GameSessionDB
+from .GameRuns import record_run, record_runs, user_stats, iso_week
+from .RunBuffer import RunBuffer, write_behind_enabled
+from .Leaderboard import leaderboard_snapshot, rank_index, leaderboard_version, leaderboard_max_age, read_rollup_board, LEADERBOARD_MAX_LIMIT
+from .GameMigrations import run_migrations
+from .RandomSampler import pick_random
+from .QuestionBulk import BulkFormat, import_questions, export_questions, export_stmt
 from .GameSchemas import (
     QuestionCreate, 
     QuestionRead,
@@ -24,19 +38,43 @@ from .GameSchemas import (
     UserStatsRead,
     GameRunCreate,
     GameRunRead,
+    GameRunBatchRequest,
+    GameRunBatchResponse,
+    GameRunQueued,
+    RunBufferStats,
     LeaderboardEntry,
+    UserRankRead,
     ValidatePlacementRequest,
     ValidatePlacementResponse,
+    ValidateTimelineRequest,
+    ValidateTimelineResponse,
+    QuestionPoolStats,
+    GenerationStats,
+    AnswerCacheStats,
+    QuestionImportReport,
 )
 
 import uuid #generates univerally unique identifiers 
-from .QuestionGenerator import generate_questions
+from .QuestionGenerator import generate_questions_async, close_clients
 from .GameSchemas import GameStartRequest, GameStartResponse
+from .QuestionPool import take_pool_set, refill_pool, pool_stats, POOL_SET_SIZE
+from .QuestionSelector import answer_indexes
+from .QuestionBank import question_key, upsert_bank_questions, map_session_questions, session_question_ids, sample_bank_set, session_answers
+from .SingleFlight import SingleFlight
+from .Placement import placement_is_correct, check_timeline
+from .AnswerCache import answer_cache, session_key, AnswerSet
+from .PlacementTokens import issue_token, read_token, InvalidToken, TokenNotConfigured
+
+#concurrent starts for the same (category, difficulty) share one generation instead of each calling the model
+generation_flight = SingleFlight()
+
+#runs waiting to be written when RUN_WRITE_BEHIND is on (looks SessionLocal up at flush time)
+run_buffer = RunBuffer(lambda: SessionLocal())
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    #wait for Postgres to be ready (important in Docker), then create tables
+    #wait for Postgres to be ready (important in Docker), then bring the schema up to date
     max_tries = 15
     delay_seconds = 1
 
@@ -44,20 +82,49 @@ async def lifespan(app: FastAPI):
         try:
             with engine.connect() as _conn:
                 pass
-            #looks at all tables made from Base and rceates them
-            Base.metadata.create_all(bind=engine)
+            #creates missing tables and applies any schema migrations not run yet (see GameMigrations)
+            run_migrations(engine)
             break
         except Exception:
             if attempt == max_tries:
                 raise
             time.sleep(delay_seconds)
 
+    #build the rank index up front so the first /rank request doesn't pay for it
+    db = SessionLocal()
+    try:
+        rank_index.refresh(db, leaderboard_version(db))
+        #default daily categories, once here instead of a check on every pick
+        ensure_categories_seeded(db)
+    finally:
+        db.close()
+
+    run_buffer.start()
+    #retries failed/stale daily challenges in the background (leased, so workers don't double up)
+    recovery = asyncio.create_task(recovery_loop())
+
     yield
 
+    recovery.cancel()
+    try:
+        #write out any runs still buffered before the worker exits
+        await run_buffer.stop()
+    finally:
+        #close the shared OpenAI HTTP connection pools
+        await close_clients()
+
 
 #creates a fastapi object called app - what we you for endpoints. @app.get/post/put/patch/delete. Also used for running the server - uvicorn main:app
 app = FastAPI(lifespan=lifespan)
 app.include_router(daily_router)
+app.include_router(sessions_router)
+app.include_router(retention_router)
+
+
+#token issuing/reading needs PLACEMENT_TOKEN_SECRET, without it every token route is a server error
+@app.exception_handler(TokenNotConfigured)
+async def token_not_configured_handler(request: Request, exc: TokenNotConfigured):
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
 
 origins = ["*"]
 
@@ -67,6 +134,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  #lets the browser read the /api/questions page cursor and leaderboard ETag
 )
 
 #function for reusability - opens request, waits until the route is finished, finally closes  the session (whether it finshed successfully or raised error)
@@ -91,10 +159,84 @@ def health():
     return {"status": "ok"}
 
 #----------- Questions -----------------
-@app.get("/api/questions", response_model=list[QuestionRead]) #gets all questions, limits can be added later on and we can have multiple endpoints, so we could list x amount of qestions at a time
-def list_questions(db: Session = Depends(get_db)):
-    stmt = select(QuestionDB).order_by(QuestionDB.id)
-    return db.execute(stmt).scalars().all()
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024  #uploads bigger than this spill to a temp file instead of sitting in memory
+
+
+def _question_list_stmt(category: Optional[str], difficulty: Optional[str], game_session_id: Optional[str] = None, after_id: Optional[int] = None):
+    #plain columns rather than ORM objects, so nothing piles up in the session's identity map
+    stmt = export_stmt()
+    if category:
+        stmt = stmt.where(QuestionDB.category == category)
+    if difficulty:
+        stmt = stmt.where(QuestionDB.difficulty == difficulty)
+    if game_session_id:
+        stmt = stmt.where(or_(QuestionDB.game_session_id == game_session_id, QuestionDB.id.in_(session_question_ids(game_session_id))))
+    if after_id is not None:
+        stmt = stmt.where(QuestionDB.id > after_id)  #keyset: seek past the cursor on the primary key instead of OFFSET
+    return stmt
+
+
+@app.get("/api/questions", response_model=list[QuestionRead])
+def list_questions(
+    response: Response,
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    game_session_id: Optional[str] = None,
+    after_id: Optional[int] = Query(default=None, ge=0, description="cursor: return questions with id > after_id"),
+    limit: Optional[int] = Query(default=None, ge=1, le=LIST_MAX_LIMIT),
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    Pages through the question bank in id order. Pass the X-Next-Cursor header back
+    as after_id to get the next page (no header means this was the last page).
+    format=ndjson streams every matching row (or `limit` rows) one JSON object per
+    line from a server-side cursor, so memory stays flat however big the table is.
+    """
+    stmt = _question_list_stmt(category, difficulty, game_session_id, after_id)
+
+    if format == "ndjson":
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return StreamingResponse(export_questions(SessionLocal, stmt, "ndjson"), media_type="application/x-ndjson")
+
+    page_size = limit or LIST_DEFAULT_LIMIT
+    rows = db.execute(stmt.limit(page_size + 1)).mappings().all()  #one extra row tells us if there's another page
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        response.headers["X-Next-Cursor"] = str(rows[-1]["id"])
+    return rows
+
+@app.post("/api/questions/import", response_model=QuestionImportReport)
+async def import_question_file(request: Request, format: BulkFormat = "ndjson", db: Session = Depends(get_db)):
+    """
+    Bulk load: the request body is an NDJSON or CSV file (see QuestionBulk).
+    Rows are validated and inserted in chunks; bad or duplicate rows are counted
+    and reported by line without stopping the rest of the file.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8-sig", errors="replace", newline="")
+        return await run_in_threadpool(import_questions, db, text, format)
+    finally:
+        spool.close()
+
+
+@app.get("/api/questions/export")
+def export_question_file(category: Optional[str] = None, difficulty: Optional[str] = None, format: BulkFormat = "ndjson"):
+    #streams the bank back out in the same format /import accepts
+    stmt = _question_list_stmt(category, difficulty)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_questions(SessionLocal, stmt, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="questions.{format}"'},
+    )
 
 @app.get("/api/questions/random", response_model=QuestionReadPublic)
 def get_random_question(category: Optional[str] = None,difficulty: Optional[str] = None,game_session_id: Optional[str] = None,db: Session = Depends(get_db),):
@@ -106,10 +248,11 @@ def get_random_question(category: Optional[str] = None,difficulty: Optional[str]
     if difficulty:
         stmt = stmt.where(QuestionDB.difficulty == difficulty)
     if game_session_id:
-        stmt = stmt.where(QuestionDB.game_session_id == game_session_id)
+        #older sessions own their rows directly, newer ones are mapped onto bank questions
+        stmt = stmt.where(or_(QuestionDB.game_session_id == game_session_id, QuestionDB.id.in_(session_question_ids(game_session_id))))
 
-    stmt = stmt.order_by(func.random()).limit(1)
-    db_random_question = db.execute(stmt).scalars().first()
+    #index seek on random_key instead of sorting every matching row by random()
+    db_random_question = pick_random(db, stmt, QuestionDB.random_key)
     if not db_random_question:
         raise HTTPException(status_code=404, detail="No questions available")
     return QuestionReadPublic.model_validate(db_random_question)
@@ -125,9 +268,11 @@ def get_question(question_id: int, db: Session = Depends(get_db)):
 @app.post("/api/questions", response_model=QuestionRead, status_code=status.HTTP_201_CREATED)
 def create_question(payload: QuestionCreate, db: Session=Depends(get_db)):
     db_question = QuestionDB(**payload.model_dump()) #'**payload' creates the body sent by the user filling the field sexactly by the payload, .model_dump - turns object into reualr python dictionary
+    db_question.question_key = question_key(db_question.question, db_question.answer) #same question + answer already in the bank -> 409
     db.add(db_question)
     commit_or_rollback(db, "Question creation failed")
     db.refresh(db_question)
+    answer_indexes.add([db_question])
     return db_question
 
 @app.put("/api/questions/{question_id}", response_model=QuestionRead)
@@ -137,7 +282,10 @@ def update_question(question_id: int, payload: QuestionUpdate, db: Session = Dep
         raise HTTPException(status_code=404, detail="Question not found")
     for field_name, field_value in payload.model_dump().items():
         setattr(question, field_name, field_value)
+    question.question_key = question_key(question.question, question.answer)
     commit_or_rollback(db, "Question update failed")
+    answer_indexes.invalidate()
+    answer_cache.invalidate()
     db.refresh(question)
     return question
  
@@ -151,8 +299,11 @@ def patch_question(question_id: int, payload: QuestionPatch, db_session: Session
 
     for field_name, field_value in partial_data.items():
         setattr(question, field_name, field_value)
+    question.question_key = question_key(question.question, question.answer)
 
     commit_or_rollback(db_session, "Question update failed")
+    answer_indexes.invalidate()
+    answer_cache.invalidate()
     db_session.refresh(question)
     return question
 
@@ -163,89 +314,152 @@ def delete_question(question_id: int, db: Session=Depends(get_db)):
         raise HTTPException(status_code=404, detail="Question not found")
     db.delete(question)
     db.commit()
+    answer_indexes.invalidate()
+    answer_cache.invalidate()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-#creates new sesion ID, generates 20 questions using OpenAI, saves them to the database under the sessions ID, returns teh sesionID and the saved questions to the frontend 
-@app.post("/api/game/start", response_model=GameStartResponse)
-def start_game(payload: GameStartRequest, db: Session = Depends(get_db)):
-    #generates a unique identifier for this game session 
-    session_id = str(uuid.uuid4())
-
-    #calls the openAI function and passes the needed parameters 
+#adds the questions to the deduplicated bank, links them to the session and creates the server-side session state, committing together with the pool take (if there was one) - runs in the threadpool
+def _save_session_questions(db: Session, session_id: str, payload: GameStartRequest, questions, from_bank: bool = False) -> list[QuestionDB]:
     try:
-        generated = generate_questions(
-            category=payload.category,
-            difficulty=payload.difficulty,
-            count=8,
-        )
-    except Exception as e:
-        # log full error server-side
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=502, detail=f"Failed to generate questions: {str(e)}")
-
-    #convert the generated questions into teh DB rows and stage them for inserting 
-    db_rows: list[QuestionDB] = []
-    for q in generated:
-        row = QuestionDB(
-            question=q.question,
-            answer=q.answer,
-            category=q.category,
-            difficulty=q.difficulty,
-            game_session_id=session_id,
+        db_rows = questions if from_bank else upsert_bank_questions(db, questions)
+        map_session_questions(db, session_id, db_rows)
+        db.add(
+            GameSessionDB(
+                session_id=session_id,
+                user_id=payload.user_id,
+                category=payload.category,
+                difficulty=payload.difficulty,
+                total_questions=len(db_rows),
+                timeline=[],
+                missed=[],
+                lives_remaining=payload.lives,
+            )
         )
-        db.add(row)
-        db_rows.append(row)
-
-    try:
         db.commit()
     except Exception:
         db.rollback()
         raise
+    return db_rows
 
-    for row in db_rows:
-        db.refresh(row)
+#deals a set straight from the bank when it is big enough, otherwise tries the pool. On a miss the read transaction is closed so no connection is held while the model works
+def _take_existing_set(db: Session, category: str, difficulty: str):
+    bank_rows = sample_bank_set(db, category, difficulty, POOL_SET_SIZE)
+    if bank_rows is not None:
+        return bank_rows, True
+
+    questions = take_pool_set(db, category, difficulty)
+    if questions is None:
+        db.rollback()
+    return questions, False
+
+#creates new sesion ID, deals a set from the question bank (or takes one from the pool, or generates one with OpenAI), links the questions to the sessions ID, returns teh sesionID and the questions to the frontend 
+#async so waiting on the model doesn't tie up a threadpool slot, the (short) DB work is pushed onto the threadpool instead
+@app.post("/api/game/start", response_model=GameStartResponse)
+async def start_game(payload: GameStartRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    #generates a unique identifier for this game session 
+    session_id = str(uuid.uuid4())
+
+    #bank or pool hit: a pool set is removed from the pool and the session mapping is inserted in the same commit below
+    questions, from_bank = await run_in_threadpool(_take_existing_set, db, payload.category, payload.difficulty)
+
+    if questions is None:
+        #pool miss - fall back to calling the openAI function, joining an identical generation if one is already running
+        try:
+            questions = await generation_flight.do(
+                (payload.category, payload.difficulty, POOL_SET_SIZE),
+                lambda: generate_questions_async(
+                    category=payload.category,
+                    difficulty=payload.difficulty,
+                    count=POOL_SET_SIZE,
+                ),
+            )
+        except Exception as e:
+            # log full error server-side
+            import traceback
+            traceback.print_exc()
+            raise HTTPException(status_code=502, detail=f"Failed to generate questions: {str(e)}")
+
+    #add new questions to the bank and link the set to this session 
+    db_rows = await run_in_threadpool(_save_session_questions, db, session_id, payload, questions, from_bank)
+
+    #top the pool back up after the response has been sent - not needed while the bank can deal this key on its own
+    if not from_bank:
+        background_tasks.add_task(refill_pool, payload.category, payload.difficulty, generate_questions_async)
+
+    #fill the answer cache on write so validating this session's drops doesn't touch the DB
+    pairs = [(r.id, r.answer) for r in db_rows]
+    answer_cache.put(session_key(session_id), pairs)
+
+    #optional stateless mode: the answers travel with the client, encrypted and signed
+    validation_token = issue_token(session_id, pairs) if payload.include_validation_token else None
 
     #includes only what the player should see (no answer)
     public_questions = [QuestionReadPublic.model_validate(r) for r in db_rows]
-    return GameStartResponse(session_id=session_id, questions=public_questions)
+    return GameStartResponse(
+        session_id=session_id,
+        questions=public_questions,
+        validation_token=validation_token,
+        lives_remaining=payload.lives,
+    )
+
+#depth of the pre-generated pool per (category, difficulty) plus hit/miss counters
+@app.get("/api/game/pool/stats", response_model=QuestionPoolStats)
+def get_pool_stats(db: Session = Depends(get_db)):
+    return pool_stats(db)
+
+#hit rate and size of the in-process id -> answer cache used by validation
+@app.get("/api/game/answer-cache/stats", response_model=AnswerCacheStats)
+def get_answer_cache_stats():
+    return answer_cache.stats()
+
+#how many generation calls were coalesced by the single-flight layer
+@app.get("/api/game/generation/stats", response_model=GenerationStats)
+def get_generation_stats():
+    return generation_flight.stats()
 
 #----------- Gameplay Validation -----------
+#answers carried in a signed token - no DB or cache needed, so any worker (or an edge proxy) can validate
+def _token_answers(token: str, session_id: Optional[str]) -> AnswerSet:
+    try:
+        token_session, answers = read_token(token)
+    except InvalidToken:
+        raise HTTPException(status_code=401, detail="Invalid validation token")
+    if session_id is not None and session_id != token_session:
+        raise HTTPException(status_code=401, detail="Validation token does not match session")
+    return answers
+
+def _answer_from_db(db: Session, question_id: int) -> Optional[int]:
+    question = db.get(QuestionDB, question_id)
+    return question.answer if question else None
+
 @app.post("/api/game/validate-placement", response_model=ValidatePlacementResponse)
 def validate_placement(payload: ValidatePlacementRequest, db: Session=Depends(get_db)):
-    placed = db.get(QuestionDB, payload.placed_question_id)
-    if not placed:
+    #a signed token carries the answers itself, with a session id the answers come from the per-session cache, otherwise each card is looked up on its own
+    if payload.validation_token is not None:
+        lookup = _token_answers(payload.validation_token, payload.session_id).get
+    elif payload.session_id is not None:
+        lookup = session_answers(db, payload.session_id).get
+    else:
+        lookup = lambda question_id: _answer_from_db(db, question_id)
+
+    placed_answer = lookup(payload.placed_question_id)
+    if placed_answer is None:
         raise HTTPException(status_code=404, detail="Placed question not found")
-    left=None
-    right=None
+    left_answer=None
+    right_answer=None
     #if there is a crad on the left
     if payload.left_neighbor_id is not None:
-        #get the id from db
-        left=db.get(QuestionDB, payload.left_neighbor_id)
-        if not left:
+        left_answer = lookup(payload.left_neighbor_id)
+        if left_answer is None:
             raise HTTPException(status_code=404, detail="Left neighbor question not found")
 
     if payload.right_neighbor_id is not None:
-        right = db.get(QuestionDB, payload.right_neighbor_id)
-        if not right:
+        right_answer = lookup(payload.right_neighbor_id)
+        if right_answer is None:
             raise HTTPException(status_code=404, detail="Right neighbor question not found")
 
-    placed_answer = placed.answer
-    left_answer = left.answer if left else None
-    right_answer = right.answer if right else None
-
-    #Allows ansers to be equal
-    if left is None and right is None:
-        correct = True
-    elif left is None:
-        #error handling for if on right card exists
-        correct = placed_answer <= right_answer  # right_answer is not None here
-    elif right is None:
-        #"" for if only left card exsts 
-        correct = left_answer <= placed_answer   # left_answer is not None here
-    else:
-        #card on both keft and right
-        correct = left_answer <= placed_answer <= right_answer
+    #Allows ansers to be equal, no card on a side means that side is open
+    correct = placement_is_correct(left_answer, placed_answer, right_answer)
 
     return ValidatePlacementResponse(
         correct=correct,
@@ -254,45 +468,121 @@ def validate_placement(payload: ValidatePlacementRequest, db: Session=Depends(ge
         right_answer=right_answer,
     )
 
+#checks the whole number line at once: answers come from the session cache (or one query), one pass over the order
+@app.post("/api/game/validate-timeline", response_model=ValidateTimelineResponse)
+def validate_timeline(payload: ValidateTimelineRequest, db: Session = Depends(get_db)):
+    if len(set(payload.question_ids)) != len(payload.question_ids):
+        raise HTTPException(status_code=422, detail="Timeline contains duplicate question ids")
+
+    if payload.validation_token is not None:
+        answer_set = _token_answers(payload.validation_token, payload.session_id)
+    else:
+        answer_set = session_answers(db, payload.session_id)
+    answer_by_id = {qid: answer_set.get(qid) for qid in payload.question_ids}
+
+    missing = [qid for qid, answer in answer_by_id.items() if answer is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Question {missing[0]} not found in this session")
+
+    answers = [answer_by_id[qid] for qid in payload.question_ids]
+    results, first_wrong = check_timeline(answers)
+    return ValidateTimelineResponse(
+        correct=first_wrong is None,
+        first_wrong_index=first_wrong,
+        slots=[
+            {"question_id": qid, "answer": answer, "correct": ok}
+            for qid, answer, ok in zip(payload.question_ids, answers, results)
+        ],
+    )
+
 #----------- Game Runs -----------------
 @app.get("/api/users/{user_id}/stats", response_model=UserStatsRead)
 def get_user_stats(user_id: int, db: Session = Depends(get_db)):
-    count_stmt = select(func.count()).select_from(GameRunDB).where(GameRunDB.user_id == user_id)
-    games_played = db.execute(count_stmt).scalar_one()
-
-    if games_played == 0:
-        return UserStatsRead(high_score=0, longest_streak=0, average_score=0.0, games_played=0)
-
-    #functions to retrieve the user high scores, later we will link these to the actual users in the other microservice
-    max_score = db.execute(select(func.max(GameRunDB.score)).where(GameRunDB.user_id == user_id)).scalar_one() #.scalar_obne() just pulls a single number result 
-    max_streak = db.execute(select(func.max(GameRunDB.streak)).where(GameRunDB.user_id == user_id)).scalar_one()
-    avg_score = db.execute(select(func.avg(GameRunDB.score)).where(GameRunDB.user_id == user_id)).scalar_one()
-    return UserStatsRead(high_score=max_score, longest_streak=max_streak, average_score=round(float(avg_score or 0.0), 2), games_played=games_played)
+    #one primary-key read of the running totals record_run keeps, however many runs the user has
+    return user_stats(db, user_id)
 
 #Post user run once game is ended.
-@app.post("/api/users/{user_id}/runs", response_model=GameRunRead, status_code=status.HTTP_201_CREATED)
+@app.post(
+    "/api/users/{user_id}/runs",
+    response_model=GameRunRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": GameRunQueued, "description": "Buffered for a later batch write (RUN_WRITE_BEHIND)"}},
+)
 def add_user_run(user_id: int, payload: GameRunCreate, db: Session = Depends(get_db)):
-    run = GameRunDB(user_id=user_id, **payload.model_dump())
-    db.add(run)
+    if write_behind_enabled() and run_buffer.add({"user_id": user_id, **payload.model_dump()}):
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=GameRunQueued(user_id=user_id).model_dump())
+    run = record_run(db, user_id, **payload.model_dump())
     commit_or_rollback(db, "Run creation failed")
     db.refresh(run)
     return run
 
+@app.post("/api/runs:batch", response_model=GameRunBatchResponse, status_code=status.HTTP_201_CREATED)
+def add_runs_batch(payload: GameRunBatchRequest, db: Session = Depends(get_db)):
+    #many finished runs (any users) in one transaction: one multi-row insert, one upsert per aggregate, one commit
+    runs = record_runs(db, [item.model_dump() for item in payload.runs])
+    commit_or_rollback(db, "Run creation failed")
+    return {"accepted": len(runs), "run_ids": [run.id for run in runs]}
+
+@app.get("/api/runs/buffer/stats", response_model=RunBufferStats)
+def get_run_buffer_stats():
+    return run_buffer.stats()
+
 # Leaderboard
-#we are using a list because the users best scores are not stored in a db in this microservice 
 @app.get("/api/leaderboard", response_model=list[LeaderboardEntry])
-def get_leaderboard(db: Session = Depends(get_db)):
-    stmt = (
-        select(
-            GameRunDB.user_id,
-            func.max(GameRunDB.score).label("best_score"),
-            func.max(GameRunDB.streak).label("best_streak"),
-        )
-        .group_by(GameRunDB.user_id)
-        .order_by(func.max(GameRunDB.score).desc(), func.max(GameRunDB.streak).desc())
-    )
-    rows = db.execute(stmt).all() #sends the above statement to the db 
-    return [
-        {"user_id": r.user_id, "best_score": r.best_score, "best_streak": r.best_streak}
-        for r in rows #returns multiple users with thei rallocated stats
-    ]
\ No newline at end of file
+def get_leaderboard(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    One page of the all-time leaderboard (best score, then best streak), served from
+    the in-memory top-N snapshot. The ETag is the leaderboard version, which only
+    moves when someone beats their best, so If-None-Match gets a 304 after a single
+    primary-key read.
+    """
+    version = leaderboard_version(db)
+    etag = f'W/"lb-{version}-{offset}-{limit}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={leaderboard_max_age()}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return leaderboard_snapshot.page(db, version, offset, limit)
+
+@app.get("/api/leaderboard/daily", response_model=list[LeaderboardEntry])
+def get_daily_leaderboard(
+    day: Optional[date] = Query(default=None, description="UTC date, defaults to today"),
+    limit: int = Query(default=50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    day = day or datetime.now(timezone.utc).date()
+    return read_rollup_board(db, "day", day.isoformat(), offset, limit)
+
+@app.get("/api/leaderboard/weekly", response_model=list[LeaderboardEntry])
+def get_weekly_leaderboard(
+    week: Optional[str] = Query(default=None, pattern=r"^\d{4}-W\d{2}$", description="ISO week like 2026-W42, defaults to this week"),
+    limit: int = Query(default=50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    week = week or iso_week(datetime.now(timezone.utc).date())
+    return read_rollup_board(db, "week", week, offset, limit)
+
+@app.get("/api/leaderboard/category/{category}", response_model=list[LeaderboardEntry])
+def get_category_leaderboard(
+    category: str,
+    limit: int = Query(default=50, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
+    return read_rollup_board(db, "category", category, offset, limit)
+
+@app.get("/api/users/{user_id}/rank", response_model=UserRankRead)
+def get_user_rank(user_id: int, neighbors: int = Query(default=2, ge=0, le=10), db: Session = Depends(get_db)):
+    #bisect into the in-memory rank index (kept in step via the leaderboard version), no scan of game_runs
+    rank = rank_index.rank(db, leaderboard_version(db), user_id, neighbors)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="User has no runs yet")
+    return rank
\ No newline at end of file
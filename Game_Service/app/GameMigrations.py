@@ -0,0 +1,170 @@
+# Game_Service/app/GameMigrations.py
+"""
+Versioned schema migrations for the game database, run from the lifespan instead
+of a bare Base.metadata.create_all (which never changes a table that already exists).
+
+Each migration is (version, name, fn(connection)) and is applied once, in order,
+then recorded in schema_migrations. Version 1 creates any missing tables from the
+current models, so a brand new database already has the latest shape and every
+later migration has to be idempotent (check before ALTER, IF [NOT] EXISTS on
+indexes). To change the schema: update the model, then append a migration that
+brings an existing database to the same place.
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from typing import Callable
+
+from .GameModels import Base
+from .GameRuns import backfill_user_stats, bump_leaderboard_version, rebuild_rollups
+
+LOCK_ID = 7_310_001  #pg_advisory_xact_lock key, so two gunicorn workers starting together don't migrate at once
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _random_fill(conn: Connection) -> str:
+    #uniform [0, 1) straight from the database, so existing rows don't need a round trip each
+    if conn.dialect.name == "sqlite":
+        return "(abs(random()) % 1000000000) / 1000000000.0"
+    return "random()"
+
+
+def _create_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn)  #checkfirst: existing tables are left as they are
+
+
+def _add_bank_columns(conn: Connection):
+    #columns added to pre-existing tables by the question bank and the random_key sampler
+    fill = _random_fill(conn)
+    for table in ("questions", "daily_categories"):
+        if "random_key" not in _columns(conn, table):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN random_key FLOAT"))
+            conn.execute(text(f"UPDATE {table} SET random_key = {fill}"))
+            if conn.dialect.name == "postgresql":
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN random_key SET NOT NULL"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_random_key ON {table} (random_key)"))
+
+    if "question_key" not in _columns(conn, "questions"):
+        #left NULL on old rows: legacy per-session copies repeat the same question, so they can't all share a key
+        conn.execute(text("ALTER TABLE questions ADD COLUMN question_key VARCHAR"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_questions_question_key ON questions (question_key)"))
+
+
+def _composite_indexes(conn: Connection):
+    #indexes shaped like the hot queries: random selection, user stats/leaderboard, daily question lists
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_questions_category_difficulty_random_key ON questions (category, difficulty, random_key)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_questions_category_random_key ON questions (category, random_key)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_game_runs_user_id_score ON game_runs (user_id, score)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_daily_questions_challenge_id_id ON daily_questions (daily_challenge_id, id)"
+    ))
+    #now prefixes of the composites above, only cost writes
+    conn.execute(text("DROP INDEX IF EXISTS ix_game_runs_user_id"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_daily_questions_daily_challenge_id"))
+
+
+def _retention_indexes(conn: Connection):
+    #lets the retention job find old sessions/links by age without scanning the tables
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_game_session_questions_created_at ON game_session_questions (created_at)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_game_sessions_updated_at ON game_sessions (updated_at)"))
+
+
+def _user_stats(conn: Connection):
+    #new aggregate table, filled from the runs already recorded
+    _create_tables(conn)
+    backfill_user_stats(conn)
+
+
+def _leaderboard(conn: Connection):
+    #leaderboard version row, per-user best_version for snapshot deltas and the leaderboard-order index
+    _create_tables(conn)
+    if "best_version" not in _columns(conn, "user_stats"):
+        conn.execute(text("ALTER TABLE user_stats ADD COLUMN best_version INTEGER NOT NULL DEFAULT 0"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_user_stats_best_version ON user_stats (best_version)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_stats_leaderboard ON user_stats (high_score DESC, longest_streak DESC, user_id)"
+    ))
+    version = bump_leaderboard_version(conn)
+    conn.execute(text("UPDATE user_stats SET best_version = :version"), {"version": version})
+
+
+def _run_rollups(conn: Connection):
+    #daily/weekly/category leaderboards, filled from the runs already recorded
+    _create_tables(conn)
+    rebuild_rollups(conn)
+
+
+def _daily_generation_columns(conn: Connection):
+    #attempt count, lease, backoff and latency on daily_challenges for generation recovery
+    timestamp = DateTime(timezone=True).compile(dialect=conn.dialect)
+    columns = _columns(conn, "daily_challenges")
+    for name, ddl in (
+        ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+        ("lease_until", timestamp),
+        ("next_attempt_at", timestamp),
+        ("last_latency_ms", "INTEGER"),
+    ):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE daily_challenges ADD COLUMN {name} {ddl}"))
+
+
+def _category_rotation(conn: Connection):
+    #rotation counter for daily categories, the ones already used this round start one cycle ahead
+    if "used_cycle" not in _columns(conn, "daily_categories"):
+        conn.execute(text("ALTER TABLE daily_categories ADD COLUMN used_cycle INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("UPDATE daily_categories SET used_cycle = 1 WHERE is_used"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_daily_categories_rotation ON daily_categories (used_cycle, random_key)"
+    ))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create_tables", _create_tables),
+    (2, "add_bank_columns", _add_bank_columns),
+    (3, "composite_indexes", _composite_indexes),
+    (4, "retention_indexes", _retention_indexes),
+    (5, "user_stats", _user_stats),
+    (6, "leaderboard", _leaderboard),
+    (7, "run_rollups", _run_rollups),
+    (8, "daily_generation_columns", _daily_generation_columns),
+    (9, "category_rotation", _category_rotation),
+]
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """
+    Applies every migration not yet recorded, all in one transaction, and returns
+    the versions it applied (empty when the schema is already current).
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": LOCK_ID})
+        _meta.create_all(bind=conn)
+        done = applied_versions(conn)
+        applied = []
+        for version, name, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name))
+            applied.append(version)
+        return applied
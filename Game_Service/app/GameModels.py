@@ -1,6 +1,7 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, DateTime, func, Date, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import String, Integer, BigInteger, Float, DateTime, func, Date, Boolean, ForeignKey, UniqueConstraint, JSON, Index
 from datetime import date
+import random
 
 #SQLAlchemy - parent class that all db models inherit from, knows to add tables to db. pass just defines the class (no code needed)
 class Base(DeclarativeBase):
@@ -8,21 +9,42 @@ class Base(DeclarativeBase):
 
 class QuestionDB(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        #random sampling seeks into these instead of sorting every matching row by random()
+        Index("ix_questions_category_difficulty_random_key", "category", "difficulty", "random_key"),
+        Index("ix_questions_category_random_key", "category", "random_key"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     question: Mapped[str] = mapped_column(String, nullable=False)
     answer: Mapped[int] = mapped_column(Integer, nullable=False)  # integer >= 0
     category: Mapped[str] = mapped_column(String, nullable=False, index=True)
     difficulty: Mapped[str] = mapped_column(String, nullable=False)  #easy, medium, hard 
-    game_session_id: Mapped[str | None] = mapped_column(String, nullable=True, index=True) #used to track the game session 
+    game_session_id: Mapped[str | None] = mapped_column(String, nullable=True, index=True) #legacy per-session rows, new sessions are linked through game_session_questions
+    question_key: Mapped[str | None] = mapped_column(String, nullable=True, unique=True, index=True) #hash of normalised question text + answer, dedupes the question bank
+    random_key: Mapped[float] = mapped_column(Float, nullable=False, default=random.random, index=True) #uniform [0, 1) value used by RandomSampler
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+#links a game session to the bank questions it was dealt, so questions are reused instead of copied per session
+class GameSessionQuestionDB(Base):
+    __tablename__ = "game_session_questions"
+    __table_args__ = (UniqueConstraint("game_session_id", "question_id", name="uq_game_session_question"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    game_session_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True) #retention finds old links by age
+
 class GameRunDB(Base):
     __tablename__ = "game_runs"
+    __table_args__ = (
+        #user stats and the leaderboard read max(score) per user straight off this index (replaces the single-column user_id one)
+        Index("ix_game_runs_user_id_score", "user_id", "score"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False) #later tokens will be implemented o connect a game run to the suer that is logged in 
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False) #later tokens will be implemented o connect a game run to the suer that is logged in 
     score: Mapped[int] = mapped_column(Integer, nullable=False)
     streak: Mapped[int] = mapped_column(Integer, nullable=False)
     total_questions: Mapped[int] = mapped_column(Integer, nullable=True)
@@ -30,12 +52,71 @@ class GameRunDB(Base):
     started_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     ended_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+#running per-user totals kept in step with game_runs by record_run, so stats are one primary-key read
+class UserStatsDB(Base):
+    __tablename__ = "user_stats"
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    games_played: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    score_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")  #average = score_sum / games_played
+    high_score: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    longest_streak: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    best_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0", index=True) #leaderboard version when this user's best last went up
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+#leaderboard order, read top-down by the leaderboard snapshot
+Index("ix_user_stats_leaderboard", UserStatsDB.high_score.desc(), UserStatsDB.longest_streak.desc(), UserStatsDB.user_id)
+
+#per-user totals for one leaderboard bucket: a UTC day, an ISO week or a category. Kept in step by record_run
+class RunRollupDB(Base):
+    __tablename__ = "run_rollups"
+    scope: Mapped[str] = mapped_column(String, primary_key=True)  # day/week/category
+    bucket: Mapped[str] = mapped_column(String, primary_key=True)  # 2026-10-18 / 2026-W42 / History
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    games_played: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    score_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    best_score: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    best_streak: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+#each board is one range of this index, already in leaderboard order
+Index("ix_run_rollups_board", RunRollupDB.scope, RunRollupDB.bucket, RunRollupDB.best_score.desc(), RunRollupDB.best_streak.desc(), RunRollupDB.user_id)
+
+#single row (id=1) bumped whenever someone's best improves, used as the leaderboard's ETag
+class LeaderboardStateDB(Base):
+    __tablename__ = "leaderboard_state"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+#server-side state for one game, so the score/streak that end up in game_runs are computed by us, not reported by the client
+class GameSessionDB(Base):
+    __tablename__ = "game_sessions"
+    session_id: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    category: Mapped[str] = mapped_column(String, nullable=False)
+    difficulty: Mapped[str] = mapped_column(String, nullable=False)
+    total_questions: Mapped[int] = mapped_column(Integer, nullable=False)
+    timeline: Mapped[list[int]] = mapped_column(JSON, nullable=False, default=list) #question ids on the number line, left to right
+    missed: Mapped[list[int]] = mapped_column(JSON, nullable=False, default=list) #question ids placed wrongly (discarded)
+    lives_remaining: Mapped[int] = mapped_column(Integer, nullable=False)
+    score: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    streak: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    best_streak: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    status: Mapped[str] = mapped_column(String, nullable=False, server_default="active")  # active/ended
+    run_id: Mapped[int | None] = mapped_column(ForeignKey("game_runs.id"), nullable=True)
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True) #retention finds idle sessions by this
+
 class DailyCategoryDB(Base):
     __tablename__ = "daily_categories"
+    __table_args__ = (
+        #the rotation's next pick is the first row of this index
+        Index("ix_daily_categories_rotation", "used_cycle", "random_key"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
-    is_used: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="0")
+    is_used: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="0")  # superseded by used_cycle, /categories derives it
     used_at: Mapped["date | None"] = mapped_column(Date, nullable=True)
+    random_key: Mapped[float] = mapped_column(Float, nullable=False, default=random.random, index=True)  # also the shuffled order within a cycle
+    used_cycle: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")  # times handed out by the rotation
 
 class DailyChallengeDB(Base):
     __tablename__ = "daily_challenges"
@@ -44,18 +125,44 @@ class DailyChallengeDB(Base):
     challenge_date: Mapped["date"] = mapped_column(Date, nullable=False, index=True)
     category: Mapped[str] = mapped_column(String, nullable=False)
     difficulty: Mapped[str] = mapped_column(String, nullable=False)  # "easy" | "medium" | "hard"
-    status: Mapped[str] = mapped_column(String, nullable=False, server_default="pending")  # pending/success/failed
+    status: Mapped[str] = mapped_column(String, nullable=False, server_default="pending")  # pending/ready/success/failed, ready = generated ahead, not live yet
     error_message: Mapped[str | None] = mapped_column(String, nullable=True)
     generated_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    questions: Mapped[list["DailyQuestionDB"]] = relationship(back_populates="challenge",cascade="all, delete-orphan",)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")  # generation attempts so far
+    lease_until: Mapped[str | None] = mapped_column(DateTime(timezone=True), nullable=True)  # while pending, the generator owns the row until then
+    next_attempt_at: Mapped[str | None] = mapped_column(DateTime(timezone=True), nullable=True)  # when failed, earliest retry (backoff)
+    last_latency_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)  # duration of the last model call
+    questions: Mapped[list["DailyQuestionDB"]] = relationship(back_populates="challenge",cascade="all, delete-orphan",order_by="DailyQuestionDB.id",)
 
 class DailyQuestionDB(Base):
     __tablename__ = "daily_questions"
+    __table_args__ = (
+        #a challenge's questions come back already in id order, no sort step
+        Index("ix_daily_questions_challenge_id_id", "daily_challenge_id", "id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
-    daily_challenge_id: Mapped[int] = mapped_column(ForeignKey("daily_challenges.id"), nullable=False, index=True)
+    daily_challenge_id: Mapped[int] = mapped_column(ForeignKey("daily_challenges.id"), nullable=False)
     question: Mapped[str] = mapped_column(String, nullable=False)
     answer: Mapped[int] = mapped_column(Integer, nullable=False)
     category: Mapped[str] = mapped_column(String, nullable=False, index=True)
     difficulty: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    challenge: Mapped["DailyChallengeDB"] = relationship(back_populates="questions")
\ No newline at end of file
+    challenge: Mapped["DailyChallengeDB"] = relationship(back_populates="questions")
+#pre-generated question sets kept warm so /api/game/start doesn't have to wait on the model
+class QuestionPoolSetDB(Base):
+    __tablename__ = "question_pool_sets"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    category: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    difficulty: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    questions: Mapped[list["PooledQuestionDB"]] = relationship(back_populates="pool_set", cascade="all, delete-orphan", order_by="PooledQuestionDB.id")
+
+class PooledQuestionDB(Base):
+    __tablename__ = "question_pool_questions"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    pool_set_id: Mapped[int] = mapped_column(ForeignKey("question_pool_sets.id", ondelete="CASCADE"), nullable=False, index=True)
+    question: Mapped[str] = mapped_column(String, nullable=False)
+    answer: Mapped[int] = mapped_column(Integer, nullable=False)
+    category: Mapped[str] = mapped_column(String, nullable=False)
+    difficulty: Mapped[str] = mapped_column(String, nullable=False)
+    pool_set: Mapped["QuestionPoolSetDB"] = relationship(back_populates="questions")
@@ -0,0 +1,295 @@
+# Game_Service/app/GameRuns.py
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, insert, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from datetime import date, datetime, timezone
+from typing import Optional, Union
+
+from .GameModels import GameRunDB, UserStatsDB, LeaderboardStateDB, RunRollupDB
+
+
+def record_run(
+    db: Session,
+    user_id: int,
+    *,
+    score: int,
+    streak: int,
+    total_questions: Optional[int] = None,
+    category: Optional[str] = None,
+) -> GameRunDB:
+    """
+    Stages a finished run. Every way a run gets written (the runs endpoint, a server-side
+    session ending) goes through here, so the aggregates below are updated in the
+    same transaction as the run itself. Does NOT commit.
+    """
+    return record_runs(db, [{
+        "user_id": user_id, "score": score, "streak": streak, "total_questions": total_questions, "category": category,
+    }])[0]
+
+
+def record_runs(db: Session, items: list[dict]) -> list[GameRunDB]:
+    """
+    Stages many finished runs (dicts of user_id plus the GameRunCreate fields) at once:
+    one multi-row INSERT for the runs, one upsert each for user_stats and the rollups,
+    and at most one leaderboard version bump, however many runs and users are in the
+    batch. An item may carry its own ended_at (the write-behind buffer keeps the time
+    the run came in), the rest end now. Does NOT commit. Returns the runs in the order given.
+    """
+    ended_at = datetime.now(timezone.utc)  #set here rather than by the server default so the rollup buckets match it
+    runs = [GameRunDB(**{"ended_at": ended_at, **item}) for item in items]
+    if not runs:
+        return runs
+    db.add_all(runs)
+    db.flush()  #batched into multi-row INSERT ... RETURNING id by the ORM
+    _bump_user_stats(db, runs)
+    _bump_rollups(db, runs)
+    return runs
+
+
+def _upsert_for(db: Session, model):
+    #dialect INSERT (with .on_conflict_do_update) and its GREATEST(), or (None, None) elsewhere
+    dialect = (db.get_bind() if isinstance(db, Session) else db).dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model), func.greatest
+    if dialect == "sqlite":
+        return sqlite.insert(model), func.max  #sqlite's two-argument max() is GREATEST
+    return None, None
+
+
+def _stats_rows(runs) -> list[dict]:
+    #folds runs into one user_stats delta per user
+    rows: dict[int, dict] = {}
+    for run in runs:
+        row = rows.get(run.user_id)
+        if row is None:
+            rows[run.user_id] = {
+                "user_id": run.user_id, "games_played": 1, "score_sum": run.score,
+                "high_score": run.score, "longest_streak": run.streak,
+            }
+        else:
+            row["games_played"] += 1
+            row["score_sum"] += run.score
+            row["high_score"] = max(row["high_score"], run.score)
+            row["longest_streak"] = max(row["longest_streak"], run.streak)
+    return sorted(rows.values(), key=lambda row: row["user_id"])  #same lock order in every transaction, so two batches can't deadlock
+
+
+def _bump_user_stats(db: Session, runs):
+    #one atomic upsert, so two runs finishing at once for the same user can't lose an update
+    rows = _stats_rows(runs)
+    #bests from before this batch, locked in user_id order so they can't move before the upsert below
+    before = {
+        user_id: (high_score, longest_streak)
+        for user_id, high_score, longest_streak in db.execute(
+            select(UserStatsDB.user_id, UserStatsDB.high_score, UserStatsDB.longest_streak)
+            .where(UserStatsDB.user_id.in_([row["user_id"] for row in rows]))
+            .order_by(UserStatsDB.user_id)
+            .with_for_update()
+        )
+    }
+    stmt, greatest = _upsert_for(db, UserStatsDB)
+    if stmt is None:
+        new_bests = []
+        for row in rows:
+            stats = db.get(UserStatsDB, row["user_id"], with_for_update=True)
+            if stats is None:
+                stats = UserStatsDB(**row)
+                db.add(stats)
+            else:
+                stats.games_played += row["games_played"]
+                stats.score_sum += row["score_sum"]
+                stats.high_score = max(stats.high_score, row["high_score"])
+                stats.longest_streak = max(stats.longest_streak, row["longest_streak"])
+            db.flush()
+            new_bests.append((stats.user_id, stats.high_score, stats.longest_streak))
+    else:
+        stmt = stmt.values(rows)
+        new_bests = db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserStatsDB.user_id],
+            set_={
+                "games_played": UserStatsDB.games_played + stmt.excluded.games_played,
+                "score_sum": UserStatsDB.score_sum + stmt.excluded.score_sum,
+                "high_score": greatest(UserStatsDB.high_score, stmt.excluded.high_score),
+                "longest_streak": greatest(UserStatsDB.longest_streak, stmt.excluded.longest_streak),
+                "updated_at": func.now(),
+            },
+        ).returning(UserStatsDB.user_id, UserStatsDB.high_score, UserStatsDB.longest_streak)).all()
+
+    moved = []
+    for user_id, high_score, longest_streak in new_bests:
+        #a new player, or a best that actually went up - a run that only ties the best can't change the ranking
+        previous = before.get(user_id)
+        if previous is None or high_score > previous[0] or longest_streak > previous[1]:
+            moved.append(user_id)
+    if moved:
+        version = bump_leaderboard_version(db)
+        db.execute(update(UserStatsDB).where(UserStatsDB.user_id.in_(moved)).values(best_version=version))
+
+
+def bump_leaderboard_version(db: Union[Session, Connection]) -> int:
+    #the state row is locked until commit, so versions become visible in order. Does NOT commit.
+    stmt, _ = _upsert_for(db, LeaderboardStateDB)
+    if stmt is None:
+        state = db.get(LeaderboardStateDB, 1, with_for_update=True)
+        if state is None:
+            state = LeaderboardStateDB(id=1, version=0)
+            db.add(state)
+        state.version += 1
+        db.flush()
+        return state.version
+    return db.execute(
+        stmt.values(id=1, version=1)
+        .on_conflict_do_update(index_elements=[LeaderboardStateDB.id], set_={"version": LeaderboardStateDB.version + 1})
+        .returning(LeaderboardStateDB.version)
+    ).scalar_one()
+
+
+def iso_week(day: date) -> str:
+    iso = day.isocalendar()
+    return f"{iso.year}-W{iso.week:02d}"
+
+
+def rollup_buckets(category: Optional[str], ended_at: datetime) -> list[tuple[str, str]]:
+    #the (scope, bucket) boards a run counts towards: its UTC day, its ISO week and its category
+    if ended_at.tzinfo is not None:
+        ended_at = ended_at.astimezone(timezone.utc)  #sqlite hands back naive UTC, postgres aware datetimes
+    day = ended_at.date()
+    buckets = [("day", day.isoformat()), ("week", iso_week(day))]
+    if category:
+        buckets.append(("category", category))
+    return buckets
+
+
+def _rollup_rows(runs) -> list[dict]:
+    #folds runs into one row per (scope, bucket, user), ready to upsert or insert
+    rows: dict[tuple[str, str, int], dict] = {}
+    for run in runs:
+        for scope, bucket in rollup_buckets(run.category, run.ended_at):
+            row = rows.get((scope, bucket, run.user_id))
+            if row is None:
+                rows[(scope, bucket, run.user_id)] = {
+                    "scope": scope, "bucket": bucket, "user_id": run.user_id, "games_played": 1,
+                    "score_sum": run.score, "best_score": run.score, "best_streak": run.streak,
+                }
+            else:
+                row["games_played"] += 1
+                row["score_sum"] += run.score
+                row["best_score"] = max(row["best_score"], run.score)
+                row["best_streak"] = max(row["best_streak"], run.streak)
+    return list(rows.values())
+
+
+def _bump_rollups(db: Session, runs):
+    rows = _rollup_rows(runs)
+    stmt, greatest = _upsert_for(db, RunRollupDB)
+    if stmt is None:
+        for row in rows:
+            rollup = db.get(RunRollupDB, (row["scope"], row["bucket"], row["user_id"]), with_for_update=True)
+            if rollup is None:
+                db.add(RunRollupDB(**row))
+                continue
+            rollup.games_played += row["games_played"]
+            rollup.score_sum += row["score_sum"]
+            rollup.best_score = max(rollup.best_score, row["best_score"])
+            rollup.best_streak = max(rollup.best_streak, row["best_streak"])
+        db.flush()
+        return
+
+    stmt = stmt.values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[RunRollupDB.scope, RunRollupDB.bucket, RunRollupDB.user_id],
+        set_={
+            "games_played": RunRollupDB.games_played + stmt.excluded.games_played,
+            "score_sum": RunRollupDB.score_sum + stmt.excluded.score_sum,
+            "best_score": greatest(RunRollupDB.best_score, stmt.excluded.best_score),
+            "best_streak": greatest(RunRollupDB.best_streak, stmt.excluded.best_streak),
+        },
+    ))
+
+
+def rebuild_rollups(db: Union[Session, Connection], batch_size: int = 5000) -> int:
+    """
+    Recomputes run_rollups from game_runs, bucketing each run with the same
+    rollup_buckets() the incremental path uses. Runs are streamed, so memory grows
+    with the number of (board, user) rows rather than runs. Does NOT commit.
+    Returns the number of rollup rows written.
+    """
+    db.execute(delete(RunRollupDB))
+    result = db.execute(
+        select(GameRunDB.user_id, GameRunDB.score, GameRunDB.streak, GameRunDB.category, GameRunDB.ended_at)
+        .execution_options(yield_per=batch_size)
+    )
+    rows = _rollup_rows(result)
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(RunRollupDB), rows[start:start + batch_size])
+    return len(rows)
+
+
+def user_stats(db: Session, user_id: int) -> dict:
+    stats = db.get(UserStatsDB, user_id)
+    if stats is None or stats.games_played == 0:
+        return {"high_score": 0, "longest_streak": 0, "average_score": 0.0, "games_played": 0}
+    return {
+        "high_score": stats.high_score,
+        "longest_streak": stats.longest_streak,
+        "average_score": round(stats.score_sum / stats.games_played, 2),
+        "games_played": stats.games_played,
+    }
+
+
+def backfill_user_stats(db: Union[Session, Connection]) -> int:
+    """
+    Rebuilds user_stats from game_runs in one INSERT ... SELECT (for databases that
+    had runs before the table existed, or to repair drift) and bumps the leaderboard
+    version so cached snapshots reload. Does NOT commit. Returns the number of users written.
+    """
+    db.execute(delete(UserStatsDB))
+    totals = select(
+        GameRunDB.user_id,
+        func.count(),
+        func.sum(GameRunDB.score),
+        func.max(GameRunDB.score),
+        func.max(GameRunDB.streak),
+    ).group_by(GameRunDB.user_id)
+    db.execute(insert(UserStatsDB).from_select(
+        ["user_id", "games_played", "score_sum", "high_score", "longest_streak"], totals
+    ))
+    version = bump_leaderboard_version(db)
+    db.execute(update(UserStatsDB).values(best_version=version))
+    return db.execute(select(func.count()).select_from(UserStatsDB)).scalar_one()
+
+
+def main(argv=None):
+    import argparse
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).resolve().parents[1] / ".env")  #before GameDatabase reads GAME_DATABASE_URL
+    from .GameDatabase import engine, SessionLocal
+    from .GameMigrations import run_migrations
+
+    parser = argparse.ArgumentParser(prog="python -m Game_Service.app.GameRuns", description="Maintenance for the run aggregates")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill-stats", help="rebuild user_stats from game_runs")
+    sub.add_parser("rebuild-rollups", help="rebuild the daily/weekly/category leaderboard rollups from game_runs")
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        if args.command == "backfill-stats":
+            users = backfill_user_stats(db)
+            db.commit()
+            print(f"user_stats rebuilt for {users} users")
+        elif args.command == "rebuild-rollups":
+            rows = rebuild_rollups(db)
+            db.commit()
+            print(f"run_rollups rebuilt with {rows} rows")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,7 @@
 from typing import Optional, Annotated, Literal
-from pydantic import BaseModel, ConfigDict, StringConstraints
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 from annotated_types import Ge
-from datetime import date
+from datetime import date, datetime
 
 CategoryStr = Annotated[
     str,
@@ -53,6 +53,20 @@ class QuestionPatch(BaseModel):  # partial updates of a question
     difficulty: Optional[Difficulty] = None
 
 
+class QuestionImportError(BaseModel):  # one rejected row, line is 1-based in the uploaded file
+    line: int
+    error: str
+
+
+class QuestionImportReport(BaseModel):
+    received: int
+    inserted: int
+    duplicates: int
+    rejected: int
+    errors: list[QuestionImportError]
+    errors_truncated: bool = False
+
+
 # ------------ Game Runs --------------
 class GameRunCreate(BaseModel):
     score: AnswerInt
@@ -67,6 +81,39 @@ class GameRunRead(GameRunCreate):
     user_id: int
 
 
+RUN_BATCH_MAX = 1000
+
+
+class GameRunBatchItem(GameRunCreate):  # one run of a POST /api/runs:batch body
+    user_id: int
+
+
+class GameRunBatchRequest(BaseModel):
+    runs: list[GameRunBatchItem] = Field(min_length=1, max_length=RUN_BATCH_MAX)
+
+
+class GameRunBatchResponse(BaseModel):
+    accepted: int
+    run_ids: list[int]  # in the order the runs were sent
+
+
+class GameRunQueued(BaseModel):  # 202 from POST /api/users/{id}/runs in write-behind mode
+    user_id: int
+    queued: bool = True
+
+
+class RunBufferStats(BaseModel):
+    write_behind: bool
+    pending: int
+    enqueued: int
+    flushed: int
+    batches: int
+    failures: int  # flushes that failed (put back to retry, or retried run by run)
+    dropped: int  # runs that could not be written at all, logged and given up on
+    last_flush_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
 class UserStatsRead(BaseModel):  # linked to user information via user_id
     high_score: AnswerInt
     longest_streak: AnswerInt
@@ -80,11 +127,21 @@ class LeaderboardEntry(BaseModel):
     best_streak: AnswerInt
 
 
+class UserRankRead(LeaderboardEntry):  # where one player sits on the all-time leaderboard
+    rank: int
+    total_players: int
+    percentile: float  # % of the other players this user is ahead of
+    above: list[LeaderboardEntry]  # neighbours in leaderboard order
+    below: list[LeaderboardEntry]
+
+
 # --------------- Game Validation --------------
 class ValidatePlacementRequest(BaseModel):
     placed_question_id: int
     left_neighbor_id: Optional[int] = None
     right_neighbor_id: Optional[int] = None
+    session_id: Optional[str] = None  # lets the server answer from its per-session cache
+    validation_token: Optional[str] = None  # signed token from /api/game/start, validates with no DB/cache lookup
 
 
 class ValidatePlacementResponse(BaseModel):
@@ -94,14 +151,129 @@ class ValidatePlacementResponse(BaseModel):
     right_answer: Optional[AnswerInt] = None
 
 
+TimelineIds = Annotated[list[int], Field(min_length=1, max_length=64)]
+
+
+class TimelineSlotResult(BaseModel):
+    question_id: int
+    answer: AnswerInt
+    correct: bool
+
+
+class ValidateTimelineRequest(BaseModel):  # the whole number line, left to right
+    session_id: str
+    question_ids: TimelineIds
+    validation_token: Optional[str] = None
+
+
+class ValidateTimelineResponse(BaseModel):
+    correct: bool
+    first_wrong_index: Optional[int] = None
+    slots: list[TimelineSlotResult]
+
+
+Lives = Annotated[int, Field(ge=1, le=10)]
+
+
 class GameStartRequest(BaseModel):
     category: CategoryStr
     difficulty: Difficulty
+    include_validation_token: bool = False
+    user_id: Optional[int] = None  # when set, the run is recorded server-side when the game ends
+    lives: Lives = 1  # wrong placements allowed before game over
 
 
 class GameStartResponse(BaseModel):
     session_id: str
     questions: list[QuestionReadPublic]
+    validation_token: Optional[str] = None  # answers encrypted + HMAC-signed, only when asked for
+    lives_remaining: Optional[int] = None
+
+
+# ------------- Game Sessions ---------------
+class PlaceCardRequest(BaseModel):
+    question_id: int
+    position: AnswerInt  # index on the number line the card is dropped at (0 = far left)
+
+
+class GameSessionState(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    session_id: str
+    status: str
+    category: str
+    difficulty: Difficulty
+    total_questions: int
+    timeline: list[int]
+    lives_remaining: int
+    score: int
+    streak: int
+    best_streak: int
+    run_id: Optional[int] = None
+
+
+class PlaceCardResponse(GameSessionState):
+    correct: bool
+    placed_answer: AnswerInt
+    left_answer: Optional[AnswerInt] = None
+    right_answer: Optional[AnswerInt] = None
+
+
+# ------------- Question Pool ---------------
+class QuestionPoolKeyStats(BaseModel):
+    category: str
+    difficulty: str
+    depth: int
+    hits: int
+    misses: int
+
+
+class QuestionPoolStats(BaseModel):
+    low_water: int
+    total_depth: int
+    total_hits: int
+    total_misses: int
+    sets_refilled: int
+    refill_failures: int
+    keys: list[QuestionPoolKeyStats]
+
+
+class GenerationStats(BaseModel):  # single-flight counters for question generation
+    calls: int
+    executions: int
+    coalesced: int
+    in_flight: int
+
+
+class AnswerCacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+# ------------- Retention ---------------
+class RetentionRunResponse(BaseModel):
+    cutoff: datetime
+    questions_deleted: int  # legacy per-session question copies removed
+    questions_archived: int  # legacy copies kept as shared bank questions instead (archive=true)
+    sessions_deleted: int
+    session_links_deleted: int  # game_session_questions rows
+    batches: int
+    complete: bool  # False when the time budget ran out first, run the job again to carry on
+
+
+class RetentionStats(BaseModel):
+    retention_days: float
+    runs: int
+    questions_deleted: int
+    questions_archived: int
+    sessions_deleted: int
+    session_links_deleted: int
+    last_run_at: Optional[datetime] = None
+    last_run_complete: Optional[bool] = None
 
 
 # ------------- Daily Challenge ---------------
@@ -124,6 +296,7 @@ class DailyValidatePlacementRequest(BaseModel):
     placed_question_id: int
     left_neighbor_id: Optional[int] = None
     right_neighbor_id: Optional[int] = None
+    challenge_date: Optional[date] = None  # lets the server answer from its per-challenge cache
 
 
 class DailyValidatePlacementResponse(BaseModel):
@@ -133,6 +306,11 @@ class DailyValidatePlacementResponse(BaseModel):
     right_answer: Optional[AnswerInt] = None
 
 
+class DailyValidateTimelineRequest(BaseModel):
+    question_ids: TimelineIds
+    challenge_date: Optional[date] = None  # when set, every id must belong to that day's challenge
+
+
 # ------------- Daily Categories ---------------
 class DailyCategoryCreate(BaseModel):
     name: CategoryStr
@@ -142,12 +320,36 @@ class DailyCategoryRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: int
     name: CategoryStr
-    is_used: bool
+    is_used: bool  # already handed out in the current rotation cycle
     used_at: Optional[date] = None
+    used_cycle: int = 0
 
 class DailyChallengeListEntry(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: int
     challenge_date: date
     category: CategoryStr
-    difficulty: Difficulty
\ No newline at end of file
+    difficulty: Difficulty
+
+
+class DailyUpcomingEntry(BaseModel):
+    challenge_date: date
+    category: Optional[CategoryStr] = None
+    difficulty: Difficulty
+    status: Literal["missing", "pending", "ready", "success", "failed"]
+    error_message: Optional[str] = None
+    attempts: int = 0
+    last_latency_ms: Optional[int] = None
+    next_attempt_at: Optional[datetime] = None  # earliest retry of a failed day
+
+
+class DailyGenerateUpcomingResponse(BaseModel):
+    created: int
+    failed: int
+    days: list[DailyUpcomingEntry]
+
+
+class DailyRecoverResponse(BaseModel):
+    attempted: int  # failed/stale challenges leased by this call
+    recovered: int
+    failed: int
@@ -0,0 +1,178 @@
+# Game_Service/app/GameSessions.py
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import datetime, timezone
+import json
+from .GameDatabase import SessionLocal
+from .GameModels import GameSessionDB
+from .GameSchemas import GameSessionState, PlaceCardRequest, PlaceCardResponse
+from .GameRuns import record_run
+from .Placement import placement_is_correct
+from .QuestionBank import session_answers
+from .AnswerCache import AnswerSet
+
+router = APIRouter(prefix="/api/game/sessions", tags=["game-sessions"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def load_session(db: Session, session_id: str, for_update: bool = False) -> GameSessionDB:
+    stmt = select(GameSessionDB).where(GameSessionDB.session_id == session_id)
+    if for_update:
+        #Postgres: two placements for the same game are applied one after the other.
+        #populate_existing so a row already in the session (the WebSocket's) is refreshed, not reused
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
+    game = db.execute(stmt).scalars().first()
+    if not game:
+        raise HTTPException(status_code=404, detail="Game session not found")
+    return game
+
+
+def apply_placement(db: Session, game: GameSessionDB, answers: AnswerSet, question_id: int, position: int) -> dict:
+    """
+    Applies one card drop to the session: checks it against its neighbours on the
+    server-side timeline, updates score/streak/lives and ends the game (recording
+    the run) when the player runs out of lives or cards. Does NOT commit.
+    Returns the placement result to merge into the response.
+    """
+    if game.status != "active":
+        raise HTTPException(status_code=409, detail="Game session has ended")
+
+    placed_answer = answers.get(question_id)
+    if placed_answer is None:
+        raise HTTPException(status_code=404, detail="Question not found in this session")
+    if question_id in game.timeline or question_id in game.missed:
+        raise HTTPException(status_code=409, detail="Question has already been placed")
+    if position > len(game.timeline):
+        raise HTTPException(status_code=422, detail="Position is past the end of the timeline")
+
+    left_answer = answers.get(game.timeline[position - 1]) if position > 0 else None
+    right_answer = answers.get(game.timeline[position]) if position < len(game.timeline) else None
+    correct = placement_is_correct(left_answer, placed_answer, right_answer)
+
+    #JSON columns only notice reassignment, so build new lists instead of mutating in place
+    if correct:
+        game.timeline = game.timeline[:position] + [question_id] + game.timeline[position:]
+        game.score += 1
+        game.streak += 1
+        game.best_streak = max(game.best_streak, game.streak)
+    else:
+        game.missed = game.missed + [question_id]
+        game.lives_remaining -= 1
+        game.streak = 0
+
+    cards_played = len(game.timeline) + len(game.missed)
+    if game.lives_remaining <= 0 or cards_played >= game.total_questions:
+        end_session(db, game)
+
+    return {
+        "correct": correct,
+        "placed_answer": placed_answer,
+        "left_answer": left_answer,
+        "right_answer": right_answer,
+    }
+
+
+def end_session(db: Session, game: GameSessionDB):
+    #the run is produced here from server-side state instead of being reported by the client
+    game.status = "ended"
+    game.updated_at = datetime.now(timezone.utc)
+    if game.user_id is not None and game.run_id is None:
+        run = record_run(
+            db,
+            game.user_id,
+            score=game.score,
+            streak=game.best_streak,
+            total_questions=game.total_questions,
+            category=game.category,
+        )
+        game.run_id = run.id
+
+
+def session_state(game: GameSessionDB) -> dict:
+    return GameSessionState.model_validate(game).model_dump()
+
+
+@router.get("/{session_id}", response_model=GameSessionState)
+def get_session(session_id: str, db: Session = Depends(get_db)):
+    return load_session(db, session_id)
+
+
+@router.post("/{session_id}/place", response_model=PlaceCardResponse)
+def place_card(session_id: str, payload: PlaceCardRequest, db: Session = Depends(get_db)):
+    """
+    One call per card drop: validates the placement against the server-side timeline
+    and returns the new game state, so the client doesn't keep score itself.
+    """
+    game = load_session(db, session_id, for_update=True)
+    answers = session_answers(db, session_id)
+    result = apply_placement(db, game, answers, payload.question_id, payload.position)
+    db.commit()
+    return {**session_state(game), **result}
+
+
+def _place_and_commit(db: Session, session_id: str, answers: AnswerSet, payload: PlaceCardRequest) -> dict:
+    #re-reads the row under the lock on every drop, like /place, so HTTP and other sockets can't interleave with it
+    try:
+        game = load_session(db, session_id, for_update=True)
+        result = apply_placement(db, game, answers, payload.question_id, payload.position)
+        db.commit()
+    except Exception:
+        db.rollback()  #releases the row lock, rejected drops changed nothing
+        raise
+    return PlaceCardResponse(**session_state(game), **result).model_dump()
+
+
+@router.websocket("/{session_id}/ws")
+async def session_socket(websocket: WebSocket, session_id: str, db: Session = Depends(get_db)):
+    """
+    Streaming version of /place: the client opens this once per game and sends
+    {"question_id": ..., "position": ...} per drop. The answers are loaded once on
+    connect and reused for every message, so a drop costs a locked read of the
+    session row and one UPDATE instead of a full HTTP request, CORS pass and fresh
+    DB session. Replies are {"type": "state" | "placement" | "error", ...}.
+    """
+    await websocket.accept()
+    try:
+        game = await run_in_threadpool(load_session, db, session_id)
+        answers = await run_in_threadpool(session_answers, db, session_id)
+        await run_in_threadpool(db.commit)  #end the read transaction (expire_on_commit=False keeps the loaded state)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+
+    state = session_state(game)
+    await websocket.send_json({"type": "state", **state})
+
+    try:
+        active = state["status"] == "active"
+        while active:
+            message = await websocket.receive_text()
+            try:
+                payload = PlaceCardRequest.model_validate(json.loads(message))
+                result = await run_in_threadpool(_place_and_commit, db, session_id, answers, payload)
+            except json.JSONDecodeError as e:
+                await websocket.send_json({"type": "error", "status": 422, "detail": f"Message is not valid JSON: {e.msg}"})
+                continue
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "status": 422, "detail": e.errors(include_url=False)})
+                continue
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+                continue
+            await websocket.send_json({"type": "placement", **result})
+            active = result["status"] == "active"
+    except WebSocketDisconnect:
+        return
+
+    await websocket.close(code=1000)  #game over
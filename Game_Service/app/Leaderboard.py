@@ -0,0 +1,171 @@
+# Game_Service/app/Leaderboard.py
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from bisect import bisect_left
+from typing import Callable, Optional
+import os
+import threading
+
+from .GameModels import UserStatsDB, LeaderboardStateDB, RunRollupDB
+
+LEADERBOARD_MAX_LIMIT = 100
+
+
+def leaderboard_size() -> int:
+    #how many places the in-memory snapshot keeps, pages past this are read straight from the index
+    return max(1, int(os.getenv("LEADERBOARD_SNAPSHOT_SIZE", "1000")))
+
+
+def leaderboard_max_age() -> int:
+    #Cache-Control max-age for leaderboard responses, clients revalidate with the ETag after that
+    return max(0, int(os.getenv("LEADERBOARD_MAX_AGE_SECONDS", "10")))
+
+
+def leaderboard_version(db: Session) -> int:
+    return db.execute(select(LeaderboardStateDB.version).where(LeaderboardStateDB.id == 1)).scalar() or 0
+
+
+def leaderboard_order():
+    #best score first, then best streak, then the older account
+    return (UserStatsDB.high_score.desc(), UserStatsDB.longest_streak.desc(), UserStatsDB.user_id)
+
+
+def _sort_key(user_id: int, best_score: int, best_streak: int) -> tuple[int, int, int]:
+    return (-best_score, -best_streak, user_id)
+
+
+def read_leaderboard_page(db: Session, offset: int, limit: int) -> list[dict]:
+    #straight off ix_user_stats_leaderboard
+    stmt = (
+        select(UserStatsDB.user_id, UserStatsDB.high_score, UserStatsDB.longest_streak)
+        .order_by(*leaderboard_order())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [{"user_id": r.user_id, "best_score": r.high_score, "best_streak": r.longest_streak} for r in db.execute(stmt)]
+
+
+def read_rollup_board(db: Session, scope: str, bucket: str, offset: int, limit: int) -> list[dict]:
+    #one range of ix_run_rollups_board, already in leaderboard order
+    stmt = (
+        select(RunRollupDB.user_id, RunRollupDB.best_score, RunRollupDB.best_streak)
+        .where(RunRollupDB.scope == scope)
+        .where(RunRollupDB.bucket == bucket)
+        .order_by(RunRollupDB.best_score.desc(), RunRollupDB.best_streak.desc(), RunRollupDB.user_id)
+        .offset(offset)
+        .limit(limit)
+    )
+    return [{"user_id": r.user_id, "best_score": r.best_score, "best_streak": r.best_streak} for r in db.execute(stmt)]
+
+
+class LeaderboardSnapshot:
+    """
+    The leaderboard order kept in memory as a sorted list, tagged with the
+    leaderboard version it reflects. `size` caps how many places are kept (None keeps
+    every player). When the version in the database moves on, only the users whose
+    best went up since then (user_stats.best_version) are re-read and moved into
+    place. Bests never go down, so a user can only enter the top N by showing up in
+    that delta, which keeps the snapshot exact without a full reload.
+    """
+
+    DELTA_LIMIT = 500  #more changed users than this and a full reload is cheaper
+
+    def __init__(self, size: Callable[[], Optional[int]] = leaderboard_size):
+        self._size = size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.version: Optional[int] = None
+            self._keys: list[tuple[int, int, int]] = []
+            self._by_user: dict[int, tuple[int, int, int]] = {}
+            self.full_reloads = 0
+            self.delta_refreshes = 0
+
+    def _load_all(self, db: Session, size: Optional[int]):
+        rows = db.execute(
+            select(UserStatsDB.user_id, UserStatsDB.high_score, UserStatsDB.longest_streak)
+            .order_by(*leaderboard_order())
+            .limit(size)
+        ).all()
+        self._keys = [_sort_key(*row) for row in rows]
+        self._by_user = {key[2]: key for key in self._keys}
+        self.full_reloads += 1
+
+    def _place(self, key: tuple[int, int, int], size: Optional[int]):
+        old = self._by_user.pop(key[2], None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+        i = bisect_left(self._keys, key)
+        if size is not None and i >= size:
+            return
+        self._keys.insert(i, key)
+        self._by_user[key[2]] = key
+        if size is not None and len(self._keys) > size:
+            dropped = self._keys.pop()
+            del self._by_user[dropped[2]]
+
+    def refresh(self, db: Session, version: int):
+        size = self._size()
+        with self._lock:
+            if self.version is not None and self.version >= version:
+                return
+            changed = None
+            if self.version is not None:
+                changed = db.execute(
+                    select(UserStatsDB.user_id, UserStatsDB.high_score, UserStatsDB.longest_streak, UserStatsDB.best_version)
+                    .where(UserStatsDB.best_version > self.version)
+                    .limit(self.DELTA_LIMIT + 1)
+                ).all()
+            if changed is None or len(changed) > self.DELTA_LIMIT:
+                self._load_all(db, size)
+            else:
+                for row in changed:
+                    self._place(_sort_key(row.user_id, row.high_score, row.longest_streak), size)
+                    version = max(version, row.best_version)  #rows can be newer than the version we read, never older
+                self.delta_refreshes += 1
+            self.version = version
+
+    def page(self, db: Session, version: int, offset: int, limit: int) -> list[dict]:
+        size = self._size()
+        if size is not None and offset + limit > size:
+            return read_leaderboard_page(db, offset, limit)  #past the top N
+        self.refresh(db, version)
+        with self._lock:
+            keys = self._keys[offset:offset + limit]
+        return [_entry(key) for key in keys]
+
+    def rank(self, db: Session, version: int, user_id: int, neighbors: int = 2) -> Optional[dict]:
+        """
+        1-based rank of a user, found by bisecting the sorted keys (O(log n), no scan of
+        game_runs), plus the players just above and below. None if the user has no runs.
+        Only meaningful on an uncapped snapshot, like rank_index.
+        """
+        self.refresh(db, version)
+        with self._lock:
+            key = self._by_user.get(user_id)
+            if key is None:
+                return None
+            i = bisect_left(self._keys, key)
+            total = len(self._keys)
+            above = self._keys[max(0, i - neighbors):i]
+            below = self._keys[i + 1:i + 1 + neighbors]
+        return {
+            **_entry(key),
+            "rank": i + 1,
+            "total_players": total,
+            #share of the other players this user is ahead of
+            "percentile": round(100 * (total - 1 - i) / (total - 1), 2) if total > 1 else 100.0,
+            "above": [_entry(k) for k in above],
+            "below": [_entry(k) for k in below],
+        }
+
+
+def _entry(key: tuple[int, int, int]) -> dict:
+    score, streak, user_id = key
+    return {"user_id": user_id, "best_score": -score, "best_streak": -streak}
+
+
+leaderboard_snapshot = LeaderboardSnapshot()
+rank_index = LeaderboardSnapshot(size=lambda: None)  #every player, for rank lookups
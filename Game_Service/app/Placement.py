@@ -0,0 +1,30 @@
+# Game_Service/app/Placement.py
+from typing import Optional
+
+
+#Allows answers to be equal - a missing neighbour (None) means that side is open
+def placement_is_correct(left_answer: Optional[int], placed_answer: int, right_answer: Optional[int]) -> bool:
+    if left_answer is not None and left_answer > placed_answer:
+        return False
+    if right_answer is not None and placed_answer > right_answer:
+        return False
+    return True
+
+
+def check_timeline(answers: list[int]) -> tuple[list[bool], Optional[int]]:
+    """
+    Checks a whole timeline in one pass. Each slot is judged against its direct
+    neighbours, the same way validate-placement judges a single drop.
+    Returns the per-slot results and the index of the first wrong slot (or None).
+    """
+    results: list[bool] = []
+    first_wrong: Optional[int] = None
+    last = len(answers) - 1
+    for i, answer in enumerate(answers):
+        left = answers[i - 1] if i > 0 else None
+        right = answers[i + 1] if i < last else None
+        correct = placement_is_correct(left, answer, right)
+        if not correct and first_wrong is None:
+            first_wrong = i
+        results.append(correct)
+    return results, first_wrong
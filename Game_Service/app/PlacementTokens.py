@@ -0,0 +1,121 @@
+# Game_Service/app/PlacementTokens.py
+from typing import Iterable, Optional
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import time
+
+from .AnswerCache import AnswerSet
+
+TOKEN_VERSION = 1
+NONCE_BYTES = 12
+TAG_BYTES = 16
+_HEADER = struct.Struct(">BIB")  #version, expiry (unix seconds), session id length
+_COUNT = struct.Struct(">H")
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class TokenNotConfigured(Exception):
+    #PLACEMENT_TOKEN_SECRET is missing, a deployment problem rather than a bad token
+    pass
+
+
+def token_ttl_seconds() -> int:
+    return int(os.getenv("PLACEMENT_TOKEN_TTL_SECONDS", str(6 * 60 * 60)))
+
+
+def _secret() -> bytes:
+    secret = os.getenv("PLACEMENT_TOKEN_SECRET")
+    if not secret:
+        raise TokenNotConfigured("PLACEMENT_TOKEN_SECRET is not configured")
+    return secret.encode("utf-8")
+
+
+def _derive(secret: bytes, purpose: bytes) -> bytes:
+    #separate keys for encrypting and signing, both derived from the one configured secret
+    return hmac.new(secret, purpose, hashlib.sha256).digest()
+
+
+def _keystream(key: bytes, nonce: bytes, length: int) -> bytes:
+    #HMAC-SHA256 in counter mode as a stream cipher, so the answers can be hidden using only the stdlib
+    blocks = []
+    for counter in range((length + 31) // 32):
+        blocks.append(hmac.new(key, nonce + counter.to_bytes(4, "big"), hashlib.sha256).digest())
+    return b"".join(blocks)[:length]
+
+
+def _xor(data: bytes, stream: bytes) -> bytes:
+    return bytes(a ^ b for a, b in zip(data, stream))
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(token: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise InvalidToken("Malformed token")
+
+
+def issue_token(session_id: str, pairs: Iterable[tuple[int, int]], now: Optional[float] = None) -> str:
+    """
+    Packs a session's id -> answer pairs into a compact, signed token.
+    Question ids are in the clear, answers are encrypted, and the whole thing is
+    authenticated (encrypt-then-MAC), so the client can carry it without learning the answers.
+    """
+    secret = _secret()
+    pairs = sorted(pairs)
+    session_bytes = session_id.encode("utf-8")
+    expires = int((now if now is not None else time.time()) + token_ttl_seconds())
+
+    ids = struct.pack(f">{len(pairs)}q", *(question_id for question_id, _ in pairs))
+    answers = struct.pack(f">{len(pairs)}q", *(answer for _, answer in pairs))
+
+    nonce = secrets.token_bytes(NONCE_BYTES)
+    encrypted = _xor(answers, _keystream(_derive(secret, b"placement-enc"), nonce, len(answers)))
+    body = _HEADER.pack(TOKEN_VERSION, expires, len(session_bytes)) + session_bytes + _COUNT.pack(len(pairs)) + ids + encrypted
+    tag = hmac.new(_derive(secret, b"placement-mac"), nonce + body, hashlib.sha256).digest()[:TAG_BYTES]
+    return _b64encode(nonce + body + tag)
+
+
+def read_token(token: str, now: Optional[float] = None) -> tuple[str, AnswerSet]:
+    """
+    Verifies a token and returns (session_id, answers). Raises InvalidToken if it
+    was tampered with, signed with another secret, malformed or expired.
+    """
+    secret = _secret()
+    raw = _b64decode(token)
+    if len(raw) < NONCE_BYTES + _HEADER.size + _COUNT.size + TAG_BYTES:
+        raise InvalidToken("Malformed token")
+
+    nonce, body, tag = raw[:NONCE_BYTES], raw[NONCE_BYTES:-TAG_BYTES], raw[-TAG_BYTES:]
+    expected = hmac.new(_derive(secret, b"placement-mac"), nonce + body, hashlib.sha256).digest()[:TAG_BYTES]
+    if not hmac.compare_digest(tag, expected):
+        raise InvalidToken("Bad signature")
+
+    version, expires, session_len = _HEADER.unpack_from(body)
+    if version != TOKEN_VERSION:
+        raise InvalidToken("Unsupported token version")
+    if expires < (now if now is not None else time.time()):
+        raise InvalidToken("Token expired")
+
+    offset = _HEADER.size
+    session_id = body[offset:offset + session_len].decode("utf-8")
+    offset += session_len
+    (count,) = _COUNT.unpack_from(body, offset)
+    offset += _COUNT.size
+    if len(body) != offset + count * 16:
+        raise InvalidToken("Malformed token")
+
+    ids = struct.unpack_from(f">{count}q", body, offset)
+    encrypted = body[offset + count * 8:]
+    answers = struct.unpack(f">{count}q", _xor(encrypted, _keystream(_derive(secret, b"placement-enc"), nonce, len(encrypted))))
+    return session_id, AnswerSet(zip(ids, answers), expires_at=float(expires))
@@ -0,0 +1,123 @@
+# Game_Service/app/QuestionBank.py
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+import hashlib
+import os
+import re
+import unicodedata
+
+from .GameModels import QuestionDB, GameSessionQuestionDB
+from .QuestionSelector import answer_indexes, select_spread_set
+from .AnswerCache import answer_cache, session_key, AnswerSet
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def bank_min_size() -> int:
+    #a (category, difficulty) needs at least this many distinct questions before games are dealt from the bank alone
+    return max(0, int(os.getenv("QUESTION_BANK_MIN_SIZE", "64")))
+
+
+def normalize_question_text(text: str) -> str:
+    #case, spacing, unicode forms and trailing punctuation shouldn't make two questions "different"
+    text = unicodedata.normalize("NFKC", text).casefold().strip()
+    text = _WHITESPACE.sub(" ", text)
+    return text.rstrip(" ?.!")
+
+
+def question_key(question: str, answer: int) -> str:
+    normalized = normalize_question_text(question)
+    return hashlib.sha1(f"{normalized}|{int(answer)}".encode("utf-8")).hexdigest()
+
+
+def insert_bank_rows(db: Session, rows: list[dict]) -> set[int]:
+    #inserts question rows (with question_key set), skipping any already in the bank. Does NOT commit.
+    #Postgres and SQLite both support ON CONFLICT DO NOTHING, so two sessions adding the same new question can't collide
+    #returns the ids of the rows that were actually inserted
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(QuestionDB).on_conflict_do_nothing(index_elements=["question_key"])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(QuestionDB).on_conflict_do_nothing(index_elements=["question_key"])
+    else:
+        existing = set(
+            db.execute(select(QuestionDB.question_key).where(QuestionDB.question_key.in_([r["question_key"] for r in rows]))).scalars()
+        )
+        rows = [r for r in rows if r["question_key"] not in existing]
+        if not rows:
+            return set()
+        stmt = insert(QuestionDB)
+    return set(db.execute(stmt.returning(QuestionDB.id), rows).scalars())
+
+
+def upsert_bank_questions(db: Session, questions) -> list[QuestionDB]:
+    """
+    Adds the questions to the bank (skipping ones already there) and returns the
+    bank rows in the same order as the input, with in-set duplicates dropped.
+    Does NOT commit.
+    """
+    ordered_keys: list[str] = []
+    new_rows: dict[str, dict] = {}
+    for q in questions:
+        key = question_key(q.question, q.answer)
+        if key in new_rows:
+            continue
+        ordered_keys.append(key)
+        new_rows[key] = {
+            "question": q.question,
+            "answer": q.answer,
+            "category": q.category,
+            "difficulty": q.difficulty,
+            "question_key": key,
+        }
+
+    if not ordered_keys:
+        return []
+
+    inserted_ids = insert_bank_rows(db, list(new_rows.values()))
+
+    by_key = {
+        row.question_key: row
+        for row in db.execute(select(QuestionDB).where(QuestionDB.question_key.in_(ordered_keys))).scalars()
+    }
+    rows = [by_key[key] for key in ordered_keys]
+    #keep the answer indexes used for set selection in step (a rollback just leaves ids the selector skips)
+    answer_indexes.add(row for row in rows if row.id in inserted_ids)
+    return rows
+
+
+def map_session_questions(db: Session, session_id: str, rows: list[QuestionDB]):
+    #does NOT commit
+    for position, row in enumerate(rows):
+        db.add(GameSessionQuestionDB(game_session_id=session_id, question_id=row.id, position=position))
+
+
+def session_question_ids(session_id: str):
+    #sub-select of question ids dealt to a session, for use in IN (...) filters
+    return select(GameSessionQuestionDB.question_id).where(GameSessionQuestionDB.game_session_id == session_id)
+
+
+def session_answers(db: Session, session_id: str) -> AnswerSet:
+    #id -> answer for a whole session, from the cache or (on a miss) one query that then fills the cache
+    key = session_key(session_id)
+    cached = answer_cache.get(key)
+    if cached is not None:
+        return cached
+
+    stmt = select(QuestionDB.id, QuestionDB.answer).where(
+        or_(QuestionDB.game_session_id == session_id, QuestionDB.id.in_(session_question_ids(session_id)))
+    )
+    pairs = [(row.id, row.answer) for row in db.execute(stmt)]
+    if not pairs:
+        return AnswerSet(pairs, 0)  #unknown session, don't let probes fill the cache
+    return answer_cache.put(key, pairs)
+
+
+def sample_bank_set(db: Session, category: str, difficulty: str, count: int) -> list[QuestionDB] | None:
+    """
+    Deals `count` bank questions for (category, difficulty) without calling the model,
+    picked for well spread, distinct answers. Returns None while the bank has fewer than
+    QUESTION_BANK_MIN_SIZE distinct answers for the key, so players still get variety.
+    """
+    return select_spread_set(db, category, difficulty, count, min_distinct=bank_min_size())
@@ -0,0 +1,266 @@
+# Game_Service/app/QuestionBulk.py
+"""
+Bulk question import/export, shared by the /api/questions/import and /export
+endpoints and the command line:
+
+    python -m Game_Service.app.QuestionBulk import questions.ndjson
+    python -m Game_Service.app.QuestionBulk export questions.csv --category History
+
+Files are NDJSON (one {"question", "answer", "category", "difficulty"} object per
+line) or CSV with a header row naming those columns. Extra fields such as the
+exported `id` are ignored on import, so an export can be loaded straight back in.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from pydantic import ValidationError
+from typing import Callable, Iterable, Iterator, Literal, TextIO
+import csv
+import io
+import json
+import random
+
+from .GameModels import QuestionDB
+from .GameSchemas import QuestionCreate
+from .QuestionBank import question_key, insert_bank_rows
+from .QuestionSelector import answer_indexes
+from .AnswerCache import answer_cache
+
+BulkFormat = Literal["ndjson", "csv"]
+
+IMPORT_CHUNK_SIZE = 2000
+EXPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+COLUMNS = ("question", "answer", "category", "difficulty")
+EXPORT_COLUMNS = ("id",) + COLUMNS
+
+
+def _iter_ndjson(file: TextIO) -> Iterator[tuple[int, dict | None, str | None]]:
+    for line_no, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def _iter_csv(file: TextIO) -> Iterator[tuple[int, dict | None, str | None]]:
+    reader = csv.DictReader(file)
+    missing = [c for c in COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        yield 1, None, f"CSV header is missing columns: {', '.join(missing)}"
+        return
+    for record in reader:
+        yield reader.line_num, record, None  #line_num is the last physical line, so quoted newlines still point at the right row
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors(include_url=False))
+
+
+def _copy_insert(db: Session, rows: list[dict]) -> int:
+    """
+    Postgres fast path: COPY the chunk into a temp staging table, then one
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING moves it into the bank.
+    Returns the number of rows actually inserted.
+    """
+    raw = db.connection().connection.driver_connection  #psycopg2 connection inside the session's transaction
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row["question"], row["answer"], row["category"], row["difficulty"], row["question_key"], row["random_key"]])
+    buffer.seek(0)
+
+    with raw.cursor() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS question_import_stage ("
+            "question text, answer bigint, category text, difficulty text, question_key text, random_key double precision"
+            ") ON COMMIT DELETE ROWS"
+        )
+        cur.copy_expert(
+            "COPY question_import_stage (question, answer, category, difficulty, question_key, random_key) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        cur.execute(
+            "INSERT INTO questions (question, answer, category, difficulty, question_key, random_key) "
+            "SELECT question, answer, category, difficulty, question_key, random_key FROM question_import_stage "
+            "ON CONFLICT (question_key) DO NOTHING"
+        )
+        return cur.rowcount
+
+
+def _insert_chunk(db: Session, rows: list[dict]) -> int:
+    if db.get_bind().dialect.name == "postgresql" and db.get_bind().dialect.driver == "psycopg2":
+        return _copy_insert(db, rows)
+    return len(insert_bank_rows(db, rows))  #one executemany with ON CONFLICT DO NOTHING
+
+
+def import_questions(db: Session, file: TextIO, fmt: BulkFormat, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Validates and inserts questions from an NDJSON/CSV text stream, `chunk_size`
+    rows per statement and per commit. Bad rows are reported (line + reason) and
+    skipped instead of failing the whole file; rows already in the bank count as
+    duplicates. Memory is bounded by the chunk size, not the file size.
+    """
+    records = _iter_ndjson(file) if fmt == "ndjson" else _iter_csv(file)
+    report = {"received": 0, "inserted": 0, "duplicates": 0, "rejected": 0, "errors": [], "errors_truncated": False}
+
+    def reject(line_no: int, message: str):
+        report["rejected"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_no, "error": message})
+        else:
+            report["errors_truncated"] = True
+
+    chunk: dict[str, dict] = {}
+    chunk_lines: list[int] = []
+
+    def flush():
+        if not chunk:
+            return
+        try:
+            inserted = _insert_chunk(db, list(chunk.values()))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for line_no in chunk_lines:
+                reject(line_no, f"Database error: {type(e).__name__}")
+        else:
+            report["inserted"] += inserted
+            report["duplicates"] += len(chunk) - inserted
+        chunk.clear()
+        chunk_lines.clear()
+
+    for line_no, record, error in records:
+        report["received"] += 1
+        if error is not None:
+            reject(line_no, error)
+            continue
+        try:
+            question = QuestionCreate.model_validate(record)
+        except ValidationError as e:
+            reject(line_no, _validation_message(e))
+            continue
+
+        key = question_key(question.question, question.answer)
+        if key in chunk:
+            report["duplicates"] += 1  #repeated within the same chunk, the later copy is dropped
+            continue
+        chunk[key] = {**question.model_dump(), "question_key": key, "random_key": random.random()}
+        chunk_lines.append(line_no)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    if report["inserted"]:
+        #new bank rows: let the set selector rebuild lazily rather than adding 100k rows one by one
+        answer_indexes.invalidate()
+        answer_cache.invalidate()
+    return report
+
+
+def export_questions(session_factory: Callable[[], Session], stmt, fmt: BulkFormat) -> Iterator[str]:
+    """
+    Streams the rows of `stmt` (selecting the EXPORT_COLUMNS) as NDJSON or CSV text
+    from a server-side cursor, EXPORT_BATCH_SIZE rows at a time. Opens its own
+    session because a streaming response outlives the request's one.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+            for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+        else:
+            for rows in result.mappings().partitions():
+                yield "".join(json.dumps(dict(row)) + "\n" for row in rows)
+    finally:
+        db.close()
+
+
+def export_stmt():
+    return select(*(getattr(QuestionDB, c) for c in EXPORT_COLUMNS)).order_by(QuestionDB.id)
+
+
+def _format_for(path: str, fmt: str | None) -> BulkFormat:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def main(argv: Iterable[str] | None = None):
+    import argparse
+    import sys
+    import time
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).resolve().parents[1] / ".env")  #before GameDatabase reads GAME_DATABASE_URL
+    from .GameDatabase import engine, SessionLocal
+    from .GameMigrations import run_migrations
+
+    parser = argparse.ArgumentParser(prog="python -m Game_Service.app.QuestionBulk", description="Bulk import/export of quiz questions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="load questions from an NDJSON or CSV file ('-' for stdin)")
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=["ndjson", "csv"])
+    imp.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    exp = sub.add_parser("export", help="write questions to an NDJSON or CSV file ('-' for stdout)")
+    exp.add_argument("path")
+    exp.add_argument("--format", choices=["ndjson", "csv"])
+    exp.add_argument("--category")
+    exp.add_argument("--difficulty")
+    args = parser.parse_args(argv)
+
+    run_migrations(engine)
+    fmt = _format_for(args.path, args.format)
+    started = time.perf_counter()
+
+    if args.command == "import":
+        file = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+        db = SessionLocal()
+        try:
+            report = import_questions(db, file, fmt, chunk_size=args.chunk_size)
+        finally:
+            db.close()
+            if file is not sys.stdin:
+                file.close()
+        elapsed = time.perf_counter() - started
+        for err in report["errors"]:
+            print(f"line {err['line']}: {err['error']}", file=sys.stderr)
+        print(
+            f"received {report['received']}, inserted {report['inserted']}, duplicates {report['duplicates']}, "
+            f"rejected {report['rejected']} in {elapsed:.1f}s",
+            file=sys.stderr,
+        )
+        return 1 if report["rejected"] else 0
+
+    stmt = export_stmt()
+    if args.category:
+        stmt = stmt.where(QuestionDB.category == args.category)
+    if args.difficulty:
+        stmt = stmt.where(QuestionDB.difficulty == args.difficulty)
+    out = sys.stdout if args.path == "-" else open(args.path, "w", encoding="utf-8", newline="")
+    try:
+        for chunk in export_questions(SessionLocal, stmt, fmt):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
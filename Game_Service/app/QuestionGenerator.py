@@ -1,7 +1,9 @@
 import os 
-from typing import Literal # used for the set of allowed strings for difficulty 
+import threading
+from typing import Literal, Optional # used for the set of allowed strings for difficulty 
 from pydantic import BaseModel, Field 
-from openai import OpenAI
+from openai import AsyncOpenAI
+import httpx
 
 Difficulty = Literal["easy", "medium", "hard"] #avoids other entries for difficulty 
 
@@ -16,52 +18,91 @@ class GeneratedQuestion(BaseModel):
 class GeneratedQuestionSet(BaseModel):
     questions: list[GeneratedQuestion]
 
-#function for generating the questions
-#* forces keyword-only arguments meaning it must be caled like (category="Math", difficulty = "hard", count=20). It avoids accidental mix-ups 
-#it tghen returns a list of generated questions 
-def generate_questions(*, category: str, difficulty: Difficulty, count: int = 8) -> list[GeneratedQuestion]:
+#one client per process instead of one per call, so the HTTP connection pool (and TLS sessions) get reused
+_async_client: Optional[AsyncOpenAI] = None
+_client_lock = threading.Lock()
+
+
+def _http_limits() -> httpx.Limits:
+    #how many LLM calls a single worker can have in flight at once
+    max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+
+OPENAI_MAX_RETRIES = 2  #the SDK's default, passed explicitly so worst_case_call_seconds stays true
+OPENAI_MAX_RETRY_DELAY = 8.0  #the SDK's cap on the backoff between retries
+
+
+def _timeout_seconds() -> float:
+    return float(os.getenv("OPENAI_TIMEOUT_SECONDS", "120"))
+
+
+def _http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(_timeout_seconds(), connect=10.0)
+
+
+def worst_case_call_seconds() -> float:
+    #longest one generation call can take: every attempt timing out, plus the backoff in between
+    return _timeout_seconds() * (OPENAI_MAX_RETRIES + 1) + OPENAI_MAX_RETRY_DELAY * OPENAI_MAX_RETRIES
+
 
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncOpenAI(http_client=httpx.AsyncClient(limits=_http_limits(), timeout=_http_timeout()), max_retries=OPENAI_MAX_RETRIES)
+        return _async_client
+
+
+async def close_clients():
+    #called from the lifespan on shutdown so pooled connections are closed cleanly
+    global _async_client
+    with _client_lock:
+        client, _async_client = _async_client, None
+    if client is not None:
+        await client.close()
+
+
+#writing the prompts:
+#system prompt is my rules that the model has to follow 
+#the user prompt is the specific requests for this call 
+SYSTEM_PROMPT = (
+    "You generate trivia questions for a numeric-ordering (timeline/number) quiz game.\n"
+    "You MUST return exactly the requested number of items.\n"
+    "\n"
+    "Hard rules:\n"
+    "- Each item must have: question (string), answer (integer), category (string), difficulty (easy/medium/hard).\n"
+    "- answer MUST be a single whole number integer >= 0 (no decimals, no ranges, no lists).\n"
+    "- Do NOT use approximations: no 'about', 'around', 'circa', '~', 'est.', or 'approximately'.\n"
+    "- The question text MUST explicitly state what the number represents AND its unit "
+    "e.g. 'In what year...', 'How many minutes...', 'How many kilometers...', 'How many people...'.\n"
+    "- Answers must be unambiguous and based on widely accepted facts.\n"
+    "- Avoid controversy, sensitive topics, or ambiguous figures.\n"
+    "- Avoid duplicates: no repeated question prompts AND no repeated answers within the set.\n"
+    "\n"
+    "Content rules:\n"
+    "- Mix year-based questions and other numeric facts. Ensure non-year questions include clear units.\n"
+    "- Keep questions suitable for general audiences.\n"
+    "\n"
+    "If you cannot produce enough compliant items, regenerate internally until you can."
+)
+
+
+def _request_kwargs(category: str, difficulty: Difficulty, count: int) -> dict:
     #choosing which model to use
     model = os.getenv("OPENAI_MODEL", "gpt-5-mini")
-    client = OpenAI()
-
-    #writing the prompts:
-    #system prompt is my rules that the model has to follow 
-    #the user prompt is the specific requests for this call 
-    system = (
-        "You generate trivia questions for a numeric-ordering (timeline/number) quiz game.\n"
-        "You MUST return exactly the requested number of items.\n"
-        "\n"
-        "Hard rules:\n"
-        "- Each item must have: question (string), answer (integer), category (string), difficulty (easy/medium/hard).\n"
-        "- answer MUST be a single whole number integer >= 0 (no decimals, no ranges, no lists).\n"
-        "- Do NOT use approximations: no 'about', 'around', 'circa', '~', 'est.', or 'approximately'.\n"
-        "- The question text MUST explicitly state what the number represents AND its unit "
-        "e.g. 'In what year...', 'How many minutes...', 'How many kilometers...', 'How many people...'.\n"
-        "- Answers must be unambiguous and based on widely accepted facts.\n"
-        "- Avoid controversy, sensitive topics, or ambiguous figures.\n"
-        "- Avoid duplicates: no repeated question prompts AND no repeated answers within the set.\n"
-        "\n"
-        "Content rules:\n"
-        "- Mix year-based questions and other numeric facts. Ensure non-year questions include clear units.\n"
-        "- Keep questions suitable for general audiences.\n"
-        "\n"
-        "If you cannot produce enough compliant items, regenerate internally until you can."
-    )
-
     user = (
         f"Category: {category}\n"
         f"Difficulty: {difficulty}\n"
         f"Count: {count}\n"
         "Return exactly Count items that strictly match the provided output schema."
     )
-
     #the code below is following the exact template form teh offical OpenAI reccomendations for validating the propmts response
-    #sends the request to teh model and tells teh SDK to only accept an output that matches the schema above 
-    resp = client.responses.parse(
+    #tells teh SDK to only accept an output that matches the schema above 
+    return dict(
         model=model,
         input=[
-            {"role": "system", "content": system},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user},
         ],
         #the schema I want it to follow 
@@ -70,8 +111,8 @@ def generate_questions(*, category: str, difficulty: Difficulty, count: int = 8)
         store=False,
     )
 
-    parsed: GeneratedQuestionSet = resp.output_parsed
 
+def _clean_output(parsed: GeneratedQuestionSet, category: str, difficulty: Difficulty, count: int) -> list[GeneratedQuestion]:
     #checks that teh exact amount of questions were generated 
     if len(parsed.questions) != count:
         raise ValueError(f"Expected {count} questions, got {len(parsed.questions)}")
@@ -88,3 +129,12 @@ def generate_questions(*, category: str, difficulty: Difficulty, count: int = 8)
             )
         )
     return out
+
+
+#function for generating the questions
+#* forces keyword-only arguments meaning it must be caled like (category="Math", difficulty = "hard", count=20). It avoids accidental mix-ups 
+#it tghen returns a list of generated questions 
+async def generate_questions_async(*, category: str, difficulty: Difficulty, count: int = 8) -> list[GeneratedQuestion]:
+    #awaits the model, so routes don't hold a threadpool slot for the whole round trip
+    resp = await get_async_client().responses.parse(**_request_kwargs(category, difficulty, count))
+    return _clean_output(resp.output_parsed, category, difficulty, count)
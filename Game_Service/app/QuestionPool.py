@@ -0,0 +1,195 @@
+# Game_Service/app/QuestionPool.py
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, func
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Optional
+import asyncio
+import os
+import threading
+import traceback
+
+from .GameDatabase import SessionLocal
+from .GameModels import QuestionPoolSetDB, PooledQuestionDB
+
+POOL_SET_SIZE = 8  #same number of questions start_game hands out
+
+
+def pool_low_water() -> int:
+    #how many ready sets we try to keep per (category, difficulty), 0 turns the refiller off
+    return max(0, int(os.getenv("QUESTION_POOL_LOW_WATER", "2")))
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters for the pool. Hits/misses are counted per (category, difficulty)
+    so we can see which keys are worth keeping warm.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits: dict[tuple[str, str], int] = {}
+        self.misses: dict[tuple[str, str], int] = {}
+        self.sets_refilled = 0
+        self.refill_failures = 0
+
+    def record_hit(self, key: tuple[str, str]):
+        with self._lock:
+            self.hits[key] = self.hits.get(key, 0) + 1
+
+    def record_miss(self, key: tuple[str, str]):
+        with self._lock:
+            self.misses[key] = self.misses.get(key, 0) + 1
+
+    def record_refill(self, sets_added: int, failed: bool = False):
+        with self._lock:
+            self.sets_refilled += sets_added
+            if failed:
+                self.refill_failures += 1
+
+    def reset(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+            self.sets_refilled = 0
+            self.refill_failures = 0
+
+
+pool_metrics = PoolMetrics()
+
+#keys currently being refilled in this process, so a burst of starts only triggers one refill per key
+_refilling: set[tuple[str, str]] = set()
+_refilling_lock = threading.Lock()
+
+
+def pool_depth(db: Session, category: str, difficulty: str) -> int:
+    stmt = (
+        select(func.count())
+        .select_from(QuestionPoolSetDB)
+        .where(QuestionPoolSetDB.category == category)
+        .where(QuestionPoolSetDB.difficulty == difficulty)
+    )
+    return db.execute(stmt).scalar_one()
+
+
+def take_pool_set(db: Session, category: str, difficulty: str) -> Optional[list[SimpleNamespace]]:
+    """
+    Claims the oldest ready set for (category, difficulty) and deletes it from the pool.
+    Does NOT commit - the caller commits together with the session rows so the take and
+    the insert happen in one transaction. Returns None when the pool is empty.
+    """
+    key = (category, difficulty)
+    stmt = (
+        select(QuestionPoolSetDB)
+        .where(QuestionPoolSetDB.category == category)
+        .where(QuestionPoolSetDB.difficulty == difficulty)
+        .order_by(QuestionPoolSetDB.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)  #Postgres: concurrent starts never grab the same set (ignored on SQLite)
+        .options(selectinload(QuestionPoolSetDB.questions))
+    )
+    pool_set = db.execute(stmt).scalars().first()
+    if not pool_set:
+        pool_metrics.record_miss(key)
+        return None
+
+    #copy out before deleting, the ORM objects are gone after the delete is flushed
+    questions = [
+        SimpleNamespace(question=q.question, answer=q.answer, category=q.category, difficulty=q.difficulty)
+        for q in pool_set.questions
+    ]
+    db.delete(pool_set)
+    pool_metrics.record_hit(key)
+    return questions
+
+
+def add_pool_set(db: Session, category: str, difficulty: str, generated) -> QuestionPoolSetDB:
+    pool_set = QuestionPoolSetDB(category=category, difficulty=difficulty)
+    for q in generated:
+        pool_set.questions.append(
+            PooledQuestionDB(question=q.question, answer=q.answer, category=q.category, difficulty=q.difficulty)
+        )
+    db.add(pool_set)
+    return pool_set
+
+
+def _add_and_commit(db: Session, category: str, difficulty: str, generated):
+    add_pool_set(db, category, difficulty, generated)
+    db.commit()  #commit per set so a later failure doesn't throw away finished sets
+
+
+async def refill_pool(category: str, difficulty: str, generate: Callable[..., Awaitable]) -> int:
+    """
+    Tops the pool for (category, difficulty) back up to the low-water mark.
+    Meant to run as a background task after a game start; `generate` is the async
+    question generator to use (passed in so callers/tests control it).
+    The missing sets are generated concurrently. Returns the number of sets added.
+    """
+    target = pool_low_water()
+    if target == 0:
+        return 0
+
+    key = (category, difficulty)
+    with _refilling_lock:
+        if key in _refilling:
+            return 0
+        _refilling.add(key)
+
+    added = 0
+    failed = False
+    db = SessionLocal()
+    try:
+        missing = target - await run_in_threadpool(pool_depth, db, category, difficulty)
+        #end the read transaction so no connection is held while the model is working
+        await run_in_threadpool(db.rollback)
+        if missing > 0:
+            results = await asyncio.gather(
+                *(generate(category=category, difficulty=difficulty, count=POOL_SET_SIZE) for _ in range(missing)),
+                return_exceptions=True,
+            )
+            for generated in results:
+                if isinstance(generated, BaseException):
+                    failed = True
+                    traceback.print_exception(generated)
+                    continue
+                await run_in_threadpool(_add_and_commit, db, category, difficulty, generated)
+                added += 1
+    except Exception:
+        failed = True
+        await run_in_threadpool(db.rollback)
+        traceback.print_exc()
+    finally:
+        pool_metrics.record_refill(added, failed=failed)
+        db.close()
+        with _refilling_lock:
+            _refilling.discard(key)
+    return added
+
+
+def pool_stats(db: Session) -> dict:
+    rows = db.execute(
+        select(QuestionPoolSetDB.category, QuestionPoolSetDB.difficulty, func.count())
+        .group_by(QuestionPoolSetDB.category, QuestionPoolSetDB.difficulty)
+    ).all()
+    depths = {(r[0], r[1]): r[2] for r in rows}
+
+    keys = set(depths) | set(pool_metrics.hits) | set(pool_metrics.misses)
+    entries = [
+        {
+            "category": category,
+            "difficulty": difficulty,
+            "depth": depths.get((category, difficulty), 0),
+            "hits": pool_metrics.hits.get((category, difficulty), 0),
+            "misses": pool_metrics.misses.get((category, difficulty), 0),
+        }
+        for category, difficulty in sorted(keys)
+    ]
+    return {
+        "low_water": pool_low_water(),
+        "total_depth": sum(depths.values()),
+        "total_hits": sum(pool_metrics.hits.values()),
+        "total_misses": sum(pool_metrics.misses.values()),
+        "sets_refilled": pool_metrics.sets_refilled,
+        "refill_failures": pool_metrics.refill_failures,
+        "keys": entries,
+    }
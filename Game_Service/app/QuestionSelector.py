@@ -0,0 +1,188 @@
+# Game_Service/app/QuestionSelector.py
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional
+import os
+import random
+import threading
+import time
+import traceback
+
+from .GameModels import QuestionDB
+
+
+def index_ttl_seconds() -> float:
+    #other workers add to the bank too, so an index is rebuilt from the DB after this long
+    return float(os.getenv("ANSWER_INDEX_TTL_SECONDS", "300"))
+
+
+class AnswerIndex:
+    """
+    Bank questions for one (category, difficulty), sorted by (answer, id) in two flat
+    int64 arrays. `starts` holds the position where each distinct answer begins, so
+    picking from the i-th distinct answer is two array lookups. add() and select()
+    share a lock, so a pick never sees the arrays half way through an insert.
+    """
+
+    def __init__(self, pairs: Iterable[tuple[int, int]]):
+        self._lock = threading.Lock()
+        ordered = sorted(pairs)
+        self.answers = array("q", (answer for answer, _ in ordered))
+        self.ids = array("q", (question_id for _, question_id in ordered))
+        self.built_at = time.monotonic()
+        self._rebuild_starts()
+
+    def _rebuild_starts(self):
+        starts = array("q")
+        previous = None
+        for position, answer in enumerate(self.answers):
+            if answer != previous:
+                starts.append(position)
+                previous = answer
+        self.starts = starts
+
+    @property
+    def distinct_answers(self) -> int:
+        return len(self.starts)
+
+    def add(self, question_id: int, answer: int):
+        with self._lock:
+            self._insert(question_id, answer)
+
+    def _insert(self, question_id: int, answer: int):
+        position = bisect_right(self.answers, answer)
+        if position > 0 and self.answers[position - 1] == answer:
+            #already have this answer, just another question for it - starts stay the same
+            self.answers.insert(position, answer)
+            self.ids.insert(position, question_id)
+            first_after = bisect_right(self.starts, position - 1)
+            for i in range(first_after, len(self.starts)):
+                self.starts[i] += 1
+            return
+        self.answers.insert(position, answer)
+        self.ids.insert(position, question_id)
+        slot = bisect_left(self.starts, position)
+        for i in range(slot, len(self.starts)):
+            self.starts[i] += 1
+        self.starts.insert(slot, position)
+
+    def select(self, count: int, rng: random.Random = random) -> Optional[list[int]]:
+        """
+        Picks `count` question ids with distinct answers spread over the whole answer range:
+        the distinct answers are split into `count` equal strata (by rank) and one answer is
+        drawn from each, then one question for that answer. No ties, no duplicate ids,
+        O(count) work. Returns None if there aren't enough distinct answers.
+        """
+        with self._lock:
+            distinct = len(self.starts)
+            if count <= 0 or distinct < count:
+                return None
+
+            chosen: list[int] = []
+            for stratum in range(count):
+                low = stratum * distinct // count
+                high = (stratum + 1) * distinct // count
+                k = rng.randrange(low, high)
+                first = self.starts[k]
+                last = self.starts[k + 1] if k + 1 < distinct else len(self.answers)
+                chosen.append(self.ids[rng.randrange(first, last)])
+            return chosen
+
+
+class AnswerIndexCache:
+    """
+    One AnswerIndex per (category, difficulty), built from the bank on first use.
+    Once an index is older than the TTL it keeps being served while a background
+    thread rebuilds it, so only the very first request for a key waits on the load.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes: dict[tuple[str, str], AnswerIndex] = {}
+        self._refreshing: set[tuple[str, str]] = set()
+        self._generation = 0  #bumped by invalidate(), a rebuild started before it is thrown away
+
+    def get(self, db: Session, category: str, difficulty: str) -> AnswerIndex:
+        key = (category, difficulty)
+        with self._lock:
+            index = self._indexes.get(key)
+            generation = self._generation
+            stale = index is not None and time.monotonic() - index.built_at >= index_ttl_seconds()
+            refresh = stale and key not in self._refreshing
+            if refresh:
+                self._refreshing.add(key)
+        if refresh:
+            threading.Thread(target=self._refresh, args=(db.get_bind(), key, generation), daemon=True).start()
+        if index is not None:
+            return index
+
+        index = _load_index(db, category, difficulty)
+        self._store(key, index, generation)
+        return index
+
+    def _refresh(self, bind, key: tuple[str, str], generation: int):
+        #runs in its own thread and session, the request that noticed the stale index has moved on.
+        #a question added while this loads may be missing until the next rebuild, select_spread_set copes with that
+        try:
+            with Session(bind=bind) as db:
+                self._store(key, _load_index(db, *key), generation)
+        except Exception:
+            traceback.print_exc()  #keep serving the old index, the next get() after the TTL tries again
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key: tuple[str, str], index: AnswerIndex, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._indexes[key] = index
+
+    def add(self, rows: Iterable[QuestionDB]):
+        #keeps already-built indexes in step with bank inserts made by this process
+        with self._lock:
+            for row in rows:
+                index = self._indexes.get((row.category, row.difficulty))
+                if index is not None:
+                    index.add(row.id, row.answer)
+
+    def invalidate(self, category: Optional[str] = None, difficulty: Optional[str] = None):
+        with self._lock:
+            self._generation += 1
+            if category is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop((category, difficulty), None)
+
+
+def _load_index(db: Session, category: str, difficulty: str) -> AnswerIndex:
+    rows = db.execute(
+        select(QuestionDB.answer, QuestionDB.id)
+        .where(QuestionDB.category == category)
+        .where(QuestionDB.difficulty == difficulty)
+        .where(QuestionDB.question_key.is_not(None))
+    ).all()
+    return AnswerIndex((r[0], r[1]) for r in rows)
+
+
+answer_indexes = AnswerIndexCache()
+
+
+def select_spread_set(db: Session, category: str, difficulty: str, count: int, min_distinct: int = 0) -> Optional[list[QuestionDB]]:
+    """
+    Builds a `count`-question set from the bank with well spread, distinct answers.
+    Returns None if the bank has fewer than max(count, min_distinct) distinct answers.
+    The rows come back sorted by nothing in particular - the client shuffles the deck anyway.
+    """
+    for _ in range(2):
+        index = answer_indexes.get(db, category, difficulty)
+        if index.distinct_answers < max(count, min_distinct):
+            return None
+        ids = index.select(count)
+        rows = list(db.execute(select(QuestionDB).where(QuestionDB.id.in_(ids))).scalars())
+        if len(rows) == count:
+            return rows
+        #something was deleted/edited behind the index's back, rebuild and try once more
+        answer_indexes.invalidate(category, difficulty)
+    return None
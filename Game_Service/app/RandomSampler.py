@@ -0,0 +1,20 @@
+# Game_Service/app/RandomSampler.py
+from sqlalchemy.orm import Session
+from sqlalchemy import Select
+from typing import Optional
+import random
+
+
+def pick_random(db: Session, stmt: Select, random_key, rng: random.Random = random) -> Optional[object]:
+    """
+    Returns one random row from `stmt` (already filtered) without ORDER BY random().
+    Every row carries a uniform random_key; we draw r and take the first row with
+    key >= r, wrapping around to the smallest key if r landed past the last one.
+    With an index on (filter columns..., random_key) each probe is a single index
+    seek, so the cost stays O(log n) however big the table gets.
+    """
+    r = rng.random()
+    row = db.execute(stmt.where(random_key >= r).order_by(random_key).limit(1)).scalars().first()
+    if row is None:
+        row = db.execute(stmt.where(random_key < r).order_by(random_key).limit(1)).scalars().first()
+    return row
@@ -0,0 +1,215 @@
+# Game_Service/app/Retention.py
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import os
+import threading
+import time
+
+from .GameDatabase import SessionLocal
+from .GameModels import QuestionDB, GameSessionDB, GameSessionQuestionDB
+from .GameSchemas import RetentionRunResponse, RetentionStats
+from .DailyMode import verify_daily_job_token
+from .QuestionBank import question_key
+from .QuestionSelector import answer_indexes
+from .AnswerCache import answer_cache, session_key
+
+router = APIRouter(prefix="/api/retention", tags=["retention"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def retention_days() -> float:
+    #sessions idle for longer than this (and the question rows/links they left behind) are cleaned up
+    return float(os.getenv("RETENTION_DAYS", "7"))
+
+
+def retention_batch_size() -> int:
+    return max(1, int(os.getenv("RETENTION_BATCH_SIZE", "500")))
+
+
+def retention_max_seconds() -> float:
+    #time budget for one run, whatever is left over is picked up by the next one
+    return float(os.getenv("RETENTION_MAX_SECONDS", "20"))
+
+
+def retention_pause_seconds() -> float:
+    #gap between batches so the cleanup never hogs the database
+    return float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.05"))
+
+
+class RetentionMetrics:
+    #running totals since the process started, shown by /api/retention/stats
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record_run(self, counts: dict, complete: bool):
+        with self._lock:
+            self.runs += 1
+            for name in self.totals:
+                self.totals[name] += counts.get(name, 0)
+            self.last_run_at = datetime.now(timezone.utc)
+            self.last_run_complete = complete
+
+    def reset(self):
+        with self._lock:
+            self.runs = 0
+            self.totals = {"questions_deleted": 0, "questions_archived": 0, "sessions_deleted": 0, "session_links_deleted": 0}
+            self.last_run_at: Optional[datetime] = None
+            self.last_run_complete: Optional[bool] = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "retention_days": retention_days(),
+                "runs": self.runs,
+                **self.totals,
+                "last_run_at": self.last_run_at,
+                "last_run_complete": self.last_run_complete,
+            }
+
+
+retention_metrics = RetentionMetrics()
+
+
+def purge_legacy_questions(db: Session, cutoff: datetime, batch_size: int, archive: bool = False) -> dict:
+    """
+    One batch of the per-session question copies made before the shared bank
+    (QuestionDB rows with game_session_id set). Deleted by default; with archive=True
+    a copy whose question isn't in the bank yet becomes a bank question instead.
+    Commits. Returns the counts for this batch (all zero once nothing is left).
+    """
+    rows = db.execute(
+        select(QuestionDB.id, QuestionDB.question, QuestionDB.answer)
+        .where(QuestionDB.game_session_id.is_not(None))
+        .where(QuestionDB.created_at < cutoff)
+        .order_by(QuestionDB.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return {"questions_deleted": 0, "questions_archived": 0}
+
+    keep: dict[int, str] = {}
+    if archive:
+        keys = {row.id: question_key(row.question, row.answer) for row in rows}
+        seen = set(db.execute(select(QuestionDB.question_key).where(QuestionDB.question_key.in_(set(keys.values())))).scalars())
+        for question_id, key in keys.items():
+            if key not in seen:
+                keep[question_id] = key
+                seen.add(key)
+
+    try:
+        for question_id, key in keep.items():
+            db.execute(update(QuestionDB).where(QuestionDB.id == question_id).values(question_key=key, game_session_id=None))
+        drop = [row.id for row in rows if row.id not in keep]
+        if drop:
+            db.execute(delete(QuestionDB).where(QuestionDB.id.in_(drop)))
+        db.commit()
+    except IntegrityError:
+        #the same question was added to the bank meanwhile, just delete this batch
+        db.rollback()
+        return purge_legacy_questions(db, cutoff, batch_size, archive=False)
+
+    if keep:
+        answer_indexes.invalidate()
+    return {"questions_deleted": len(rows) - len(keep), "questions_archived": len(keep)}
+
+
+def purge_idle_sessions(db: Session, cutoff: datetime, batch_size: int) -> dict:
+    #one batch of game sessions untouched since the cutoff, with their question links. Commits.
+    session_ids = list(db.execute(
+        select(GameSessionDB.session_id)
+        .where(GameSessionDB.updated_at < cutoff)
+        .order_by(GameSessionDB.updated_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)  #a session mid-placement is skipped, not waited on
+    ).scalars())
+    if not session_ids:
+        return {"sessions_deleted": 0, "session_links_deleted": 0}
+
+    links = db.execute(delete(GameSessionQuestionDB).where(GameSessionQuestionDB.game_session_id.in_(session_ids))).rowcount
+    db.execute(delete(GameSessionDB).where(GameSessionDB.session_id.in_(session_ids)))
+    db.commit()
+    for session_id in session_ids:
+        answer_cache.invalidate(session_key(session_id))
+    return {"sessions_deleted": len(session_ids), "session_links_deleted": links}
+
+
+def purge_orphan_links(db: Session, cutoff: datetime, batch_size: int) -> dict:
+    #one batch of old question links whose session has no game_sessions row (games started before those existed). Commits.
+    link_ids = list(db.execute(
+        select(GameSessionQuestionDB.id)
+        .where(GameSessionQuestionDB.created_at < cutoff)
+        .where(GameSessionQuestionDB.game_session_id.not_in(select(GameSessionDB.session_id)))
+        .order_by(GameSessionQuestionDB.id)
+        .limit(batch_size)
+    ).scalars())
+    if not link_ids:
+        return {"session_links_deleted": 0}
+
+    db.execute(delete(GameSessionQuestionDB).where(GameSessionQuestionDB.id.in_(link_ids)))
+    db.commit()
+    return {"session_links_deleted": len(link_ids)}
+
+
+@router.post("/run", response_model=RetentionRunResponse)
+async def run_retention(
+    archive: bool = False,
+    older_than_days: Optional[float] = Query(default=None, gt=0),
+    batch_size: Optional[int] = Query(default=None, ge=1, le=10_000),
+    db: Session = Depends(get_db),
+    _auth: None = Depends(verify_daily_job_token),
+):
+    """
+    Cleans up what abandoned games leave behind, oldest first, in short batches:
+    legacy per-session question copies, idle game sessions and their question links.
+    Each batch is its own transaction and runs in the threadpool with a pause in
+    between, so the service keeps serving while it works. Stops when the time budget
+    runs out (complete=false) and carries on from there next run.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days or retention_days())
+    size = batch_size or retention_batch_size()
+    deadline = time.monotonic() + retention_max_seconds()
+    pause = retention_pause_seconds()
+
+    counts = {"questions_deleted": 0, "questions_archived": 0, "sessions_deleted": 0, "session_links_deleted": 0}
+    steps = [
+        lambda: purge_legacy_questions(db, cutoff, size, archive),
+        lambda: purge_idle_sessions(db, cutoff, size),
+        lambda: purge_orphan_links(db, cutoff, size),  #after sessions, so links of sessions deleted above are already gone
+    ]
+    batches = 0
+    complete = True
+    for step in steps:
+        while time.monotonic() < deadline:
+            result = await run_in_threadpool(step)
+            if not any(result.values()):
+                break
+            batches += 1
+            for name, value in result.items():
+                counts[name] += value
+            await asyncio.sleep(pause)
+        else:
+            complete = False
+            break
+
+    retention_metrics.record_run(counts, complete)
+    return {"cutoff": cutoff, **counts, "batches": batches, "complete": complete}
+
+
+@router.get("/stats", response_model=RetentionStats)
+def get_retention_stats():
+    return retention_metrics.stats()
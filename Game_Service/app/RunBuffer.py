@@ -0,0 +1,215 @@
+# Game_Service/app/RunBuffer.py
+"""
+Write-behind buffer for finished runs. With RUN_WRITE_BEHIND on, POST
+/api/users/{id}/runs only appends the payload here and answers 202; a background
+task started in the lifespan writes the buffer out with record_runs (one multi-row
+INSERT and one commit per batch) whenever RUN_BUFFER_MAX_BATCH runs are waiting or
+RUN_BUFFER_MAX_DELAY_SECONDS have passed, and once more on shutdown.
+
+Delivery is at-least-once: a batch is only taken off the buffer once its commit
+succeeded. When the database can't be reached the batch goes back to the front to
+retry; any other failure (a bad row) retries the batch one run at a time and drops,
+with a log line, only the runs that still fail, so one bad run can't hold up the
+rest. Each run keeps the time it was queued as its ended_at, so a flush after
+midnight still counts it in the day it was played. Runs still in memory
+when the process is killed outright (not a normal shutdown) are lost, which is
+bounded by the two thresholds above. When RUN_BUFFER_MAX_PENDING runs are already
+waiting, add() refuses and the endpoint writes the run straight away instead.
+"""
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import DataError, IntegrityError
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import asyncio
+import os
+import sys
+import threading
+import traceback
+
+from .GameRuns import record_runs
+
+
+def write_behind_enabled() -> bool:
+    return os.getenv("RUN_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+
+
+def run_buffer_max_batch() -> int:
+    return max(1, int(os.getenv("RUN_BUFFER_MAX_BATCH", "500")))
+
+
+def run_buffer_max_delay() -> float:
+    #longest a buffered run waits before it is written
+    return max(0.01, float(os.getenv("RUN_BUFFER_MAX_DELAY_SECONDS", "1")))
+
+
+def run_buffer_max_pending() -> int:
+    return max(1, int(os.getenv("RUN_BUFFER_MAX_PENDING", "20000")))
+
+
+SHUTDOWN_FLUSH_ATTEMPTS = 3
+RETRY_PAUSE_SECONDS = 1.0  #after a failed flush, so a database outage isn't hammered
+
+
+def _bad_data(error: Exception) -> bool:
+    #the runs themselves can't be written (a constraint, a bad value), so retrying the same batch would fail forever.
+    #anything else (connection lost, database down) is worth retrying later
+    return isinstance(error, (IntegrityError, DataError, TypeError, ValueError))
+
+
+class RunBuffer:
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()  #guards the pending list and counters, add() is called from the threadpool
+        self._flush_lock = threading.Lock()  #one flush at a time keeps the runs in arrival order
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pending: list[dict] = []
+            self.enqueued = 0
+            self.flushed = 0
+            self.batches = 0
+            self.failures = 0
+            self.dropped = 0
+            self.last_flush_at: Optional[datetime] = None
+            self.last_error: Optional[str] = None
+
+    def add(self, item: dict) -> bool:
+        #queues one run (user_id plus the GameRunCreate fields). False when the buffer is full.
+        item = {"ended_at": datetime.now(timezone.utc), **item}  #the run ended now, not whenever the flush gets to it
+        with self._lock:
+            if len(self._pending) >= run_buffer_max_pending():
+                return False
+            self._pending.append(item)
+            self.enqueued += 1
+            full = len(self._pending) >= run_buffer_max_batch()
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return True
+
+    def _write(self, batch: list[dict]):
+        #one batch in its own session and transaction
+        db = self._session_factory()
+        try:
+            record_runs(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _note_failure(self, error: Exception, requeue: list[dict]):
+        #requeue goes back to the front of the buffer, in order
+        with self._lock:
+            self._pending[:0] = requeue
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def flush_now(self) -> int:
+        """
+        Writes up to one batch and commits it. If the database is unreachable the
+        batch goes back to the front of the buffer and the error is raised. Any
+        other error retries the runs one by one and drops the ones that fail again.
+        Returns how many runs left the buffer (0 when nothing was waiting).
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[:run_buffer_max_batch()]
+                del self._pending[:len(batch)]
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+                written = len(batch)
+            except Exception as e:
+                if not _bad_data(e):
+                    self._note_failure(e, requeue=batch)
+                    raise
+                self._note_failure(e, requeue=[])
+                written = self._write_one_by_one(batch)
+            with self._lock:
+                self.flushed += written
+                self.batches += 1
+                self.last_flush_at = datetime.now(timezone.utc)
+            return len(batch)
+
+    def _write_one_by_one(self, batch: list[dict]) -> int:
+        #a batch that failed on its data: every run gets its own transaction, the bad ones are logged and dropped
+        written = 0
+        for i, run in enumerate(batch):
+            try:
+                self._write([run])
+                written += 1
+            except Exception as e:
+                if not _bad_data(e):
+                    with self._lock:
+                        self.flushed += written  #the ones already committed
+                    self._note_failure(e, requeue=batch[i:])
+                    raise
+                traceback.print_exc()
+                print(f"RunBuffer: dropped a run that can't be written: {run}", file=sys.stderr)
+                with self._lock:
+                    self.dropped += 1
+        return written
+
+    async def drain(self):
+        #flushes batch after batch until the buffer is empty
+        while await run_in_threadpool(self.flush_now):
+            pass
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=run_buffer_max_delay())
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.drain()
+            except Exception:
+                await asyncio.sleep(RETRY_PAUSE_SECONDS)  #the batch is back in the buffer, next round retries it
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        #stops the background task, then writes out whatever is left. Never raises, so shutdown carries on past a dead database
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._loop = None
+        for attempt in range(1, SHUTDOWN_FLUSH_ATTEMPTS + 1):
+            try:
+                await self.drain()
+                return
+            except Exception:
+                if attempt == SHUTDOWN_FLUSH_ATTEMPTS:
+                    traceback.print_exc()
+                    print(f"RunBuffer: gave up on the final flush, {self.stats()['pending']} runs not written", file=sys.stderr)
+                    return
+                await asyncio.sleep(RETRY_PAUSE_SECONDS)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "write_behind": write_behind_enabled(),
+                "pending": len(self._pending),
+                "enqueued": self.enqueued,
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "failures": self.failures,
+                "dropped": self.dropped,
+                "last_flush_at": self.last_flush_at,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,56 @@
+# Game_Service/app/SingleFlight.py
+from typing import Any, Awaitable, Callable, Hashable
+import asyncio
+import threading
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+    The first caller for a key starts the work as a task, anyone arriving while it
+    is still running awaits that same task instead of starting their own.
+    The task is shielded so a caller disconnecting doesn't cancel it for everyone else.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            self.calls += 1
+            task = self._in_flight.get(key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                self.executions += 1
+                task = asyncio.ensure_future(fn())
+                self._in_flight[key] = task
+                task.add_done_callback(lambda t, k=key: self._finished(k, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        #mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.executions = 0
+            self.coalesced = 0
@@ -0,0 +1,89 @@
+# Game_Service/benchmarks/bench_random_question.py
+"""
+Compares the old ORDER BY random() query behind /api/questions/random with the
+random_key index seek used now.
+
+    python Game_Service/benchmarks/bench_random_question.py --rows 1000000
+
+Builds a throwaway SQLite database (or uses --db-url) and prints the mean time
+per pick for each strategy, with and without a category/difficulty filter.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  #Game_Service/ as the import root, same as the tests
+
+from app.GameModels import Base, QuestionDB  # noqa: E402
+from app.RandomSampler import pick_random  # noqa: E402
+
+CATEGORIES = ["History", "Space", "Movies", "Football", "Music", "Science", "Geography", "Technology"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def seed(engine, rows: int, batch: int = 50_000):
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            conn.execute(
+                insert(QuestionDB),
+                [
+                    {
+                        "question": f"Benchmark question {i}",
+                        "answer": random.randrange(0, 3000),
+                        "category": CATEGORIES[i % len(CATEGORIES)],
+                        "difficulty": DIFFICULTIES[i % len(DIFFICULTIES)],
+                        "random_key": random.random(),
+                    }
+                    for i in range(start, min(start + batch, rows))
+                ],
+            )
+
+
+def time_it(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmp = None
+    url = args.db_url
+    if url is None:
+        tmp = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{tmp.name}/bench.db"
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    print(f"seeding {args.rows} rows...")
+    seed(engine, args.rows)
+    db = sessionmaker(bind=engine)()
+
+    unfiltered = select(QuestionDB)
+    filtered = select(QuestionDB).where(QuestionDB.category == "Space").where(QuestionDB.difficulty == "hard")
+
+    for label, stmt in [("no filter", unfiltered), ("category+difficulty", filtered)]:
+        old = time_it(lambda: db.execute(stmt.order_by(func.random()).limit(1)).scalars().first(), args.repeats)
+        new = time_it(lambda: pick_random(db, stmt, QuestionDB.random_key), args.repeats)
+        print(f"{label:>20}: ORDER BY random() {old:8.3f} ms   random_key seek {new:8.3f} ms   ({old / new:,.0f}x)")
+
+    db.close()
+    engine.dispose()
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 os.environ["DAILY_JOB_TOKEN"] = "test-token"
+os.environ["PLACEMENT_TOKEN_SECRET"] = "test-placement-secret"
 
 # Make Game_Service/ the import root so tests consistently use `app...`
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -17,6 +18,12 @@ if str(BASE_DIR) not in sys.path:
 
 import app.GameMain as game_main
 import app.DailyMode as daily_mode
+import app.GameSessions as game_sessions
+import app.Retention as retention
+import app.Leaderboard as leaderboard
+import app.QuestionPool as question_pool
+import app.QuestionSelector as question_selector
+import app.AnswerCache as answer_cache_module
 from app.GameMain import app
 from app.GameModels import Base
 
@@ -48,6 +55,16 @@ def override_get_db():
 def reset_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    question_pool.pool_metrics.reset()
+    game_main.generation_flight.reset()
+    question_selector.answer_indexes.invalidate()
+    answer_cache_module.answer_cache.reset()
+    retention.retention_metrics.reset()
+    leaderboard.leaderboard_snapshot.reset()
+    leaderboard.rank_index.reset()
+    game_main.run_buffer.reset()
+    daily_mode.today_cache.reset()
+    daily_mode.history_cache.reset()
     yield
 
 
@@ -65,10 +82,15 @@ def client():
     # Force both modules to use the same test session factory
     game_main.SessionLocal = TestingSessionLocal
     daily_mode.SessionLocal = TestingSessionLocal
+    question_pool.SessionLocal = TestingSessionLocal
+    game_sessions.SessionLocal = TestingSessionLocal
+    retention.SessionLocal = TestingSessionLocal
 
     # Override both dependency functions
     app.dependency_overrides[game_main.get_db] = override_get_db
     app.dependency_overrides[daily_mode.get_db] = override_get_db
+    app.dependency_overrides[game_sessions.get_db] = override_get_db
+    app.dependency_overrides[retention.get_db] = override_get_db
 
     with TestClient(app) as c:
         yield c
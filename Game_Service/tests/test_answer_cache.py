@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+from sqlalchemy import delete
+
+from app.AnswerCache import AnswerCache, AnswerSet, ENTRY_OVERHEAD_BYTES
+from app.GameModels import DailyQuestionDB, GameSessionQuestionDB, QuestionDB
+
+
+def test_answer_set_looks_up_by_id():
+    answers = AnswerSet([(30, 1999), (10, 1900), (20, 1950)], expires_at=0)
+    assert answers.get(10) == 1900
+    assert answers.get(30) == 1999
+    assert answers.get(15) is None
+    assert answers.nbytes == ENTRY_OVERHEAD_BYTES + 6 * 8
+
+
+def test_cache_evicts_least_recently_used_when_over_byte_cap(monkeypatch):
+    entry_bytes = ENTRY_OVERHEAD_BYTES + 16 * 8
+    monkeypatch.setenv("ANSWER_CACHE_MAX_BYTES", str(entry_bytes * 2))
+    cache = AnswerCache()
+    pairs = [(i, 1900 + i) for i in range(8)]
+
+    cache.put("session:a", pairs)
+    cache.put("session:b", pairs)
+    assert cache.get("session:a") is not None  # a is now most recently used
+    cache.put("session:c", pairs)
+
+    assert cache.get("session:b") is None
+    assert cache.get("session:a") is not None
+    assert cache.get("session:c") is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == entry_bytes * 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_cache_entries_expire_after_ttl(monkeypatch):
+    monkeypatch.setenv("ANSWER_CACHE_TTL_SECONDS", "0")
+    cache = AnswerCache()
+    cache.put("session:a", [(1, 1900)])
+    assert cache.get("session:a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_validate_placement_with_session_id_is_served_from_cache(client, db_session, monkeypatch):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return [
+            SimpleNamespace(question=f"Question {i}", answer=1900 + i, category=category, difficulty=difficulty)
+            for i in range(count)
+        ]
+
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
+    session = client.post("/api/game/start", json={"category": "History", "difficulty": "easy"}).json()
+    ids = [q["id"] for q in session["questions"]]
+
+    # remove the rows behind the cache's back - a DB lookup would now 404
+    db_session.execute(delete(GameSessionQuestionDB))
+    db_session.execute(delete(QuestionDB))
+    db_session.commit()
+
+    response = client.post(
+        "/api/game/validate-placement",
+        json={
+            "session_id": session["session_id"],
+            "placed_question_id": ids[1],
+            "left_neighbor_id": ids[0],
+            "right_neighbor_id": ids[2],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"correct": True, "placed_answer": 1901, "left_answer": 1900, "right_answer": 1902}
+    assert client.get("/api/game/answer-cache/stats").json()["hits"] == 1
+
+
+def test_validate_placement_cache_miss_loads_whole_session_once(client, create_question, db_session):
+    first = create_question(question="First", answer=10)
+    second = create_question(question="Second", answer=20)
+    for row_id in (first["id"], second["id"]):
+        db_session.get(QuestionDB, row_id).game_session_id = "legacy-session"
+    db_session.commit()
+
+    for _ in range(2):
+        response = client.post(
+            "/api/game/validate-placement",
+            json={"session_id": "legacy-session", "placed_question_id": second["id"], "left_neighbor_id": first["id"]},
+        )
+        assert response.json()["correct"] is True
+
+    stats = client.get("/api/game/answer-cache/stats").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+
+
+def test_validate_daily_with_challenge_date_uses_cache_filled_by_generate_today(client, db_session, monkeypatch):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return [
+            SimpleNamespace(question=f"Question {i}", answer=1900 + i, category=category, difficulty=difficulty)
+            for i in range(count)
+        ]
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake_generate_questions)
+    assert client.post("/api/daily/generate-today", headers={"X-Daily-Job-Token": "test-token"}).status_code == 200
+    today = client.get("/api/daily/today").json()
+    ids = [q["id"] for q in today["questions"]]
+
+    db_session.execute(delete(DailyQuestionDB))
+    db_session.commit()
+
+    response = client.post(
+        "/api/daily/validate-placement",
+        json={"challenge_date": today["challenge_date"], "placed_question_id": ids[0], "right_neighbor_id": ids[1]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["correct"] is True
@@ -1,3 +1,17 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, delete, event, select, update
+from sqlalchemy.orm import sessionmaker
+
+import app.DailyMode as daily_mode
+from app.GameModels import Base, DailyCategoryDB, DailyChallengeDB, DailyQuestionDB
+from conftest import TestingSessionLocal, engine
+
+
 def test_get_daily_today_404_when_missing(client):
     r = client.get("/api/daily/today")
     assert r.status_code == 404
@@ -11,7 +25,7 @@ def test_generate_today_creates_challenge_and_questions(client, monkeypatch):
             self.category = category
             self.difficulty = difficulty
 
-    def fake_generate_questions(*, category, difficulty, count):
+    async def fake_generate_questions(*, category, difficulty, count):
         return [
             FakeQuestion(
                 question=f"Question {i}",
@@ -22,7 +36,7 @@ def test_generate_today_creates_challenge_and_questions(client, monkeypatch):
             for i in range(count)
         ]
 
-    monkeypatch.setattr("app.DailyMode.generate_questions", fake_generate_questions)
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake_generate_questions)
 
     headers = {"X-Daily-Job-Token": "test-token"}
 
@@ -47,7 +61,7 @@ def test_generate_today_is_idempotent(client, monkeypatch):
             self.category = category
             self.difficulty = difficulty
 
-    def fake_generate_questions(*, category, difficulty, count):
+    async def fake_generate_questions(*, category, difficulty, count):
         return [
             FakeQuestion(
                 question=f"Question {i}",
@@ -58,7 +72,7 @@ def test_generate_today_is_idempotent(client, monkeypatch):
             for i in range(count)
         ]
 
-    monkeypatch.setattr("app.DailyMode.generate_questions", fake_generate_questions)
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake_generate_questions)
 
     headers = {"X-Daily-Job-Token": "test-token"}
 
@@ -72,10 +86,10 @@ def test_generate_today_is_idempotent(client, monkeypatch):
 
 
 def test_generate_today_marks_failed_on_generator_error(client, monkeypatch):
-    def fake_generate_questions(*, category, difficulty, count):
+    async def fake_generate_questions(*, category, difficulty, count):
         raise RuntimeError("OpenAI generation failed")
 
-    monkeypatch.setattr("app.DailyMode.generate_questions", fake_generate_questions)
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake_generate_questions)
 
     headers = {"X-Daily-Job-Token": "test-token"}
 
@@ -85,9 +99,6 @@ def test_generate_today_marks_failed_on_generator_error(client, monkeypatch):
 
     # -------- Legacy / History Endpoint Tests --------
 
-from datetime import date, timedelta
-from app.GameModels import DailyChallengeDB, DailyQuestionDB
-
 
 def _make_challenge(db, challenge_date, category="History", difficulty="easy", status="success"):
     """Helper: seed a DailyChallengeDB row directly."""
@@ -125,7 +136,7 @@ def test_list_past_challenges_returns_empty_when_no_history(client):
 
 
 def test_list_past_challenges_returns_only_successful_past_challenges(client, db_session):
-    today = date.today()
+    today = daily_mode.get_utc_today()
     yesterday = today - timedelta(days=1)
     two_days_ago = today - timedelta(days=2)
 
@@ -140,7 +151,7 @@ def test_list_past_challenges_returns_only_successful_past_challenges(client, db
 
 
 def test_list_past_challenges_excludes_today(client, db_session):
-    today = date.today()
+    today = daily_mode.get_utc_today()
     yesterday = today - timedelta(days=1)
 
     _make_challenge(db_session, today, status="success")
@@ -154,7 +165,7 @@ def test_list_past_challenges_excludes_today(client, db_session):
 
 
 def test_list_past_challenges_ordered_most_recent_first(client, db_session):
-    today = date.today()
+    today = daily_mode.get_utc_today()
     days = [today - timedelta(days=i) for i in range(1, 4)]
 
     for d in days:
@@ -168,7 +179,7 @@ def test_list_past_challenges_ordered_most_recent_first(client, db_session):
 
 
 def test_get_past_challenge_returns_questions_without_answers(client, db_session):
-    yesterday = date.today() - timedelta(days=1)
+    yesterday = daily_mode.get_utc_today() - timedelta(days=1)
     challenge = _make_challenge(db_session, yesterday)
 
     for i in range(3):
@@ -190,7 +201,7 @@ def test_get_past_challenge_returns_404_for_unknown_date(client):
 
 
 def test_get_past_challenge_returns_404_when_status_is_not_success(client, db_session):
-    yesterday = date.today() - timedelta(days=1)
+    yesterday = daily_mode.get_utc_today() - timedelta(days=1)
     _make_challenge(db_session, yesterday, status="failed")
 
     response = client.get(f"/api/daily/history/{yesterday}")
@@ -199,4 +210,459 @@ def test_get_past_challenge_returns_404_when_status_is_not_success(client, db_se
 
 def test_get_past_challenge_returns_422_for_invalid_date_format(client):
     response = client.get("/api/daily/history/not-a-date")
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_validate_daily_timeline_checks_order_in_one_request(client, db_session):
+    yesterday = daily_mode.get_utc_today() - timedelta(days=1)
+    challenge = _make_challenge(db_session, yesterday)
+    q0, q1, q2 = [_make_daily_question(db_session, challenge.id, index=i) for i in range(3)]
+
+    response = client.post("/api/daily/validate-timeline", json={"question_ids": [q0.id, q2.id, q1.id]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["correct"] is False
+    assert body["first_wrong_index"] == 1
+    assert [slot["answer"] for slot in body["slots"]] == [1900, 1902, 1901]
+
+    response = client.post(
+        "/api/daily/validate-timeline",
+        json={"question_ids": [q0.id, q1.id, q2.id], "challenge_date": str(yesterday)},
+    )
+    assert response.status_code == 200
+    assert response.json()["correct"] is True
+
+
+def test_validate_daily_timeline_404_for_question_from_other_day(client, db_session):
+    yesterday = daily_mode.get_utc_today() - timedelta(days=1)
+    challenge = _make_challenge(db_session, yesterday)
+    q0 = _make_daily_question(db_session, challenge.id, index=0)
+
+    response = client.post(
+        "/api/daily/validate-timeline",
+        json={"question_ids": [q0.id], "challenge_date": str(daily_mode.get_utc_today())},
+    )
+
+    assert response.status_code == 404
+
+
+def _generate_today(client, monkeypatch):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return [
+            SimpleNamespace(question=f"Question {i}", answer=1900 + i, category=category, difficulty=difficulty)
+            for i in range(count)
+        ]
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake_generate_questions)
+    r = client.post("/api/daily/generate-today", headers={"X-Daily-Job-Token": "test-token"})
+    assert r.status_code == 200
+
+
+def test_today_is_served_from_cache_with_etag_until_midnight(client, db_session, monkeypatch):
+    _generate_today(client, monkeypatch)
+
+    r1 = client.get("/api/daily/today")
+    assert r1.status_code == 200
+    etag = r1.headers["etag"]
+    assert etag.startswith('"daily-')
+    max_age = int(r1.headers["cache-control"].split("max-age=")[1])
+    assert 0 < max_age <= 24 * 60 * 60
+
+    #a second request doesn't need the database
+    db_session.execute(delete(DailyQuestionDB))
+    db_session.commit()
+    r2 = client.get("/api/daily/today")
+    assert r2.json() == r1.json()
+    assert daily_mode.today_cache.hits == 1
+
+    r3 = client.get("/api/daily/today", headers={"If-None-Match": etag})
+    assert r3.status_code == 304
+    assert r3.content == b""
+
+
+def test_today_cache_moves_on_at_midnight(client, monkeypatch):
+    _generate_today(client, monkeypatch)
+    assert client.get("/api/daily/today").status_code == 200
+
+    tomorrow = daily_mode.get_utc_today() + timedelta(days=1)
+    monkeypatch.setattr("app.DailyMode.get_utc_today", lambda: tomorrow)
+
+    assert client.get("/api/daily/today").status_code == 404
+
+
+def test_seconds_until_utc_midnight():
+    now = datetime(2026, 3, 1, 23, 59, 30, tzinfo=timezone.utc)
+    assert daily_mode.seconds_until_utc_midnight(now) == 30
+    assert daily_mode.seconds_until_utc_midnight(now.replace(hour=0, minute=0, second=0)) == 24 * 60 * 60
+
+
+JOB_HEADERS = {"X-Daily-Job-Token": "test-token"}
+
+
+def test_generate_upcoming_prepares_days_ahead_in_parallel(client, monkeypatch):
+    running = {"now": 0, "max": 0}
+
+    async def fake_generate_questions(*, category, difficulty, count):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return [
+            SimpleNamespace(question=f"{category} {i}", answer=1900 + i, category=category, difficulty=difficulty)
+            for i in range(count)
+        ]
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake_generate_questions)
+    monkeypatch.setenv("DAILY_GENERATE_CONCURRENCY", "2")
+
+    r = client.post("/api/daily/generate-upcoming?days=4", headers=JOB_HEADERS)
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 4 and body["failed"] == 0
+    assert [d["status"] for d in body["days"]] == ["success", "ready", "ready", "ready"]
+    assert len({d["category"] for d in body["days"]}) == 4
+    assert all(d["difficulty"] == daily_mode.difficulty_for_date(date.fromisoformat(d["challenge_date"])) for d in body["days"])
+    assert running["max"] == 2
+    assert client.get("/api/daily/today").status_code == 200
+
+    #a second run finds nothing missing
+    again = client.post("/api/daily/generate-upcoming?days=4", headers=JOB_HEADERS).json()
+    assert again["created"] == 0
+
+
+def test_ready_challenge_is_published_when_its_day_comes(client, db_session, monkeypatch):
+    _generate_today(client, monkeypatch)  #patches the generator
+    client.post("/api/daily/generate-upcoming?days=2", headers=JOB_HEADERS)
+    tomorrow = daily_mode.get_utc_today() + timedelta(days=1)
+    future_id = db_session.execute(
+        select(DailyQuestionDB.id).join(DailyChallengeDB).where(DailyChallengeDB.challenge_date == tomorrow)
+    ).scalars().first()
+
+    #not live yet: its answers can't be read through validation
+    r = client.post("/api/daily/validate-placement", json={"placed_question_id": future_id})
+    assert r.status_code == 404
+    r = client.post("/api/daily/validate-timeline", json={"question_ids": [future_id]})
+    assert r.status_code == 404
+
+    monkeypatch.setattr("app.DailyMode.get_utc_today", lambda: tomorrow)
+    r = client.get("/api/daily/today")
+    assert r.status_code == 200
+    assert r.json()["challenge_date"] == str(tomorrow)
+    assert client.post("/api/daily/validate-placement", json={"placed_question_id": future_id}).status_code == 200
+    assert client.post("/api/daily/validate-timeline", json={"question_ids": [future_id]}).status_code == 200
+
+
+def test_generate_upcoming_reports_failed_days(client, monkeypatch):
+    calls = []
+
+    async def flaky_generate(*, category, difficulty, count):
+        calls.append(category)
+        if len(calls) == 2:
+            raise RuntimeError("model timeout")
+        return [
+            SimpleNamespace(question=f"{category} {i}", answer=1900 + i, category=category, difficulty=difficulty)
+            for i in range(count)
+        ]
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", flaky_generate)
+    monkeypatch.setenv("DAILY_GENERATE_CONCURRENCY", "1")
+
+    body = client.post("/api/daily/generate-upcoming?days=3", headers=JOB_HEADERS).json()
+
+    assert body["created"] == 2 and body["failed"] == 1
+    statuses = [d["status"] for d in client.get("/api/daily/upcoming?days=4", headers=JOB_HEADERS).json()]
+    assert statuses == ["success", "failed", "ready", "missing"]
+
+
+def test_upcoming_requires_job_token(client):
+    assert client.get("/api/daily/upcoming").status_code == 401
+
+
+def _fake_questions(*, category, difficulty, count):
+    return [
+        SimpleNamespace(question=f"{category} {i}", answer=1900 + i, category=category, difficulty=difficulty)
+        for i in range(count)
+    ]
+
+
+def test_failed_today_is_retried_after_backoff(client, db_session, monkeypatch):
+    async def failing(**kwargs):
+        raise RuntimeError("model down")
+
+    async def working(**kwargs):
+        return _fake_questions(**kwargs)
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", failing)
+    assert client.post("/api/daily/generate-today", headers=JOB_HEADERS).status_code == 502
+
+    #still inside the backoff window
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", working)
+    r = client.post("/api/daily/generate-today", headers=JOB_HEADERS)
+    assert r.status_code == 409
+
+    monkeypatch.setenv("DAILY_RETRY_BASE_SECONDS", "0")
+    db_session.execute(update(DailyChallengeDB).values(next_attempt_at=None))
+    db_session.commit()
+    r = client.post("/api/daily/generate-today", headers=JOB_HEADERS)
+    assert r.status_code == 200 and r.json()["status"] == "created"
+
+    challenge = db_session.execute(select(DailyChallengeDB)).scalar_one()
+    db_session.refresh(challenge)
+    assert challenge.status == "success"
+    assert challenge.attempts == 2
+    assert challenge.last_latency_ms is not None
+    assert challenge.lease_until is None
+
+
+def test_recover_retries_failed_and_stale_rows_only(client, db_session, monkeypatch):
+    async def working(**kwargs):
+        return _fake_questions(**kwargs)
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", working)
+    today = daily_mode.get_utc_today()
+    now = datetime.now(timezone.utc)
+    rows = {
+        "failed": DailyChallengeDB(challenge_date=today, category="History", difficulty="easy", status="failed", attempts=1),
+        "stale": DailyChallengeDB(
+            challenge_date=today + timedelta(days=1), category="Space", difficulty="easy", status="pending",
+            attempts=1, lease_until=now - timedelta(minutes=1),
+        ),
+        "leased": DailyChallengeDB(
+            challenge_date=today + timedelta(days=2), category="Music", difficulty="easy", status="pending",
+            attempts=1, lease_until=now + timedelta(minutes=5),
+        ),
+        "backoff": DailyChallengeDB(
+            challenge_date=today + timedelta(days=3), category="Movies", difficulty="easy", status="failed",
+            attempts=2, next_attempt_at=now + timedelta(minutes=5),
+        ),
+        "exhausted": DailyChallengeDB(
+            challenge_date=today + timedelta(days=4), category="Football", difficulty="easy", status="failed", attempts=6,
+        ),
+    }
+    db_session.add_all(rows.values())
+    db_session.commit()
+
+    r = client.post("/api/daily/recover", headers=JOB_HEADERS)
+
+    assert r.status_code == 200
+    assert r.json() == {"attempted": 2, "recovered": 2, "failed": 0}
+    for row in rows.values():
+        db_session.refresh(row)
+    assert rows["failed"].status == "success"
+    assert rows["stale"].status == "ready"
+    assert rows["stale"].attempts == 2
+    assert [rows[name].status for name in ("leased", "backoff", "exhausted")] == ["pending", "failed", "failed"]
+
+
+def test_only_one_worker_gets_the_lease(db_session):
+    challenge = DailyChallengeDB(
+        challenge_date=daily_mode.get_utc_today(), category="History", difficulty="easy", status="failed", attempts=1,
+    )
+    db_session.add(challenge)
+    db_session.commit()
+
+    other = TestingSessionLocal()
+    try:
+        first = daily_mode._take_lease(db_session, challenge.id)
+        second = daily_mode._take_lease(other, challenge.id)
+    finally:
+        other.close()
+
+    assert first is not None and first.status == "pending"
+    assert second is None
+
+
+def _steal_lease(challenge_id):
+    #another worker sees the lease as expired and takes the row over
+    other = TestingSessionLocal()
+    try:
+        other.execute(
+            update(DailyChallengeDB)
+            .where(DailyChallengeDB.id == challenge_id)
+            .values(lease_until=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        other.commit()
+        assert daily_mode._take_lease(other, challenge_id) is not None
+    finally:
+        other.close()
+
+
+def test_worker_that_lost_its_lease_does_not_save(client, db_session, monkeypatch):
+    calls = []
+
+    async def fake(**kwargs):
+        calls.append(kwargs)
+        _steal_lease(challenge.id)  #taken over while the model call was running
+        return _fake_questions(**kwargs)
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake)
+    challenge = daily_mode._new_challenge(db_session, daily_mode.get_utc_today())
+
+    created, failed = asyncio.run(daily_mode._generate_all(db_session, [challenge], daily_mode.get_utc_today()))
+
+    assert (created, failed) == (0, 0) and len(calls) == 1
+    db_session.refresh(challenge)
+    assert challenge.status == "pending" and challenge.attempts == 2  #still the new owner's
+    assert challenge.questions == []
+
+
+def test_row_taken_over_while_queued_is_skipped(client, db_session, monkeypatch):
+    calls = []
+
+    async def fake(**kwargs):
+        calls.append(kwargs)
+        return _fake_questions(**kwargs)
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", fake)
+    challenge = daily_mode._new_challenge(db_session, daily_mode.get_utc_today())
+    _steal_lease(challenge.id)
+
+    assert asyncio.run(daily_mode._generate_all(db_session, [challenge], daily_mode.get_utc_today())) == (0, 0)
+    assert calls == []
+
+
+def test_lease_outlasts_the_worst_case_model_call(monkeypatch):
+    monkeypatch.delenv("DAILY_LEASE_SECONDS", raising=False)
+    monkeypatch.setenv("OPENAI_TIMEOUT_SECONDS", "120")
+    assert daily_mode.daily_lease_seconds() > 120 * 3
+
+
+def test_retry_delay_backs_off_exponentially(monkeypatch):
+    monkeypatch.setenv("DAILY_RETRY_BASE_SECONDS", "60")
+    monkeypatch.setenv("DAILY_RETRY_MAX_SECONDS", "600")
+    assert [daily_mode.retry_delay(n) for n in (1, 2, 3, 4, 5)] == [60, 120, 240, 480, 600]
+
+
+def test_categories_are_seeded_at_startup(client):
+    cats = client.get("/api/daily/categories").json()
+
+    assert len(cats) == 8
+    assert not any(c["is_used"] for c in cats)
+
+
+def test_rotation_hands_out_every_category_once_per_cycle(client, db_session):
+    names = [daily_mode.pick_unused_category(db_session) for _ in range(16)]
+
+    assert len(set(names[:8])) == 8
+    assert sorted(names[:8]) == sorted(names[8:])
+
+
+def test_new_category_joins_the_current_cycle(client, db_session):
+    used = {daily_mode.pick_unused_category(db_session) for _ in range(4)}
+    assert client.post("/api/daily/categories", json={"name": "Art"}).status_code == 201
+
+    rest = {daily_mode.pick_unused_category(db_session) for _ in range(5)}
+    assert "Art" in rest and not rest & used
+
+
+def test_losing_the_date_race_does_not_use_up_a_category(client, db_session):
+    today = daily_mode.get_utc_today()
+    _make_challenge(db_session, today)
+    before = {c.name: c.used_cycle for c in db_session.scalars(select(DailyCategoryDB))}
+
+    assert daily_mode._new_challenge(db_session, today) is None
+
+    db_session.expire_all()
+    assert {c.name: c.used_cycle for c in db_session.scalars(select(DailyCategoryDB))} == before
+
+
+def test_parallel_rotation_never_repeats_within_a_cycle(tmp_path):
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'rotation.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=file_engine)
+    Sessions = sessionmaker(bind=file_engine, expire_on_commit=False)
+    with Sessions() as db:
+        daily_mode.ensure_categories_seeded(db)
+
+    def pick(_):
+        with Sessions() as db:
+            picked = daily_mode._rotate_category(db, date(2026, 1, 1))
+            db.commit()
+            return picked
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            picks = list(pool.map(pick, range(40)))
+    finally:
+        file_engine.dispose()
+
+    assert len(set(picks)) == 40  #no (category, cycle) handed out twice
+    by_cycle = {}
+    for name, cycle in picks:
+        by_cycle.setdefault(cycle, set()).add(name)
+    assert sorted(by_cycle) == [1, 2, 3, 4, 5]
+    assert all(len(names) == 8 for names in by_cycle.values())
+
+
+def test_past_challenge_loads_in_one_query_and_is_memoized(client, db_session):
+    yesterday = daily_mode.get_utc_today() - timedelta(days=1)
+    challenge = _make_challenge(db_session, yesterday)
+    for i in (2, 0, 1):
+        _make_daily_question(db_session, challenge.id, index=i)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        first = client.get(f"/api/daily/history/{yesterday}")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert first.status_code == 200
+    assert len(statements) == 1  #challenge and questions in one round trip
+    assert [q["question"] for q in first.json()["questions"]] == ["Question 2", "Question 0", "Question 1"]  #id order
+    assert first.headers["cache-control"] == f"public, max-age={daily_mode.PAST_CHALLENGE_MAX_AGE}"
+
+    #past dates don't change, the second request is served from memory
+    db_session.execute(delete(DailyQuestionDB))
+    db_session.commit()
+    second = client.get(f"/api/daily/history/{yesterday}")
+    assert second.json() == first.json()
+    assert daily_mode.history_cache.hits == 1
+
+    assert client.get(f"/api/daily/history/{yesterday}", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+
+def test_today_through_history_is_not_memoized(client, db_session):
+    today = daily_mode.get_utc_today()
+    challenge = _make_challenge(db_session, today)
+    _make_daily_question(db_session, challenge.id)
+
+    assert client.get(f"/api/daily/history/{today}").status_code == 200
+    assert daily_mode.history_cache.misses == 0 and daily_mode.history_cache.hits == 0
+
+
+def test_cancelled_generation_is_marked_failed_not_saved(client, db_session, monkeypatch):
+    async def cancelled(**kwargs):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr("app.DailyMode.generate_questions_async", cancelled)
+    tomorrow = daily_mode.get_utc_today() + timedelta(days=1)
+    challenge = daily_mode._new_challenge(db_session, tomorrow)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(daily_mode._generate_all(db_session, [challenge], daily_mode.get_utc_today()))
+
+    db_session.refresh(challenge)
+    assert challenge.status == "failed"
+    assert challenge.questions == []
+
+
+def test_recovery_loop_logs_errors_and_keeps_going(monkeypatch, capsys):
+    calls = []
+
+    async def flaky(db):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        raise asyncio.CancelledError()  #stop the loop on the second round
+
+    monkeypatch.setenv("DAILY_RECOVERY_INTERVAL_SECONDS", "0.01")
+    monkeypatch.setattr("app.DailyMode.SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr("app.DailyMode.recover_challenges", flaky)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(daily_mode.recovery_loop())
+
+    assert len(calls) == 2
+    assert "database unavailable" in capsys.readouterr().err
@@ -1,3 +1,6 @@
+import json
+
+
 # ---------------- Health Check ---------------------
 def test_health(client):
     response = client.get("/health")
@@ -210,4 +213,43 @@ def test_delete_question_and_then_404(client, create_question):
 def test_delete_question_not_found(client):
     response = client.delete("/api/questions/9999")
     assert response.status_code == 404
-    assert response.json() == {"detail": "Question not found"}
\ No newline at end of file
+    assert response.json() == {"detail": "Question not found"}
+
+def test_list_questions_pages_with_keyset_cursor(client, create_question):
+    created = [create_question(question=f"Q{i}", answer=i, category="History", difficulty="easy") for i in range(5)]
+
+    response = client.get("/api/questions", params={"limit": 2})
+    assert response.status_code == 200
+    assert [q["id"] for q in response.json()] == [created[0]["id"], created[1]["id"]]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get("/api/questions", params={"limit": 2, "after_id": cursor})
+    assert [q["id"] for q in response.json()] == [created[2]["id"], created[3]["id"]]
+
+    response = client.get("/api/questions", params={"limit": 2, "after_id": response.headers["X-Next-Cursor"]})
+    assert [q["id"] for q in response.json()] == [created[4]["id"]]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_questions_filters_by_category_and_difficulty(client, create_question):
+    create_question(question="Old", answer=1900, category="History", difficulty="easy")
+    space = create_question(question="Moon", answer=1969, category="Space", difficulty="hard")
+    create_question(question="Mars", answer=1976, category="Space", difficulty="easy")
+
+    response = client.get("/api/questions", params={"category": "Space", "difficulty": "hard"})
+    assert response.json() == [space]
+
+
+def test_list_questions_rejects_limit_over_max(client):
+    response = client.get("/api/questions", params={"limit": 100_000})
+    assert response.status_code == 422
+
+
+def test_list_questions_streams_ndjson(client, create_question):
+    created = [create_question(question=f"Q{i}", answer=i, category="Music", difficulty="medium") for i in range(3)]
+
+    response = client.get("/api/questions", params={"format": "ndjson", "after_id": created[0]["id"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == created[1:]
@@ -0,0 +1,171 @@
+from types import SimpleNamespace
+
+from app.GameModels import GameRunDB
+
+
+def _start(client, monkeypatch, answers, **extra):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return [
+            SimpleNamespace(question=f"Question {i}", answer=answer, category=category, difficulty=difficulty)
+            for i, answer in enumerate(answers)
+        ]
+
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
+    response = client.post("/api/game/start", json={"category": "History", "difficulty": "easy", **extra})
+    assert response.status_code == 200
+    body = response.json()
+    # questions come back in generation order, so map answer -> id for readable tests
+    return body["session_id"], {answer: q["id"] for answer, q in zip(answers, body["questions"])}
+
+
+def _place(client, session_id, question_id, position):
+    return client.post(f"/api/game/sessions/{session_id}/place", json={"question_id": question_id, "position": position})
+
+
+def test_start_game_creates_session_state(client, monkeypatch):
+    session_id, _ = _start(client, monkeypatch, [1900, 1950, 2000], lives=2)
+
+    response = client.get(f"/api/game/sessions/{session_id}")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "session_id": session_id,
+        "status": "active",
+        "category": "History",
+        "difficulty": "easy",
+        "total_questions": 3,
+        "timeline": [],
+        "lives_remaining": 2,
+        "score": 0,
+        "streak": 0,
+        "best_streak": 0,
+        "run_id": None,
+    }
+
+
+def test_placements_update_state_and_finished_game_records_run(client, db_session, monkeypatch):
+    session_id, ids = _start(client, monkeypatch, [1900, 1950, 2000], user_id=42)
+
+    first = _place(client, session_id, ids[1950], 0).json()
+    assert first["correct"] is True
+    assert first["timeline"] == [ids[1950]]
+
+    second = _place(client, session_id, ids[1900], 0).json()
+    assert second["correct"] is True
+    assert second["right_answer"] == 1950
+    assert second["timeline"] == [ids[1900], ids[1950]]
+
+    last = _place(client, session_id, ids[2000], 2).json()
+    assert last["correct"] is True
+    assert last["status"] == "ended"
+    assert last["score"] == 3
+    assert last["best_streak"] == 3
+
+    run = db_session.get(GameRunDB, last["run_id"])
+    assert (run.user_id, run.score, run.streak, run.total_questions, run.category) == (42, 3, 3, 3, "History")
+    assert client.get("/api/users/42/stats").json()["games_played"] == 1
+
+
+def test_wrong_placement_costs_a_life_and_ends_game_at_zero(client, monkeypatch):
+    session_id, ids = _start(client, monkeypatch, [1900, 1950, 2000, 2020], lives=2, user_id=7)
+
+    _place(client, session_id, ids[1950], 0)
+    wrong = _place(client, session_id, ids[2000], 0).json()
+    assert wrong["correct"] is False
+    assert wrong["lives_remaining"] == 1
+    assert wrong["streak"] == 0
+    assert wrong["status"] == "active"
+    assert wrong["timeline"] == [ids[1950]]
+
+    ended = _place(client, session_id, ids[1900], 1).json()
+    assert ended["correct"] is False
+    assert ended["status"] == "ended"
+    assert ended["score"] == 1
+    assert ended["run_id"] is not None
+
+    response = _place(client, session_id, ids[2020], 1)
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Game session has ended"}
+
+
+def test_place_rejects_unknown_repeated_and_out_of_range_cards(client, monkeypatch, create_question):
+    session_id, ids = _start(client, monkeypatch, [1900, 1950, 2000])
+    outsider = create_question(question="Outsider", answer=1925, category="History", difficulty="easy")
+
+    assert _place(client, "missing-session", ids[1900], 0).status_code == 404
+    assert _place(client, session_id, outsider["id"], 0).status_code == 404
+    assert _place(client, session_id, ids[1900], 1).status_code == 422
+
+    _place(client, session_id, ids[1900], 0)
+    repeated = _place(client, session_id, ids[1900], 0)
+    assert repeated.status_code == 409
+    assert repeated.json() == {"detail": "Question has already been placed"}
+
+
+def test_anonymous_session_does_not_record_run(client, db_session, monkeypatch):
+    session_id, ids = _start(client, monkeypatch, [1900])
+
+    ended = _place(client, session_id, ids[1900], 0).json()
+
+    assert ended["status"] == "ended"
+    assert ended["run_id"] is None
+    assert db_session.query(GameRunDB).count() == 0
+
+
+def test_websocket_streams_placements_on_one_connection(client, db_session, monkeypatch):
+    session_id, ids = _start(client, monkeypatch, [1900, 1950, 2000], user_id=5)
+
+    with client.websocket_connect(f"/api/game/sessions/{session_id}/ws") as ws:
+        state = ws.receive_json()
+        assert state["type"] == "state"
+        assert state["timeline"] == []
+
+        ws.send_json({"question_id": ids[1950], "position": 0})
+        first = ws.receive_json()
+        assert first["type"] == "placement"
+        assert first["correct"] is True
+        assert first["timeline"] == [ids[1950]]
+
+        ws.send_json({"question_id": ids[1950], "position": 0})
+        error = ws.receive_json()
+        assert error == {"type": "error", "status": 409, "detail": "Question has already been placed"}
+
+        ws.send_json({"question_id": "nope"})
+        assert ws.receive_json()["status"] == 422
+
+        ws.send_text("not json")
+        assert ws.receive_json()["status"] == 422  #rejected, the connection stays open
+
+        ws.send_json({"question_id": ids[1900], "position": 0})
+        assert ws.receive_json()["timeline"] == [ids[1900], ids[1950]]
+
+        ws.send_json({"question_id": ids[2000], "position": 2})
+        last = ws.receive_json()
+        assert last["status"] == "ended"
+        assert last["score"] == 3
+
+    # state was persisted, not just kept on the socket
+    assert client.get(f"/api/game/sessions/{session_id}").json()["status"] == "ended"
+    assert db_session.query(GameRunDB).count() == 1
+
+
+def test_websocket_sees_placements_made_over_http(client, db_session, monkeypatch):
+    session_id, ids = _start(client, monkeypatch, [1900, 1950, 2000], user_id=5)
+
+    with client.websocket_connect(f"/api/game/sessions/{session_id}/ws") as ws:
+        ws.receive_json()
+        assert _place(client, session_id, ids[1950], 0).json()["timeline"] == [ids[1950]]
+
+        ws.send_json({"question_id": ids[2000], "position": 1})
+        placed = ws.receive_json()
+        assert placed["timeline"] == [ids[1950], ids[2000]]  #built on the HTTP drop, not the state loaded on connect
+        assert placed["score"] == 2
+
+        ws.send_json({"question_id": ids[1950], "position": 0})
+        assert ws.receive_json() == {"type": "error", "status": 409, "detail": "Question has already been placed"}
+
+
+def test_websocket_for_unknown_session_reports_error(client):
+    with client.websocket_connect("/api/game/sessions/missing/ws") as ws:
+        assert ws.receive_json() == {"type": "error", "status": 404, "detail": "Game session not found"}
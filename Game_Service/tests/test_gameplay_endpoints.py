@@ -2,7 +2,7 @@ from types import SimpleNamespace
 
 
 def test_start_game_creates_session_questions_and_hides_answers(client, monkeypatch):
-    def fake_generate_questions(*, category, difficulty, count):
+    async def fake_generate_questions(*, category, difficulty, count):
         return [
             SimpleNamespace(
                 question=f"Question {index}",
@@ -13,7 +13,7 @@ def test_start_game_creates_session_questions_and_hides_answers(client, monkeypa
             for index in range(count)
         ]
 
-    monkeypatch.setattr("app.GameMain.generate_questions", fake_generate_questions)
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
 
     response = client.post(
         "/api/game/start",
@@ -30,10 +30,10 @@ def test_start_game_creates_session_questions_and_hides_answers(client, monkeypa
 
 
 def test_start_game_returns_502_when_generation_fails(client, monkeypatch):
-    def fake_generate_questions(*, category, difficulty, count):
+    async def fake_generate_questions(*, category, difficulty, count):
         raise RuntimeError("OpenAI generation failed")
 
-    monkeypatch.setattr("app.GameMain.generate_questions", fake_generate_questions)
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
 
     response = client.post(
         "/api/game/start",
@@ -174,4 +174,75 @@ def test_validate_placement_with_both_neighbors_rejects_value_outside_range(clie
     )
 
     assert response.status_code == 200
-    assert response.json()["correct"] is False
\ No newline at end of file
+    assert response.json()["correct"] is False
+
+def _start_session(client, monkeypatch, answers):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return [
+            SimpleNamespace(question=f"Question {index}", answer=answer, category=category, difficulty=difficulty)
+            for index, answer in enumerate(answers)
+        ]
+
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
+    response = client.post("/api/game/start", json={"category": "History", "difficulty": "easy"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_validate_timeline_accepts_correct_order(client, monkeypatch):
+    session = _start_session(client, monkeypatch, [1900, 1950, 1950, 2000])
+    ids = [q["id"] for q in session["questions"]]
+
+    response = client.post(
+        "/api/game/validate-timeline",
+        json={"session_id": session["session_id"], "question_ids": ids},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["correct"] is True
+    assert body["first_wrong_index"] is None
+    assert [slot["answer"] for slot in body["slots"]] == [1900, 1950, 1950, 2000]
+    assert all(slot["correct"] for slot in body["slots"])
+
+
+def test_validate_timeline_reports_per_slot_results_and_first_wrong_index(client, monkeypatch):
+    session = _start_session(client, monkeypatch, [1900, 1950, 2000, 2020])
+    first, second, third, fourth = [q["id"] for q in session["questions"]]
+
+    response = client.post(
+        "/api/game/validate-timeline",
+        json={"session_id": session["session_id"], "question_ids": [first, third, second, fourth]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["correct"] is False
+    assert body["first_wrong_index"] == 1
+    assert [slot["correct"] for slot in body["slots"]] == [True, False, False, True]
+
+
+def test_validate_timeline_rejects_questions_from_another_session(client, monkeypatch, create_question):
+    session = _start_session(client, monkeypatch, [1900, 1950])
+    outsider = create_question(question="Outsider", answer=1925, category="History", difficulty="easy")
+
+    response = client.post(
+        "/api/game/validate-timeline",
+        json={"session_id": session["session_id"], "question_ids": [session["questions"][0]["id"], outsider["id"]]},
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": f"Question {outsider['id']} not found in this session"}
+
+
+def test_validate_timeline_rejects_duplicate_ids(client, monkeypatch):
+    session = _start_session(client, monkeypatch, [1900, 1950])
+    question_id = session["questions"][0]["id"]
+
+    response = client.post(
+        "/api/game/validate-timeline",
+        json={"session_id": session["session_id"], "question_ids": [question_id, question_id]},
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,126 @@
+import pytest
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.pool import StaticPool
+
+from app.GameMigrations import MIGRATIONS, run_migrations
+from app.GameModels import DailyQuestionDB, GameRunDB, QuestionDB, RunRollupDB
+
+LEGACY_SCHEMA = [
+    # the tables as the very first version of the service created them
+    """CREATE TABLE questions (id INTEGER NOT NULL PRIMARY KEY, question VARCHAR NOT NULL, answer INTEGER NOT NULL,
+       category VARCHAR NOT NULL, difficulty VARCHAR NOT NULL, game_session_id VARCHAR,
+       created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)""",
+    "CREATE INDEX ix_questions_category ON questions (category)",
+    """CREATE TABLE game_runs (id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL, score INTEGER NOT NULL,
+       streak INTEGER NOT NULL, total_questions INTEGER, category VARCHAR,
+       started_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, ended_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)""",
+    "CREATE INDEX ix_game_runs_user_id ON game_runs (user_id)",
+    """CREATE TABLE daily_categories (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL UNIQUE,
+       is_used BOOLEAN DEFAULT '0' NOT NULL, used_at DATE)""",
+    """CREATE TABLE daily_challenges (id INTEGER NOT NULL PRIMARY KEY, challenge_date DATE NOT NULL, category VARCHAR NOT NULL,
+       difficulty VARCHAR NOT NULL, status VARCHAR DEFAULT 'pending' NOT NULL, error_message VARCHAR,
+       generated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)""",
+    """CREATE TABLE daily_questions (id INTEGER NOT NULL PRIMARY KEY,
+       daily_challenge_id INTEGER NOT NULL REFERENCES daily_challenges (id), question VARCHAR NOT NULL,
+       answer INTEGER NOT NULL, category VARCHAR NOT NULL, difficulty VARCHAR NOT NULL,
+       created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)""",
+    "CREATE INDEX ix_daily_questions_daily_challenge_id ON daily_questions (daily_challenge_id)",
+]
+
+
+@pytest.fixture
+def fresh_engine():
+    engine = create_engine("sqlite+pysqlite:///:memory:", poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+
+def _indexes(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+def _plan(db, stmt) -> str:
+    sql = str(stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    return " | ".join(str(row[-1]) for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_fresh_database_gets_every_migration_once(fresh_engine):
+    assert run_migrations(fresh_engine) == [version for version, _, _ in MIGRATIONS]
+    assert run_migrations(fresh_engine) == []
+
+    assert "ix_game_runs_user_id_score" in _indexes(fresh_engine, "game_runs")
+    assert "ix_daily_questions_challenge_id_id" in _indexes(fresh_engine, "daily_questions")
+    assert "ix_questions_category_difficulty_random_key" in _indexes(fresh_engine, "questions")
+
+
+def test_legacy_database_is_brought_up_to_date(fresh_engine):
+    with fresh_engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO questions (question, answer, category, difficulty) VALUES ('Old', 1900, 'History', 'easy')"))
+        conn.execute(text("INSERT INTO daily_categories (name) VALUES ('Space')"))
+        conn.execute(text("INSERT INTO game_runs (user_id, score, streak) VALUES (5, 3, 1), (5, 7, 2)"))
+
+    run_migrations(fresh_engine)
+
+    columns = {c["name"] for c in inspect(fresh_engine).get_columns("questions")}
+    assert {"question_key", "random_key"} <= columns
+    with fresh_engine.connect() as conn:
+        key = conn.execute(text("SELECT random_key FROM questions")).scalar_one()
+        assert 0 <= key < 1
+        assert conn.execute(text("SELECT random_key FROM daily_categories")).scalar_one() is not None
+        # aggregates are backfilled from the runs already there
+        stats = conn.execute(text("SELECT games_played, score_sum, high_score, longest_streak FROM user_stats WHERE user_id = 5")).one()
+        assert tuple(stats) == (2, 10, 7, 2)
+
+    assert "ix_game_runs_user_id" not in _indexes(fresh_engine, "game_runs")
+    assert "ix_game_runs_user_id_score" in _indexes(fresh_engine, "game_runs")
+    assert "ix_daily_questions_daily_challenge_id" not in _indexes(fresh_engine, "daily_questions")
+    assert "ix_daily_questions_challenge_id_id" in _indexes(fresh_engine, "daily_questions")
+    # tables that didn't exist yet are created from the models
+    assert "game_sessions" in inspect(fresh_engine).get_table_names()
+    daily_columns = {c["name"] for c in inspect(fresh_engine).get_columns("daily_challenges")}
+    assert {"attempts", "lease_until", "next_attempt_at", "last_latency_ms"} <= daily_columns
+    assert "ix_daily_categories_rotation" in _indexes(fresh_engine, "daily_categories")
+
+
+def test_random_selection_uses_category_difficulty_index(db_session):
+    stmt = (
+        select(QuestionDB.answer, QuestionDB.id)
+        .where(QuestionDB.category == "Space")
+        .where(QuestionDB.difficulty == "hard")
+    )
+    assert "ix_questions_category_difficulty_random_key" in _plan(db_session, stmt)
+
+
+def test_user_stats_read_from_user_score_index(db_session):
+    stmt = select(func.max(GameRunDB.score)).where(GameRunDB.user_id == 7)
+    plan = _plan(db_session, stmt)
+    assert "COVERING INDEX ix_game_runs_user_id_score" in plan
+
+
+def test_leaderboard_groups_by_user_without_sorting(db_session):
+    stmt = select(GameRunDB.user_id, func.max(GameRunDB.score)).group_by(GameRunDB.user_id)
+    plan = _plan(db_session, stmt)
+    assert "ix_game_runs_user_id_score" in plan
+    assert "TEMP B-TREE FOR GROUP BY" not in plan
+
+
+def test_daily_questions_come_back_in_id_order_from_index(db_session):
+    stmt = select(DailyQuestionDB).where(DailyQuestionDB.daily_challenge_id == 3).order_by(DailyQuestionDB.id)
+    plan = _plan(db_session, stmt)
+    assert "ix_daily_questions_challenge_id_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_rollup_boards_are_read_in_order_from_index(db_session):
+    stmt = (
+        select(RunRollupDB.user_id)
+        .where(RunRollupDB.scope == "week")
+        .where(RunRollupDB.bucket == "2026-W42")
+        .order_by(RunRollupDB.best_score.desc(), RunRollupDB.best_streak.desc(), RunRollupDB.user_id)
+        .limit(50)
+    )
+    plan = _plan(db_session, stmt)
+    assert "ix_run_rollups_board" in plan
+    assert "TEMP B-TREE" not in plan
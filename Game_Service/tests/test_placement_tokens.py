@@ -0,0 +1,130 @@
+import base64
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete
+
+from app.GameModels import GameSessionQuestionDB, QuestionDB
+from app.PlacementTokens import InvalidToken, TokenNotConfigured, issue_token, read_token
+
+
+def test_token_round_trips_and_hides_answers():
+    pairs = [(11, 1969), (12, 2001), (13, 1066)]
+    token = issue_token("session-1", pairs)
+
+    session_id, answers = read_token(token)
+
+    assert session_id == "session-1"
+    assert [answers.get(i) for i in (11, 12, 13)] == [1969, 2001, 1066]
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    for _, answer in pairs:
+        assert answer.to_bytes(8, "big") not in raw
+
+
+def test_tampered_or_foreign_token_is_rejected(monkeypatch):
+    token = issue_token("session-1", [(11, 1969)])
+    tampered = token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]
+    with pytest.raises(InvalidToken):
+        read_token(tampered)
+
+    monkeypatch.setenv("PLACEMENT_TOKEN_SECRET", "another-secret")
+    with pytest.raises(InvalidToken):
+        read_token(token)
+
+
+def test_expired_token_is_rejected():
+    token = issue_token("session-1", [(11, 1969)], now=0)
+    with pytest.raises(InvalidToken):
+        read_token(token)
+
+
+def test_issue_token_without_secret_is_a_configuration_error(monkeypatch):
+    monkeypatch.delenv("PLACEMENT_TOKEN_SECRET")
+    with pytest.raises(TokenNotConfigured):
+        issue_token("session-1", [(11, 1969)])
+
+
+def test_validate_with_token_without_secret_is_a_server_error(client, monkeypatch):
+    monkeypatch.delenv("PLACEMENT_TOKEN_SECRET")
+    response = client.post(
+        "/api/game/validate-placement",
+        json={"placed_question_id": 11, "validation_token": "abc"},
+    )
+    assert response.status_code == 500
+    assert response.json() == {"detail": "PLACEMENT_TOKEN_SECRET is not configured"}
+
+
+def _start_with_token(client, monkeypatch):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return [
+            SimpleNamespace(question=f"Question {i}", answer=1900 + i, category=category, difficulty=difficulty)
+            for i in range(count)
+        ]
+
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
+    response = client.post(
+        "/api/game/start",
+        json={"category": "History", "difficulty": "easy", "include_validation_token": True},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_start_game_only_returns_token_when_asked(client, monkeypatch):
+    async def fake_generate_questions(*, category, difficulty, count):
+        return []
+
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate_questions)
+    response = client.post("/api/game/start", json={"category": "History", "difficulty": "easy"})
+    assert response.json()["validation_token"] is None
+
+
+def test_validate_placement_with_token_needs_no_database(client, db_session, monkeypatch):
+    session = _start_with_token(client, monkeypatch)
+    ids = [q["id"] for q in session["questions"]]
+
+    # drop the rows and the cache entry: only the token is left to validate with
+    db_session.execute(delete(GameSessionQuestionDB))
+    db_session.execute(delete(QuestionDB))
+    db_session.commit()
+    import app.AnswerCache as answer_cache_module
+    answer_cache_module.answer_cache.reset()
+
+    response = client.post(
+        "/api/game/validate-placement",
+        json={
+            "validation_token": session["validation_token"],
+            "placed_question_id": ids[3],
+            "left_neighbor_id": ids[4],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"correct": False, "placed_answer": 1903, "left_answer": 1904, "right_answer": None}
+
+    timeline = client.post(
+        "/api/game/validate-timeline",
+        json={"session_id": session["session_id"], "question_ids": ids, "validation_token": session["validation_token"]},
+    )
+    assert timeline.status_code == 200
+    assert timeline.json()["correct"] is True
+
+
+def test_validate_placement_rejects_bad_or_mismatched_token(client, monkeypatch):
+    session = _start_with_token(client, monkeypatch)
+    placed = session["questions"][0]["id"]
+
+    response = client.post(
+        "/api/game/validate-placement",
+        json={"validation_token": "not-a-token", "placed_question_id": placed},
+    )
+    assert response.status_code == 401
+
+    response = client.post(
+        "/api/game/validate-placement",
+        json={"validation_token": session["validation_token"], "session_id": "other", "placed_question_id": placed},
+    )
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Validation token does not match session"}
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+from sqlalchemy import select, func
+
+from app.GameModels import QuestionDB, GameSessionQuestionDB
+from app.QuestionBank import question_key, normalize_question_text
+
+
+def _fake_questions(category, difficulty, count):
+    return [
+        SimpleNamespace(question=f"Question {i}?", answer=1900 + i, category=category, difficulty=difficulty)
+        for i in range(count)
+    ]
+
+
+def test_question_key_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_question_text("  In what YEAR   did it happen? ") == "in what year did it happen"
+    assert question_key("In what year did it happen?", 1969) == question_key("in what  year did it happen", 1969)
+    assert question_key("In what year did it happen?", 1969) != question_key("In what year did it happen?", 1970)
+
+
+def test_repeated_generations_reuse_bank_questions(client, db_session, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+
+    async def fake_generate(*, category, difficulty, count):
+        return _fake_questions(category, difficulty, count)
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate)
+
+    first = client.post("/api/game/start", json={"category": "History", "difficulty": "easy"}).json()
+    second = client.post("/api/game/start", json={"category": "History", "difficulty": "easy"}).json()
+
+    assert first["session_id"] != second["session_id"]
+    assert [q["id"] for q in first["questions"]] == [q["id"] for q in second["questions"]]
+    assert db_session.execute(select(func.count()).select_from(QuestionDB)).scalar_one() == 8
+    assert db_session.execute(select(func.count()).select_from(GameSessionQuestionDB)).scalar_one() == 16
+
+
+def test_start_game_deals_from_bank_once_it_is_big_enough(client, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    monkeypatch.setenv("QUESTION_BANK_MIN_SIZE", "8")
+    for i in range(10):
+        response = client.post(
+            "/api/questions",
+            json={"question": f"Bank question {i}", "answer": 100 + i, "category": "Space", "difficulty": "hard"},
+        )
+        assert response.status_code == 201
+
+    async def fail_generate(*, category, difficulty, count):
+        raise AssertionError("generator should not be called when the bank can deal the set")
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fail_generate)
+
+    response = client.post("/api/game/start", json={"category": "Space", "difficulty": "hard"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["questions"]) == 8
+    assert len({q["id"] for q in body["questions"]}) == 8
+
+    # session filter on the random endpoint follows the session mapping
+    random_q = client.get("/api/questions/random", params={"game_session_id": body["session_id"]})
+    assert random_q.status_code == 200
+    assert random_q.json()["id"] in {q["id"] for q in body["questions"]}
+
+
+def test_creating_duplicate_bank_question_returns_409(client, create_question):
+    create_question(question="When did Apollo 11 land?", answer=1969, category="Space", difficulty="easy")
+
+    response = client.post(
+        "/api/questions",
+        json={"question": "when did apollo 11 land", "answer": 1969, "category": "Space", "difficulty": "easy"},
+    )
+
+    assert response.status_code == 409
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from app.GameModels import QuestionDB
+from app.QuestionBulk import import_questions
+
+
+def _ndjson(*records):
+    return "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in records)
+
+
+def test_import_ndjson_inserts_valid_rows_and_reports_bad_ones(client):
+    body = _ndjson(
+        {"question": "Moon landing?", "answer": 1969, "category": "Space", "difficulty": "easy"},
+        "{not json",
+        {"question": "Negative", "answer": -1, "category": "Space", "difficulty": "easy"},
+        "",
+        {"question": "Sputnik?", "answer": 1957, "category": "Space", "difficulty": "medium"},
+    )
+
+    response = client.post("/api/questions/import", params={"format": "ndjson"}, content=body)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["received"] == 4
+    assert report["inserted"] == 2
+    assert report["rejected"] == 2
+    assert [e["line"] for e in report["errors"]] == [2, 3]
+    assert report["errors"][0]["error"].startswith("Invalid JSON")
+    assert report["errors"][1]["error"].startswith("answer:")
+
+    listed = client.get("/api/questions", params={"category": "Space"}).json()
+    assert [q["question"] for q in listed] == ["Moon landing?", "Sputnik?"]
+
+
+def test_import_counts_duplicates_within_file_and_against_bank(client, create_question):
+    create_question(question="Moon landing?", answer=1969, category="Space", difficulty="easy")
+    body = _ndjson(
+        {"question": "moon  landing", "answer": 1969, "category": "Space", "difficulty": "easy"},
+        {"question": "Mars rover?", "answer": 1997, "category": "Space", "difficulty": "hard"},
+        {"question": "MARS ROVER?", "answer": 1997, "category": "Space", "difficulty": "hard"},
+    )
+
+    report = client.post("/api/questions/import", content=body).json()
+    assert report["inserted"] == 1
+    assert report["duplicates"] == 2
+    assert report["rejected"] == 0
+
+
+def test_import_csv_and_missing_header(client):
+    body = "question,answer,category,difficulty\n\"Year, of the\nfirst Olympics?\",1896,History,medium\nBad,abc,History,easy\n"
+    report = client.post("/api/questions/import", params={"format": "csv"}, content=body).json()
+    assert report["inserted"] == 1
+    assert report["errors"] == [{"line": 4, "error": "answer: Input should be a valid integer, unable to parse string as an integer"}]
+
+    report = client.post("/api/questions/import", params={"format": "csv"}, content="question,answer\nQ,1\n").json()
+    assert report["inserted"] == 0
+    assert report["errors"][0]["error"] == "CSV header is missing columns: category, difficulty"
+
+
+def test_import_commits_in_chunks(db_session):
+    body = _ndjson(*({"question": f"Q{i}", "answer": i, "category": "Music", "difficulty": "easy"} for i in range(25)))
+    report = import_questions(db_session, io.StringIO(body), "ndjson", chunk_size=10)
+    assert report["inserted"] == 25
+    assert db_session.query(QuestionDB).count() == 25
+
+
+def test_export_round_trips_through_import(client, create_question):
+    create_question(question="Moon landing?", answer=1969, category="Space", difficulty="easy")
+    create_question(question="Battle of Hastings", answer=1066, category="History", difficulty="medium")
+
+    response = client.get("/api/questions/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["question"] for r in rows] == ["Moon landing?", "Battle of Hastings"]
+
+    ndjson = client.get("/api/questions/export", params={"category": "History"}).text
+    assert [json.loads(line)["answer"] for line in ndjson.splitlines()] == [1066]
+
+    # re-importing the export adds nothing new
+    report = client.post("/api/questions/import", params={"format": "csv"}, content=response.text).json()
+    assert report["inserted"] == 0
+    assert report["duplicates"] == 2
@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+import app.QuestionGenerator as question_generator
+from app.QuestionGenerator import GeneratedQuestion, GeneratedQuestionSet
+
+
+def test_async_client_is_shared_and_closed(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+    first = question_generator.get_async_client()
+    second = question_generator.get_async_client()
+    assert first is second
+
+    asyncio.run(question_generator.close_clients())
+    assert question_generator.get_async_client() is not first
+    asyncio.run(question_generator.close_clients())
+
+
+def test_generate_questions_async_cleans_and_overrides_model_output(monkeypatch):
+    parsed = GeneratedQuestionSet(
+        questions=[
+            GeneratedQuestion(question=f"  Question {i}  ", answer=1900 + i, category="Other", difficulty="hard")
+            for i in range(8)
+        ]
+    )
+    calls = []
+
+    class FakeResponses:
+        async def parse(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(output_parsed=parsed)
+
+    monkeypatch.setattr(question_generator, "get_async_client", lambda: SimpleNamespace(responses=FakeResponses()))
+
+    out = asyncio.run(question_generator.generate_questions_async(category="History", difficulty="easy", count=8))
+
+    assert len(calls) == 1
+    assert calls[0]["store"] is False
+    assert [q.question for q in out] == [f"Question {i}" for i in range(8)]
+    assert all(q.category == "History" and q.difficulty == "easy" for q in out)
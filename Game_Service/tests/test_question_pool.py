@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+from app.GameModels import QuestionPoolSetDB
+from app.QuestionPool import add_pool_set, pool_depth
+
+
+def _fake_questions(category, difficulty, count, offset=0):
+    return [
+        SimpleNamespace(
+            question=f"Question {offset + index}",
+            answer=1900 + offset + index,
+            category=category,
+            difficulty=difficulty,
+        )
+        for index in range(count)
+    ]
+
+
+def test_start_game_takes_set_from_pool_without_generating(client, db_session, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    add_pool_set(db_session, "History", "easy", _fake_questions("History", "easy", 8, offset=100))
+    db_session.commit()
+
+    async def fail_generate(*, category, difficulty, count):
+        raise AssertionError("generator should not be called on a pool hit")
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fail_generate)
+
+    response = client.post("/api/game/start", json={"category": "History", "difficulty": "easy"})
+
+    assert response.status_code == 200
+    questions = response.json()["questions"]
+    assert [q["question"] for q in questions] == [f"Question {100 + i}" for i in range(8)]
+    assert pool_depth(db_session, "History", "easy") == 0
+
+
+def test_start_game_pool_miss_generates_and_refills_to_low_water(client, db_session, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "2")
+    calls = []
+
+    async def fake_generate(*, category, difficulty, count):
+        calls.append((category, difficulty, count))
+        return _fake_questions(category, difficulty, count)
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate)
+
+    response = client.post("/api/game/start", json={"category": "Space", "difficulty": "hard"})
+
+    assert response.status_code == 200
+    # one call for the game itself, two more from the background refill
+    assert len(calls) == 3
+    assert pool_depth(db_session, "Space", "hard") == 2
+
+    # the next start is served from the pool
+    response = client.post("/api/game/start", json={"category": "Space", "difficulty": "hard"})
+    assert response.status_code == 200
+    assert len(calls) == 4  # only the refill ran again
+    assert pool_depth(db_session, "Space", "hard") == 2
+
+
+def test_refill_failure_does_not_break_start_game(client, db_session, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "2")
+    calls = []
+
+    async def flaky_generate(*, category, difficulty, count):
+        calls.append(category)
+        if len(calls) > 1:
+            raise RuntimeError("OpenAI generation failed")
+        return _fake_questions(category, difficulty, count)
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", flaky_generate)
+
+    response = client.post("/api/game/start", json={"category": "Music", "difficulty": "easy"})
+
+    assert response.status_code == 200
+    assert db_session.query(QuestionPoolSetDB).count() == 0
+    assert client.get("/api/game/pool/stats").json()["refill_failures"] == 1
+
+
+def test_pool_stats_reports_depth_hits_and_misses(client, db_session, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+    add_pool_set(db_session, "History", "easy", _fake_questions("History", "easy", 8))
+    db_session.commit()
+
+    async def fake_generate(*, category, difficulty, count):
+        return _fake_questions(category, difficulty, count)
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate)
+
+    client.post("/api/game/start", json={"category": "History", "difficulty": "easy"})
+    client.post("/api/game/start", json={"category": "History", "difficulty": "easy"})
+
+    response = client.get("/api/game/pool/stats")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["low_water"] == 0
+    assert body["total_hits"] == 1
+    assert body["total_misses"] == 1
+    assert body["keys"] == [
+        {"category": "History", "difficulty": "easy", "depth": 0, "hits": 1, "misses": 1},
+    ]
@@ -0,0 +1,73 @@
+import random
+import time
+
+from app.QuestionSelector import AnswerIndex, AnswerIndexCache, select_spread_set
+
+
+def test_select_returns_distinct_answers_spread_over_the_range():
+    # lots of ties around a few popular answers plus a long tail
+    pairs = [(1900 + (i % 50), i) for i in range(1000)] + [(10_000 + i, 5000 + i) for i in range(50)]
+    index = AnswerIndex(pairs)
+    answer_by_id = {question_id: answer for answer, question_id in pairs}
+
+    for seed in range(20):
+        ids = index.select(8, random.Random(seed))
+        answers = [answer_by_id[i] for i in ids]
+        assert len(set(ids)) == 8
+        assert len(set(answers)) == 8
+        # one pick per stratum: the first comes from the lowest eighth, the last from the highest
+        assert answers == sorted(answers)
+        assert answers[0] < 1900 + 13
+        assert answers[-1] >= 10_000 + 37
+
+
+def test_select_returns_none_without_enough_distinct_answers():
+    index = AnswerIndex([(5, 1), (5, 2), (6, 3)])
+    assert index.distinct_answers == 2
+    assert index.select(8) is None
+
+
+def test_add_keeps_index_sorted_and_distinct_starts_correct():
+    index = AnswerIndex([(10, 1), (30, 2)])
+    index.add(3, 20)
+    index.add(4, 20)
+    index.add(5, 5)
+    index.add(6, 30)
+
+    assert list(index.answers) == [5, 10, 20, 20, 30, 30]
+    assert list(index.starts) == [0, 1, 2, 4]
+    ids = index.select(4)
+    assert ids[0] == 5
+    assert ids[1] == 1
+    assert ids[2] in (3, 4)
+    assert ids[3] in (2, 6)
+
+
+def test_select_spread_set_loads_rows_from_bank(client, create_question, db_session):
+    for i in range(8):
+        create_question(question=f"Q{i}", answer=i * 10, category="Science", difficulty="medium")
+    create_question(question="Tie", answer=0, category="Science", difficulty="medium")
+
+    rows = select_spread_set(db_session, "Science", "medium", 8)
+
+    assert rows is not None
+    assert sorted(r.answer for r in rows) == [0, 10, 20, 30, 40, 50, 60, 70]
+    assert select_spread_set(db_session, "Science", "medium", 8, min_distinct=20) is None
+
+
+def test_stale_index_is_served_while_it_rebuilds_in_the_background(client, create_question, db_session, monkeypatch):
+    create_question(question="Q0", answer=10, category="Science", difficulty="medium")
+    cache = AnswerIndexCache()
+    first = cache.get(db_session, "Science", "medium")
+    db_session.commit()  #the rebuild shares the test's single connection, don't hold a transaction open on it
+
+    monkeypatch.setenv("ANSWER_INDEX_TTL_SECONDS", "0")
+    create_question(question="Q1", answer=20, category="Science", difficulty="medium")
+
+    assert cache.get(db_session, "Science", "medium") is first  #no reload in the request
+    deadline = time.monotonic() + 5
+    while cache._indexes[("Science", "medium")] is first and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    monkeypatch.setenv("ANSWER_INDEX_TTL_SECONDS", "300")
+    assert list(cache.get(db_session, "Science", "medium").answers) == [10, 20]
@@ -0,0 +1,70 @@
+import random
+
+from sqlalchemy import select, text
+
+from app.GameModels import QuestionDB
+from app.RandomSampler import pick_random
+
+
+class FixedRng:
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+
+def _add(db, key, **fields):
+    row = QuestionDB(question=f"Q{key}", answer=1, category=fields.get("category", "History"),
+                     difficulty=fields.get("difficulty", "easy"), random_key=key)
+    db.add(row)
+    db.commit()
+    return row
+
+
+def test_pick_random_takes_first_key_at_or_above_draw(db_session):
+    _add(db_session, 0.2)
+    middle = _add(db_session, 0.5)
+    _add(db_session, 0.9)
+
+    row = pick_random(db_session, select(QuestionDB), QuestionDB.random_key, FixedRng(0.3))
+    assert row.id == middle.id
+
+
+def test_pick_random_wraps_around_past_the_last_key(db_session):
+    first = _add(db_session, 0.2)
+    _add(db_session, 0.5)
+
+    row = pick_random(db_session, select(QuestionDB), QuestionDB.random_key, FixedRng(0.95))
+    assert row.id == first.id
+
+
+def test_pick_random_respects_filters_and_empty_results(db_session):
+    _add(db_session, 0.5, category="History")
+    space = _add(db_session, 0.1, category="Space")
+
+    stmt = select(QuestionDB).where(QuestionDB.category == "Space")
+    assert pick_random(db_session, stmt, QuestionDB.random_key, FixedRng(0.4)).id == space.id
+    empty = select(QuestionDB).where(QuestionDB.category == "Movies")
+    assert pick_random(db_session, empty, QuestionDB.random_key) is None
+
+
+def test_pick_random_reaches_every_row(db_session):
+    ids = {_add(db_session, key).id for key in (0.1, 0.3, 0.5, 0.7, 0.9)}
+    seen = {pick_random(db_session, select(QuestionDB), QuestionDB.random_key, random.Random(seed)).id for seed in range(200)}
+    assert seen == ids
+
+
+def test_filtered_pick_uses_random_key_index(db_session):
+    stmt = (
+        select(QuestionDB)
+        .where(QuestionDB.category == "Space")
+        .where(QuestionDB.difficulty == "hard")
+        .where(QuestionDB.random_key >= 0.5)
+        .order_by(QuestionDB.random_key)
+        .limit(1)
+    )
+    sql = str(stmt.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(str(row[-1]) for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_questions_category_difficulty_random_key" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.GameModels import GameSessionDB, GameSessionQuestionDB, QuestionDB
+from app.QuestionBank import question_key
+
+HEADERS = {"X-Daily-Job-Token": "test-token"}
+OLD = datetime.now(timezone.utc) - timedelta(days=30)
+
+
+@pytest.fixture(autouse=True)
+def no_pause(monkeypatch):
+    monkeypatch.setenv("RETENTION_BATCH_PAUSE_SECONDS", "0")
+
+
+def _legacy(db, session_id, question, answer=1900, created_at=OLD):
+    row = QuestionDB(question=question, answer=answer, category="History", difficulty="easy",
+                     game_session_id=session_id, created_at=created_at)
+    db.add(row)
+    db.commit()
+    return row.id
+
+
+def _bank(db, question, answer=1900):
+    row = QuestionDB(question=question, answer=answer, category="History", difficulty="easy",
+                     question_key=question_key(question, answer))
+    db.add(row)
+    db.commit()
+    return row.id
+
+
+def _session(db, session_id, question_ids, updated_at=OLD, with_state=True):
+    if with_state:
+        db.add(GameSessionDB(session_id=session_id, category="History", difficulty="easy", total_questions=len(question_ids),
+                             timeline=[], missed=[], lives_remaining=1, created_at=updated_at, updated_at=updated_at))
+    for position, question_id in enumerate(question_ids):
+        db.add(GameSessionQuestionDB(game_session_id=session_id, question_id=question_id, position=position, created_at=updated_at))
+    db.commit()
+
+
+def test_retention_requires_job_token(client):
+    assert client.post("/api/retention/run").status_code == 401
+
+
+def test_deletes_old_legacy_questions_in_batches(client, db_session):
+    for i in range(5):
+        _legacy(db_session, "old-session", f"Old {i}", answer=1900 + i)
+    recent = _legacy(db_session, "new-session", "Recent", created_at=datetime.now(timezone.utc))
+    bank = _bank(db_session, "Bank question")
+
+    response = client.post("/api/retention/run", params={"batch_size": 2}, headers=HEADERS)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["questions_deleted"] == 5
+    assert body["questions_archived"] == 0
+    assert body["batches"] == 3
+    assert body["complete"] is True
+
+    db_session.expire_all()
+    assert set(db_session.execute(select(QuestionDB.id)).scalars()) == {recent, bank}
+
+
+def test_archive_keeps_unseen_legacy_questions_in_bank(client, db_session):
+    _bank(db_session, "Moon landing?", 1969)
+    _legacy(db_session, "s1", "moon landing", 1969)  # already in the bank
+    kept = _legacy(db_session, "s1", "Sputnik launch?", 1957)
+    _legacy(db_session, "s2", "Sputnik  launch", 1957)  # same question from another session
+
+    body = client.post("/api/retention/run", params={"archive": True}, headers=HEADERS).json()
+    assert body["questions_archived"] == 1
+    assert body["questions_deleted"] == 2
+
+    db_session.expire_all()
+    archived = db_session.get(QuestionDB, kept)
+    assert archived.game_session_id is None
+    assert archived.question_key == question_key("Sputnik launch?", 1957)
+
+
+def test_deletes_idle_sessions_and_orphan_links_only(client, db_session):
+    q1 = _bank(db_session, "Q1")
+    q2 = _bank(db_session, "Q2")
+    _session(db_session, "idle", [q1, q2])
+    _session(db_session, "playing", [q1], updated_at=datetime.now(timezone.utc))
+    _session(db_session, "pre-state", [q1, q2], with_state=False)
+
+    body = client.post("/api/retention/run", headers=HEADERS).json()
+    assert body["sessions_deleted"] == 1
+    assert body["session_links_deleted"] == 4
+
+    db_session.expire_all()
+    assert list(db_session.execute(select(GameSessionDB.session_id)).scalars()) == ["playing"]
+    assert list(db_session.execute(select(GameSessionQuestionDB.game_session_id)).scalars()) == ["playing"]
+    # bank questions are shared, never cleaned up with the sessions
+    assert db_session.get(QuestionDB, q1) is not None
+
+    stats = client.get("/api/retention/stats").json()
+    assert stats["runs"] == 1
+    assert stats["sessions_deleted"] == 1
+    assert stats["session_links_deleted"] == 4
+    assert stats["last_run_complete"] is True
+
+
+def test_stops_when_time_budget_runs_out(client, db_session, monkeypatch):
+    _legacy(db_session, "old-session", "Old")
+    monkeypatch.setenv("RETENTION_MAX_SECONDS", "0")
+
+    body = client.post("/api/retention/run", headers=HEADERS).json()
+    assert body["complete"] is False
+    assert body["batches"] == 0
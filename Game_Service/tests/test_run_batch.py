@@ -0,0 +1,175 @@
+import asyncio
+import time
+
+from sqlalchemy import func, select
+
+from app.GameModels import GameRunDB
+from app.Leaderboard import leaderboard_version
+from app.RunBuffer import RunBuffer
+from conftest import TestingSessionLocal
+
+
+def _run(user_id, score, streak, category=None):
+    return {"user_id": user_id, "score": score, "streak": streak, "total_questions": 10, "category": category}
+
+
+def _run_count(db):
+    return db.execute(select(func.count()).select_from(GameRunDB)).scalar_one()
+
+
+def test_batch_writes_runs_and_aggregates_in_one_go(client, db_session):
+    response = client.post("/api/runs:batch", json={"runs": [
+        _run(1, 4, 2, "History"),
+        _run(1, 9, 1, "History"),
+        _run(2, 6, 5),
+    ]})
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["accepted"] == 3
+    assert len(body["run_ids"]) == 3 and body["run_ids"] == sorted(body["run_ids"])
+    assert client.get("/api/users/1/stats").json() == {
+        "high_score": 9, "longest_streak": 2, "average_score": 6.5, "games_played": 2,
+    }
+    assert [e["user_id"] for e in client.get("/api/leaderboard").json()] == [1, 2]
+    assert client.get("/api/leaderboard/category/History").json() == [{"user_id": 1, "best_score": 9, "best_streak": 2}]
+    assert leaderboard_version(db_session) == 1  #one bump for the whole batch
+
+
+def test_batch_only_bumps_version_when_a_best_moves(client, db_session, add_run):
+    add_run(user_id=1, score=9, streak=5)
+    before = leaderboard_version(db_session)
+
+    client.post("/api/runs:batch", json={"runs": [_run(1, 3, 1), _run(1, 4, 2)]})
+
+    assert leaderboard_version(db_session) == before
+
+
+def test_run_that_only_ties_a_best_does_not_bump_version(client, db_session, add_run):
+    add_run(user_id=1, score=9, streak=5)
+    before = leaderboard_version(db_session)
+
+    client.post("/api/runs:batch", json={"runs": [_run(1, 2, 5), _run(1, 9, 0)]})
+    assert leaderboard_version(db_session) == before
+
+    client.post("/api/runs:batch", json={"runs": [_run(1, 2, 6)]})
+    assert leaderboard_version(db_session) == before + 1
+
+
+def test_batch_rejects_empty_list(client):
+    assert client.post("/api/runs:batch", json={"runs": []}).status_code == 422
+
+
+def test_write_behind_buffers_until_batch_size(client, db_session, monkeypatch):
+    monkeypatch.setenv("RUN_WRITE_BEHIND", "1")
+    monkeypatch.setenv("RUN_BUFFER_MAX_BATCH", "2")
+    monkeypatch.setenv("RUN_BUFFER_MAX_DELAY_SECONDS", "60")
+
+    first = client.post("/api/users/5/runs", json={"score": 3, "streak": 1})
+    assert first.status_code == 202
+    assert first.json() == {"user_id": 5, "queued": True}
+    assert client.get("/api/runs/buffer/stats").json()["pending"] == 1
+    assert _run_count(db_session) == 0
+
+    client.post("/api/users/5/runs", json={"score": 7, "streak": 2})
+    deadline = time.monotonic() + 5
+    while client.get("/api/runs/buffer/stats").json()["flushed"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    stats = client.get("/api/runs/buffer/stats").json()
+    assert stats["flushed"] == 2 and stats["batches"] == 1 and stats["pending"] == 0
+    assert client.get("/api/users/5/stats").json()["games_played"] == 2
+
+
+def test_write_behind_writes_directly_when_buffer_is_full(client, monkeypatch):
+    monkeypatch.setenv("RUN_WRITE_BEHIND", "1")
+    monkeypatch.setenv("RUN_BUFFER_MAX_PENDING", "1")
+    monkeypatch.setenv("RUN_BUFFER_MAX_DELAY_SECONDS", "60")
+
+    assert client.post("/api/users/5/runs", json={"score": 3, "streak": 1}).status_code == 202
+    direct = client.post("/api/users/5/runs", json={"score": 4, "streak": 1})
+
+    assert direct.status_code == 201
+    assert direct.json()["id"] > 0
+
+
+def test_failed_flush_keeps_the_batch_for_a_retry(db_session):
+    calls = []
+
+    def flaky_session():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return TestingSessionLocal()
+
+    buffer = RunBuffer(flaky_session)
+    buffer.add(_run(1, 5, 2))
+    buffer.add(_run(2, 6, 3))
+
+    try:
+        buffer.flush_now()
+    except RuntimeError:
+        pass
+    assert buffer.stats()["pending"] == 2
+    assert buffer.stats()["failures"] == 1
+
+    assert buffer.flush_now() == 2
+    assert buffer.stats()["pending"] == 0
+    assert _run_count(db_session) == 2
+
+
+def test_bad_run_is_dropped_without_holding_up_the_rest(db_session):
+    buffer = RunBuffer(TestingSessionLocal)
+    buffer.add(_run(1, 5, 2))
+    buffer.add({"user_id": 2, "score": None, "streak": 1})  #violates NOT NULL every time
+    buffer.add(_run(3, 6, 3))
+
+    assert buffer.flush_now() == 3
+
+    stats = buffer.stats()
+    assert stats["pending"] == 0 and stats["flushed"] == 2 and stats["dropped"] == 1
+    assert sorted(db_session.scalars(select(GameRunDB.user_id))) == [1, 3]
+
+
+def test_buffered_run_keeps_the_time_it_was_queued(db_session):
+    buffer = RunBuffer(TestingSessionLocal)
+    buffer.add(_run(1, 5, 2))
+    queued_at = buffer._pending[0]["ended_at"]
+    time.sleep(0.01)
+
+    buffer.flush_now()
+
+    ended_at = db_session.scalars(select(GameRunDB.ended_at)).one()
+    assert ended_at.replace(tzinfo=None) == queued_at.replace(tzinfo=None)  #sqlite hands back naive UTC
+
+
+def test_stop_flushes_what_is_left(db_session, monkeypatch):
+    monkeypatch.setenv("RUN_BUFFER_MAX_DELAY_SECONDS", "60")
+    buffer = RunBuffer(TestingSessionLocal)
+
+    async def lifecycle():
+        buffer.start()
+        for i in range(3):
+            buffer.add(_run(i + 1, i, i))
+        await buffer.stop()
+
+    asyncio.run(lifecycle())
+
+    assert _run_count(db_session) == 3
+    assert buffer.stats()["pending"] == 0
+
+
+def test_stop_gives_up_on_the_final_flush_without_raising(monkeypatch, capsys):
+    monkeypatch.setattr("app.RunBuffer.RETRY_PAUSE_SECONDS", 0)
+
+    def broken_session():
+        raise RuntimeError("database unavailable")
+
+    buffer = RunBuffer(broken_session)
+    buffer.add(_run(1, 5, 2))
+
+    asyncio.run(buffer.stop())  #must not raise, the lifespan still has clients to close
+
+    assert buffer.stats()["pending"] == 1
+    assert buffer.stats()["failures"] == 3
+    assert "database unavailable" in capsys.readouterr().err
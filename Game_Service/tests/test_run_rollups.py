@@ -0,0 +1,83 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+import app.GameRuns as game_runs
+from app.GameModels import GameRunDB, RunRollupDB
+from app.GameRuns import record_run, rebuild_rollups, rollup_buckets
+
+
+class FrozenClock(datetime):
+    current = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def _rollups(db):
+    return {
+        (r.scope, r.bucket, r.user_id): (r.games_played, r.score_sum, r.best_score, r.best_streak)
+        for r in db.execute(select(RunRollupDB)).scalars()
+    }
+
+
+def _raw_aggregation(db):
+    # what a time-filtered GROUP BY over game_runs would give, board by board
+    expected = {}
+    for run in db.execute(select(GameRunDB)).scalars():
+        for scope, bucket in rollup_buckets(run.category, run.ended_at):
+            key = (scope, bucket, run.user_id)
+            played, total, best, streak = expected.get(key, (0, 0, 0, 0))
+            expected[key] = (played + 1, total + run.score, max(best, run.score), max(streak, run.streak))
+    return expected
+
+
+def test_incremental_rollups_match_raw_aggregation_and_rebuild(db_session, monkeypatch):
+    monkeypatch.setattr(game_runs, "datetime", FrozenClock)
+    rng = random.Random(7)
+    start = FrozenClock.current
+    for i in range(120):
+        FrozenClock.current = start + timedelta(hours=rng.randrange(0, 24 * 20))  # spans several weeks
+        record_run(
+            db_session,
+            rng.randrange(1, 6),
+            score=rng.randrange(0, 20),
+            streak=rng.randrange(0, 10),
+            category=rng.choice(["History", "Space", None]),
+        )
+    db_session.commit()
+
+    incremental = _rollups(db_session)
+    assert incremental == _raw_aggregation(db_session)
+    # sanity check one board against SQL directly
+    history = dict(db_session.execute(
+        select(GameRunDB.user_id, func.max(GameRunDB.score)).where(GameRunDB.category == "History").group_by(GameRunDB.user_id)
+    ).all())
+    assert {user: row[2] for (scope, bucket, user), row in incremental.items() if (scope, bucket) == ("category", "History")} == history
+
+    rebuild_rollups(db_session)
+    db_session.commit()
+    assert _rollups(db_session) == incremental
+
+
+def test_daily_weekly_and_category_boards(client, add_run):
+    add_run(user_id=1, score=4, streak=2, total_questions=8, category="History")
+    add_run(user_id=2, score=9, streak=1, total_questions=8, category="Space")
+    add_run(user_id=1, score=7, streak=1, total_questions=8, category="Space")
+
+    daily = client.get("/api/leaderboard/daily").json()
+    assert daily == [
+        {"user_id": 2, "best_score": 9, "best_streak": 1},
+        {"user_id": 1, "best_score": 7, "best_streak": 2},
+    ]
+    assert client.get("/api/leaderboard/weekly").json() == daily
+
+    space = client.get("/api/leaderboard/category/Space").json()
+    assert space == [
+        {"user_id": 2, "best_score": 9, "best_streak": 1},
+        {"user_id": 1, "best_score": 7, "best_streak": 1},
+    ]
+    assert client.get("/api/leaderboard/daily", params={"day": "2000-01-01"}).json() == []
+    assert client.get("/api/leaderboard/weekly", params={"week": "last week"}).status_code == 422
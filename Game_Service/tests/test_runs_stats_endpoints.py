@@ -1,3 +1,10 @@
+from sqlalchemy import event
+
+from app.GameModels import GameRunDB, UserStatsDB
+from app.GameRuns import backfill_user_stats
+from conftest import engine
+
+
 def test_add_user_run_creates_row(client):
     response = client.post(
         "/api/users/7/runs",
@@ -72,4 +79,125 @@ def test_leaderboard_returns_empty_list_when_no_runs_exist(client):
     response = client.get("/api/leaderboard")
 
     assert response.status_code == 200
-    assert response.json() == []
\ No newline at end of file
+    assert response.json() == []
+
+def test_user_stats_is_a_single_lookup_that_never_touches_game_runs(client, add_run):
+    for score in (3, 7, 5):
+        add_run(user_id=21, score=score, streak=score - 1, total_questions=8, category="History")
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/api/users/21/stats")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.json() == {"high_score": 7, "longest_streak": 6, "average_score": 5.0, "games_played": 3}
+    assert len(statements) == 1
+    assert "game_runs" not in statements[0]
+
+
+def test_backfill_rebuilds_user_stats_from_runs(db_session):
+    db_session.add_all([
+        GameRunDB(user_id=1, score=4, streak=2),
+        GameRunDB(user_id=1, score=9, streak=1),
+        GameRunDB(user_id=2, score=6, streak=6),
+    ])
+    db_session.add(UserStatsDB(user_id=99, games_played=5, score_sum=5, high_score=1, longest_streak=1))  # stale row
+    db_session.commit()
+
+    assert backfill_user_stats(db_session) == 2
+    db_session.commit()
+
+    rows = {s.user_id: (s.games_played, s.score_sum, s.high_score, s.longest_streak) for s in db_session.query(UserStatsDB)}
+    assert rows == {1: (2, 13, 9, 2), 2: (1, 6, 6, 6)}
+
+
+def test_leaderboard_pages_with_limit_and_offset(client, add_run):
+    for user_id, score in [(1, 3), (2, 9), (3, 6), (4, 1)]:
+        add_run(user_id=user_id, score=score, streak=0, total_questions=8, category="History")
+
+    page = client.get("/api/leaderboard", params={"limit": 2, "offset": 1}).json()
+    assert [e["user_id"] for e in page] == [3, 1]
+    assert client.get("/api/leaderboard", params={"limit": 500}).status_code == 422
+
+
+def test_leaderboard_etag_only_changes_when_a_best_is_beaten(client, add_run):
+    add_run(user_id=1, score=5, streak=2, total_questions=8, category="History")
+
+    first = client.get("/api/leaderboard")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+
+    assert client.get("/api/leaderboard", headers={"If-None-Match": etag}).status_code == 304
+
+    add_run(user_id=1, score=3, streak=1, total_questions=8, category="History")  # worse than the best
+    assert client.get("/api/leaderboard", headers={"If-None-Match": etag}).status_code == 304
+
+    add_run(user_id=1, score=8, streak=1, total_questions=8, category="History")
+    response = client.get("/api/leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json() == [{"user_id": 1, "best_score": 8, "best_streak": 2}]
+
+
+def test_leaderboard_snapshot_applies_only_changed_users(client, add_run, monkeypatch):
+    from app.Leaderboard import leaderboard_snapshot
+
+    monkeypatch.setenv("LEADERBOARD_SNAPSHOT_SIZE", "2")
+    for user_id, score in [(1, 9), (2, 7), (3, 2)]:
+        add_run(user_id=user_id, score=score, streak=0, total_questions=8, category="History")
+
+    assert [e["user_id"] for e in client.get("/api/leaderboard", params={"limit": 2}).json()] == [1, 2]
+    assert leaderboard_snapshot.full_reloads == 1
+
+    # user 3 climbs from outside the snapshot into first place
+    add_run(user_id=3, score=10, streak=0, total_questions=8, category="History")
+    assert [e["user_id"] for e in client.get("/api/leaderboard", params={"limit": 2}).json()] == [3, 1]
+    assert leaderboard_snapshot.full_reloads == 1
+    assert leaderboard_snapshot.delta_refreshes == 1
+
+    # pages beyond the snapshot come straight from the index
+    assert [e["user_id"] for e in client.get("/api/leaderboard", params={"limit": 2, "offset": 1}).json()] == [1, 2]
+
+
+def test_user_rank_with_percentile_and_neighbours(client, add_run):
+    for user_id, score in [(1, 9), (2, 7), (3, 5), (4, 3), (5, 1)]:
+        add_run(user_id=user_id, score=score, streak=0, total_questions=8, category="History")
+
+    response = client.get("/api/users/3/rank", params={"neighbors": 1})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "user_id": 3,
+        "best_score": 5,
+        "best_streak": 0,
+        "rank": 3,
+        "total_players": 5,
+        "percentile": 50.0,
+        "above": [{"user_id": 2, "best_score": 7, "best_streak": 0}],
+        "below": [{"user_id": 4, "best_score": 3, "best_streak": 0}],
+    }
+
+
+def test_user_rank_follows_new_bests_without_rebuilding(client, add_run):
+    from app.Leaderboard import rank_index
+
+    add_run(user_id=1, score=9, streak=0, total_questions=8, category="History")
+    add_run(user_id=2, score=4, streak=0, total_questions=8, category="History")
+    assert client.get("/api/users/2/rank").json()["rank"] == 2
+    reloads = rank_index.full_reloads
+
+    add_run(user_id=2, score=12, streak=0, total_questions=8, category="History")
+    body = client.get("/api/users/2/rank").json()
+    assert body["rank"] == 1
+    assert body["percentile"] == 100.0
+    assert body["above"] == []
+    assert rank_index.full_reloads == reloads
+
+
+def test_user_rank_404_without_runs(client):
+    response = client.get("/api/users/404/rank")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User has no runs yet"}
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.SingleFlight import SingleFlight
+
+
+def test_concurrent_calls_for_same_key_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return ["q1", "q2"]
+
+    async def main():
+        return await asyncio.gather(*(flight.do(("History", "easy", 8), work) for _ in range(10)))
+
+    results = asyncio.run(main())
+
+    assert len(executions) == 1
+    assert all(result == ["q1", "q2"] for result in results)
+    assert flight.stats() == {"calls": 10, "executions": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        return await asyncio.gather(
+            flight.do(("History", "easy", 8), work),
+            flight.do(("History", "hard", 8), work),
+        )
+
+    asyncio.run(main())
+
+    assert flight.stats()["executions"] == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_failure_is_shared_and_next_call_retries():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("OpenAI generation failed")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(attempts) == 1
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(flight.do("key", failing))
+    assert len(attempts) == 2
+
+
+def test_start_game_reports_generation_stats(client, monkeypatch):
+    monkeypatch.setenv("QUESTION_POOL_LOW_WATER", "0")
+
+    async def fake_generate(*, category, difficulty, count):
+        return []
+
+    monkeypatch.setattr("app.GameMain.generate_questions_async", fake_generate)
+
+    client.post("/api/game/start", json={"category": "History", "difficulty": "easy"})
+
+    response = client.get("/api/game/generation/stats")
+    assert response.status_code == 200
+    assert response.json() == {"calls": 1, "executions": 1, "coalesced": 0, "in_flight": 0}
@@ -31,4 +31,4 @@ export async function validateDailyPlacement({placedQuestionId,leftNeighborId,ri
     throw new Error(`validateDailyPlacement failed: ${res.status} ${text}`);
   }
   return res.json();
-}
\ No newline at end of file
+}
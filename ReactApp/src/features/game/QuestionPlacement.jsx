@@ -1,5 +1,5 @@
 import React, {useState } from "react"; //useState lets the component store values and update them
-import { startGame, validatePlacement } from "./services/gameApi"; //importing the two functions for fetching questions 
+import { startGame, placeCard } from "./services/gameApi"; //start a server-side game session, then place cards in it
 import "./styles/QuestionPlacement.css";
 import GameOverPopUp from "./components/GameOverPopUp";
 import { FaInfinity } from "react-icons/fa6"; //Infintity Logo from React-Icons website
@@ -60,7 +60,7 @@ const [endSubtitle, setEndSubtitle] = useState("Try Again!");
     setDeck(rest);
   };
 
-  //Validate placement in the deck and if correct, add to number line. if not - game over
+  //Places the card in the server-side session and if correct, add to number line. Game over when the server ends the session
   const handleDragEnd = async (event) => {
     setMessage("");
 
@@ -78,23 +78,16 @@ const [endSubtitle, setEndSubtitle] = useState("Try Again!");
     const insertIndex = parseInt(slotId.replace("slot-", ""), 10);
     if (Number.isNaN(insertIndex)) return;
 
-    //Find left and right neighbor question IDs for validation endpoint 
-    const left = insertIndex - 1 >= 0 ? lineQuestions[insertIndex - 1] : null;
-    const right = insertIndex < lineQuestions.length ? lineQuestions[insertIndex] : null;
-
-    //If null use null else use that questions id
-    const leftNeighborId = left ? left.questionId : null;
-    const rightNeighborId = right ? right.questionId : null;
-
     setIsValidating(true);
     try {
-      const result = await validatePlacement({
-        placedQuestionId: currentQuestion.id,
-        leftNeighborId,
-        rightNeighborId,
+      //the server checks the drop against its own copy of the timeline and keeps the score, lives and run
+      const result = await placeCard({
+        sessionId,
+        questionId: currentQuestion.id,
+        position: insertIndex,
       });
 
-      //If correct, insert into the number line and load next
+      //If correct, insert into the number line
       if (result.correct) {
         const newCard = {
           id: `card-${currentQuestion.id}`,
@@ -104,31 +97,30 @@ const [endSubtitle, setEndSubtitle] = useState("Try Again!");
 
         const newLine = [...lineQuestions];
         newLine.splice(insertIndex, 0, newCard);
-
         setLineQuestions(newLine);
-        setScore((prev) => prev + 1);
-        setCurrentQuestion(null);
+      }
+      setScore(result.score);
+      setCurrentQuestion(null);
 
-        //If 20 questions placed, win
-        const placedCount = newLine.length;
-        if (placedCount >= 20) {
+      //Server ended the game: out of lives, or every card placed
+      if (result.status === "ended") {
+        if (result.lives_remaining > 0) {
           setEndTitle("You Win!");
-          setEndSubtitle("You placed all questions correctly 🎉");
-          setLastScore(score + 1);
-          resetGame();
-          setIsGameOver(true);
-          return;
+          setEndSubtitle("You made it through the whole deck 🎉");
+        } else {
+          setEndTitle("Game Over!");
+          setEndSubtitle("Try Again!");
         }
-
-        loadNextFromDeck(deck);
+        setLastScore(result.score);
+        resetGame();
+        setIsGameOver(true);
         return;
       }
 
-      //If incorrect -> game over
-      setLastScore(score);
-      resetGame();
-      setIsGameOver(true);
-      setCurrentQuestion(null);
+      if (!result.correct) {
+        setMessage(`Wrong spot! Lives left: ${result.lives_remaining}`);
+      }
+      loadNextFromDeck(deck);
     } catch (err) {
       console.error(err);
       setMessage("Validation failed due to a server error. Try again.");
@@ -6,7 +6,7 @@ export async function startGame({ category, difficulty }) {
   return res.data;
 }
 
-export async function validatePlacement({ placedQuestionId, leftNeighborId, rightNeighborId }) {
+export async function validatePlacement({ placedQuestionId, leftNeighborId, rightNeighborId, sessionId }) {
   const res = await fetch("/api/game/validate-placement", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
@@ -14,6 +14,7 @@ export async function validatePlacement({ placedQuestionId, leftNeighborId, righ
       placed_question_id: placedQuestionId,
       left_neighbor_id: leftNeighborId ?? null,
       right_neighbor_id: rightNeighborId ?? null,
+      session_id: sessionId ?? null,
     }),
   });
 
@@ -22,4 +23,19 @@ export async function validatePlacement({ placedQuestionId, leftNeighborId, righ
     throw new Error(`validatePlacement failed: ${res.status} ${text}`);
   }
   return res.json();
-}
\ No newline at end of file
+}
+
+//server-side session: one call per drop returns the new game state (timeline, lives, score, streak)
+export async function placeCard({ sessionId, questionId, position }) {
+  const res = await fetch(`/api/game/sessions/${sessionId}/place`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ question_id: questionId, position }),
+  });
+
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`placeCard failed: ${res.status} ${text}`);
+  }
+  return res.json();
+}
@@ -6,12 +6,13 @@ from contextlib import asynccontextmanager
 import time
  
 from .UserDatabase import engine, SessionLocal 
-from .UserModels import Base, UserDB 
+from .UserModels import UserDB 
+from .UserMigrations import run_migrations
 from .UserSchemas import UserCreate, UserRead 
 
 @asynccontextmanager 
 async def lifespan(app: FastAPI): 
-    #wait for Postgres to be ready (important in Docker), then create tables
+    #wait for Postgres to be ready (important in Docker), then bring the schema up to date
     max_tries = 15
     delay_seconds = 1
 
@@ -19,7 +20,7 @@ async def lifespan(app: FastAPI):
         try:
             with engine.connect() as _conn:
                 pass
-            Base.metadata.create_all(bind=engine)    
+            run_migrations(engine)  #creates missing tables and applies pending schema migrations
             break
         except Exception:
             if attempt == max_tries:
@@ -0,0 +1,55 @@
+# User_Service/app/UserMigrations.py
+"""
+Versioned schema migrations for the user database, run from the lifespan instead
+of a bare Base.metadata.create_all. Same scheme as the game service's
+GameMigrations (kept separate because each service ships in its own image):
+migrations are (version, name, fn(connection)), applied once in order and
+recorded in schema_migrations. Version 1 creates missing tables from the current
+models, so later migrations must be idempotent.
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.engine import Connection, Engine
+from typing import Callable
+
+from .UserModels import Base
+
+LOCK_ID = 7_310_002  #pg_advisory_xact_lock key, different from the game service's in case they share a server
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def _create_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn)  #checkfirst: existing tables are left as they are
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create_tables", _create_tables),
+]
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    #applies every migration not yet recorded in one transaction, returns the versions applied
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": LOCK_ID})
+        _meta.create_all(bind=conn)
+        done = applied_versions(conn)
+        applied = []
+        for version, name, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name))
+            applied.append(version)
+        return applied
@@ -0,0 +1,12 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from User_Service.app.UserMigrations import MIGRATIONS, run_migrations
+
+
+def test_migrations_create_users_table_and_run_once():
+    engine = create_engine("sqlite+pysqlite:///:memory:", poolclass=StaticPool)
+
+    assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+    assert run_migrations(engine) == []
+    assert {"users", "schema_migrations"} <= set(inspect(engine).get_table_names())